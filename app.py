@@ -1,24 +1,52 @@
 from __future__ import annotations
 
+import base64
+import binascii
 import csv
+import hashlib
+import html
+import json
 import logging
 import os
 import sqlite3
+import subprocess
+import sys
 import threading
 import time
-from dataclasses import dataclass, field
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
 
-from dblp_builder.pipeline import PipelineConfig, run_pipeline
+from dblp_builder.control import PipelineStore
+from dblp_builder.pipeline import PipelineConfig, venue_key
+from dblp_builder.schedule import BuildScheduler, parse_windows
+from dblp_builder.snapshot import install_snapshot, read_installed_manifest
+from flight_recorder import FlightRecorder, TracedConnection, annotate, end_trace, start_trace
+from query_backend import (
+    AuthorCompleter,
+    BackendLoadingError,
+    DataChangedError,
+    create_backend,
+    fts_query_from_text,
+    resolve_author_ids,
+)
+from traffic import TrafficCapture
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # optional: gzip only
+    BrotliMiddleware = None
 
 APP_VERSION = "0.1.0"
 
@@ -28,18 +56,86 @@ DEFAULT_DB_PATH = DATA_DIR / "dblp.sqlite"
 
 DB_PATH = Path(os.getenv("DB_PATH", str(DEFAULT_DB_PATH))).expanduser().resolve()
 DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "30000"))
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "").strip()
 
 DEFAULT_XML_GZ_URL = os.getenv("DBLP_XML_GZ_URL", "https://dblp.org/xml/dblp.xml.gz")
 DEFAULT_DTD_URL = os.getenv("DBLP_DTD_URL", "https://dblp.org/xml/dblp.dtd")
 DEFAULT_BATCH_SIZE = int(os.getenv("BATCH_SIZE", "1000"))
 DEFAULT_PROGRESS_EVERY = int(os.getenv("PROGRESS_EVERY", "10000"))
 MAX_LOG_LINES = int(os.getenv("MAX_LOG_LINES", "1000"))
+COLUMNAR_FORMAT = os.getenv("COLUMNAR_FORMAT", "").strip().lower() or None
+PIPELINE_STATE_PATH = Path(
+    os.getenv("PIPELINE_STATE_PATH", str(DATA_DIR / "pipeline_state.sqlite"))
+).expanduser().resolve()
+PIPELINE_HEARTBEAT_TIMEOUT = float(os.getenv("PIPELINE_HEARTBEAT_TIMEOUT", "60"))
+BUILD_MAX_RECORDS_PER_SEC = float(os.getenv("BUILD_MAX_RECORDS_PER_SEC", "0"))
+BUILD_MAX_WRITE_MB_PER_SEC = float(os.getenv("BUILD_MAX_WRITE_MB_PER_SEC", "0"))
+BUILD_NICE = int(os.getenv("BUILD_NICE", "0"))
+BUILD_PAUSE_LATENCY_MS = float(os.getenv("BUILD_PAUSE_LATENCY_MS", "0"))
+BUILD_OPTIMIZE = os.getenv("BUILD_OPTIMIZE", "1").strip().lower() not in {"0", "false", "no", "off"}
+BUILD_PAGE_SIZE = int(os.getenv("BUILD_PAGE_SIZE", "0")) or None
+SCHEDULE_INTERVAL_HOURS = float(os.getenv("SCHEDULE_INTERVAL_HOURS", "0"))
+SCHEDULE_WINDOWS = parse_windows(os.getenv("SCHEDULE_WINDOWS", ""))
+SCHEDULE_CHECK_UPSTREAM = os.getenv("SCHEDULE_CHECK_UPSTREAM", "1").strip().lower() not in {"0", "false", "no", "off"}
 
 MAX_LIMIT = int(os.getenv("MAX_LIMIT", "200"))
 MAX_ENTRIES_PER_SIDE = min(int(os.getenv("MAX_ENTRIES_PER_SIDE", "50")), 50)
 MAX_AUTHOR_RESOLVE = int(os.getenv("MAX_AUTHOR_RESOLVE", "800"))
+MAX_SEARCH_TERMS = int(os.getenv("MAX_SEARCH_TERMS", "16"))
+QUERY_BACKEND = os.getenv("QUERY_BACKEND", "sqlite").strip().lower()
+AUTHOR_CACHE_SIZE = int(os.getenv("AUTHOR_CACHE_SIZE", "4096"))
+AUTOCOMPLETE_ENABLED = os.getenv("AUTOCOMPLETE_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"}
+AUTOCOMPLETE_MAX_LIMIT = max(1, int(os.getenv("AUTOCOMPLETE_MAX_LIMIT", "20")))
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"}
+WARMUP_PREFETCH_INDEXES = os.getenv("WARMUP_PREFETCH_INDEXES", "1").strip().lower() not in {"0", "false", "no", "off"}
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "30"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+SLOW_REQUEST_CAPACITY = int(os.getenv("SLOW_REQUEST_CAPACITY", "50"))
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", "0"))
+CAPTURE_PATH = Path(os.getenv("CAPTURE_PATH", str(DATA_DIR / "traffic_capture.jsonl"))).expanduser().resolve()
+CAPTURE_ANONYMIZE = os.getenv("CAPTURE_ANONYMIZE", "0").strip().lower() not in {"0", "false", "no", "off"}
+CAPTURE_SALT = os.getenv("CAPTURE_SALT", "")
+CAPTURE_MAX_BYTES = int(os.getenv("CAPTURE_MAX_BYTES", str(100 * 1024 * 1024)))
+QUERY_ROUTES = (
+    "/api/stats",
+    "/api/pc-members",
+    "/api/coauthors/pairs",
+    "/api/publications/search",
+    "/api/authors/profile",
+    "/api/authors/autocomplete",
+    "/api/analytics/",
+)
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+PAIRS_ETAG = os.getenv("PAIRS_ETAG", "1").strip().lower() not in {"0", "false", "no", "off"}
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+# GET routes whose responses only change with the database build.
+DATA_ETAG_ROUTES = (
+    "/api/stats",
+    "/api/publications/search",
+    "/api/authors/profile",
+    "/api/analytics/",
+)
+# Tagged with the autocomplete index version instead; see ``_request_etag``.
+AUTOCOMPLETE_ROUTE = "/api/authors/autocomplete"
+# GET routes whose responses only change with the process configuration.
+STATIC_ETAG_ROUTES = ("/api/pc-members", "/api/config")
+# Settings that change response bodies; part of every ETag.
+_ETAG_SETTINGS = (
+    APP_VERSION,
+    MAX_LIMIT,
+    MAX_ENTRIES_PER_SIDE,
+    MAX_AUTHOR_RESOLVE,
+    MAX_SEARCH_TERMS,
+    AUTOCOMPLETE_MAX_LIMIT,
+    DEFAULT_XML_GZ_URL,
+    DEFAULT_DTD_URL,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PROGRESS_EVERY,
+    str(DATA_DIR),
+)
 
 FULLMETA_PUBLICATION_COLUMNS = {"id", "title", "year", "venue", "pub_type", "raw_xml"}
+AGGREGATE_TABLES = {"venues", "venue_year_counts", "author_venue_year_counts"}
 
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
@@ -60,10 +156,24 @@ def _parse_cors_origins() -> list[str]:
     return [part.strip() for part in raw.split(",") if part.strip()]
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if SNAPSHOT_PATH:
+        await run_in_threadpool(install_snapshot, Path(SNAPSHOT_PATH).expanduser().resolve(), DB_PATH, logger.info)
+    if WARMUP_ENABLED:
+        warmup.start()
+    if scheduler is not None:
+        scheduler.start()
+    yield
+    if scheduler is not None:
+        scheduler.stop()
+
+
 app = FastAPI(
     title="DblpService",
     description="DBLP build + query backend (CoAuthors-compatible /api endpoints).",
     version=APP_VERSION,
+    lifespan=_lifespan,
 )
 
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
@@ -75,13 +185,203 @@ if origins:
         allow_origins=origins,
         allow_credentials=True,
         allow_methods=["GET", "POST", "OPTIONS"],
-        allow_headers=["Content-Type"],
+        allow_headers=["Content-Type", "If-None-Match"],
+        expose_headers=["ETag"],
     )
 
 logger = logging.getLogger("dblp_service")
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 
 
+@app.exception_handler(BackendLoadingError)
+async def backend_loading(request: Request, exc: BackendLoadingError) -> JSONResponse:
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "5"})
+
+
+@app.middleware("http")
+async def record_slow_requests(request: Request, call_next: Any) -> Any:
+    path = request.url.path
+    if not flight_recorder.enabled or not path.startswith("/api/") or path.startswith("/api/admin/"):
+        return await call_next(request)
+    token = start_trace(request.method, path, dict(request.query_params))
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        trace = end_trace(token)
+        # Recording runs EXPLAIN on its own connection; keep it off the event loop.
+        if trace is not None and flight_recorder.wants(trace):
+            await run_in_threadpool(flight_recorder.record, trace, status_code)
+
+
+traffic_capture = TrafficCapture(
+    CAPTURE_PATH,
+    CAPTURE_SAMPLE_RATE,
+    anonymize=CAPTURE_ANONYMIZE,
+    salt=CAPTURE_SALT,
+    max_bytes=CAPTURE_MAX_BYTES,
+)
+
+
+async def _json_body(request: Request) -> Any:
+    """The request's JSON body (``None`` if empty or not JSON), parsed once per request.
+
+    Kept in ``request.state``, which every middleware's ``Request`` shares, so
+    capture and ETag checks do not each read and decode the body.
+    """
+    if not hasattr(request.state, "json_body"):
+        try:
+            request.state.json_body = json.loads(await request.body() or b"null")
+        except ValueError:
+            request.state.json_body = None
+    return request.state.json_body
+
+
+@app.middleware("http")
+async def capture_traffic(request: Request, call_next: Any) -> Any:
+    path = request.url.path
+    if not path.startswith(QUERY_ROUTES) or not traffic_capture.should_sample():
+        return await call_next(request)
+    body = await _json_body(request) if request.method == "POST" else None
+    started = time.perf_counter()
+    response = await call_next(request)
+    try:
+        traffic_capture.write(
+            request.method,
+            path,
+            request.url.query,
+            body,
+            response.status_code,
+            (time.perf_counter() - started) * 1000,
+        )
+    except OSError as exc:
+        logger.warning("Traffic capture write failed: %s", exc)
+    return response
+
+
+class QueryLatencyWindow:
+    """Recent query durations of this worker, published for the build throttle.
+
+    Every ``publish_every`` seconds the 95th percentile of the last
+    ``window_seconds`` is written to the pipeline store, where a running
+    build reads the highest value across workers.
+    """
+
+    def __init__(self, store: PipelineStore, window_seconds: float = 10.0, publish_every: float = 2.0) -> None:
+        self._store = store
+        self.window_seconds = window_seconds
+        self.publish_every = publish_every
+        self._samples: deque[tuple[float, float]] = deque()
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, duration_ms: float) -> bool:
+        """Record a request; True when it is time to publish."""
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, duration_ms))
+            if now - self._last_publish < self.publish_every:
+                return False
+            self._last_publish = now
+            return True
+
+    def publish(self) -> None:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            durations = sorted(ms for _, ms in self._samples)
+        p95 = durations[int(0.95 * (len(durations) - 1))] if durations else None
+        self._store.publish_latency(os.getpid(), p95, len(durations))
+
+
+@app.middleware("http")
+async def track_query_latency(request: Request, call_next: Any) -> Any:
+    if BUILD_PAUSE_LATENCY_MS <= 0 or not request.url.path.startswith(QUERY_ROUTES):
+        return await call_next(request)
+    started = time.perf_counter()
+    response = await call_next(request)
+    if query_latency.add((time.perf_counter() - started) * 1000):
+        try:
+            await run_in_threadpool(query_latency.publish)
+        except sqlite3.Error as exc:
+            logger.warning("Cannot publish query latency: %s", exc)
+    return response
+
+
+def _make_etag(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    # Weak: the same representation may be sent gzip/brotli-encoded or not.
+    return f'W/"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+async def _request_etag(request: Request) -> str | None:
+    """ETag for a cacheable request, or ``None`` when the route is not cacheable.
+
+    Data routes are tagged with the database file version, so every worker
+    serving the same file agrees and a finished build changes every tag.
+    Autocomplete answers from an in-memory index that is rebuilt in the
+    background, so it is tagged with the version that index was built from.
+    """
+    path = request.url.path
+    if request.method == "GET" and path in STATIC_ETAG_ROUTES:
+        return _make_etag(_ETAG_SETTINGS, PC_MEMBERS_VERSION, path)
+    if request.method == "GET" and path == AUTOCOMPLETE_ROUTE:
+        version = author_completer.version
+        if version is None:
+            return None
+        return _make_etag(_ETAG_SETTINGS, version, path, request.url.query)
+    if request.method == "GET" and path.startswith(DATA_ETAG_ROUTES):
+        version = _db_version()
+        if version is None:
+            return None
+        return _make_etag(_ETAG_SETTINGS, version, _detect_data_date(), path, request.url.query)
+    if request.method == "POST" and path == "/api/coauthors/pairs" and PAIRS_ETAG:
+        # Not standard HTTP (a POST is not a cacheable read): our own clients
+        # repeat the same pair queries and revalidate them like GETs.
+        version = _db_version()
+        body = await _json_body(request)
+        if version is None or body is None:
+            return None
+        return _make_etag(_ETAG_SETTINGS, version, path, body)
+    return None
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+@app.middleware("http")
+async def conditional_requests(request: Request, call_next: Any) -> Any:
+    etag = await _request_etag(request)
+    if etag is None:
+        return await call_next(request)
+    cache_control = f"public, max-age={HTTP_CACHE_MAX_AGE}" if HTTP_CACHE_MAX_AGE > 0 else "no-cache"
+    if request.method == "POST":
+        cache_control = "private, no-cache"
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    response = await call_next(request)
+    # A build finishing mid-request would make the tag describe the wrong data.
+    if response.status_code == 200 and await _request_etag(request) == etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = cache_control
+    return response
+
+
+if COMPRESS_MIN_BYTES > 0:
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
 @app.get("/", response_class=HTMLResponse)
 @app.get("/bootstrap", response_class=HTMLResponse)
 def bootstrap_console(request: Request) -> HTMLResponse:
@@ -118,23 +418,6 @@ def _sanitize_author_entries(entries: list[str]) -> list[str]:
     return out
 
 
-def _fts_query_from_text(text: str, max_terms: int = 6) -> str:
-    cleaned = "".join((ch.lower() if ch.isalnum() else " ") for ch in text)
-    tokens = cleaned.split()
-    uniq: list[str] = []
-    seen = set()
-    for t in tokens:
-        if len(t) < 2:
-            continue
-        if t in seen:
-            continue
-        seen.add(t)
-        uniq.append(t)
-        if len(uniq) >= max_terms:
-            break
-    return " ".join(uniq)
-
-
 def _get_connection() -> sqlite3.Connection:
     if not DB_PATH.exists():
         raise HTTPException(status_code=503, detail="Database file is not available.")
@@ -143,6 +426,7 @@ def _get_connection() -> sqlite3.Connection:
             str(DB_PATH),
             timeout=max(DB_BUSY_TIMEOUT_MS / 1000.0, 1.0),
             check_same_thread=False,
+            factory=TracedConnection,
         )
     except sqlite3.Error as exc:
         raise HTTPException(status_code=503, detail=f"Cannot open database: {exc}") from exc
@@ -173,10 +457,43 @@ def _ensure_fullmeta_schema(conn: sqlite3.Connection) -> None:
         )
 
 
+def _db_version() -> tuple[int, int, int] | None:
+    try:
+        st = DB_PATH.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _ensure_aggregates(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
+    cur.execute("SELECT name FROM sqlite_master WHERE type = 'table';")
+    tables = {row["name"] for row in cur.fetchall()}
+    if not AGGREGATE_TABLES.issubset(tables):
+        raise HTTPException(
+            status_code=503,
+            detail="Aggregates are not available; rebuild or run `python -m dblp_builder aggregate`.",
+        )
+
+
+def _explain_query_plan(sql: str, params: Any) -> list[str]:
+    conn = _get_connection()
+    try:
+        return [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+    finally:
+        conn.close()
+
+
+flight_recorder = FlightRecorder(SLOW_REQUEST_MS, SLOW_REQUEST_CAPACITY, explain=_explain_query_plan)
+
+
 def _detect_data_date() -> str:
     override = os.getenv("DATA_DATE", "").strip()
     if override:
         return override
+    manifest = read_installed_manifest(DB_PATH)
+    if manifest and manifest.get("source", {}).get("date"):
+        return str(manifest["source"]["date"])
     try:
         st = DB_PATH.stat()
     except OSError:
@@ -186,55 +503,44 @@ def _detect_data_date() -> str:
     return ts.strftime("%Y-%m-%d")
 
 
-def _resolve_author_ids(
-    conn: sqlite3.Connection,
-    name_query: str,
-    limit: int | None = None,
-    exact_base_match: bool = False,
-) -> list[int]:
-    normalized = _normalize(name_query)
-    if not normalized:
-        return []
+def _clamp_limit(value: int | None, default: int) -> int:
+    if value is None:
+        return default
+    try:
+        n = int(value)
+    except Exception:
+        return default
+    return max(1, min(n, MAX_LIMIT))
 
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM authors WHERE name = ? LIMIT 1;", (normalized,))
-    row = cur.fetchone()
-    if row:
-        return [int(row["id"])]
-    if exact_base_match:
-        return []
 
-    lim = MAX_AUTHOR_RESOLVE if limit is None else max(1, min(int(limit), MAX_AUTHOR_RESOLVE))
+# Private-use characters FTS5 wraps around matches; the title is escaped
+# before they become <mark> tags, so title text never turns into markup.
+_MARK_OPEN = "\ue000"
+_MARK_CLOSE = "\ue001"
 
-    fts = _fts_query_from_text(normalized)
-    if fts:
-        try:
-            cur.execute(
-                "SELECT rowid AS id FROM author_fts WHERE author_fts MATCH ? LIMIT ?;",
-                (fts, lim),
-            )
-            ids = [int(r["id"]) for r in cur.fetchall()]
-            if ids:
-                return ids
-        except sqlite3.Error:
-            pass
 
-    cur.execute("SELECT id FROM authors WHERE name LIKE ? LIMIT ?;", (f"%{normalized}%", lim))
-    return [int(r["id"]) for r in cur.fetchall()]
+def _highlight_html(marked: str | None) -> str | None:
+    if marked is None:
+        return None
+    return html.escape(marked, quote=False).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
 
 
-def _placeholders(items: list[int]) -> str:
-    return ",".join("?" for _ in items) if items else "NULL"
+def _encode_cursor(values: dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
 
-def _clamp_limit(value: int | None, default: int) -> int:
-    if value is None:
-        return default
+def _decode_cursor(cursor: str | None) -> dict[str, Any] | None:
+    if not cursor:
+        return None
     try:
-        n = int(value)
-    except Exception:
-        return default
-    return max(1, min(n, MAX_LIMIT))
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
 
 
 class CoauthoredPairsRequest(BaseModel):
@@ -252,143 +558,100 @@ class StartRequest(BaseModel):
     batch_size: int = Field(default=DEFAULT_BATCH_SIZE, ge=100)
     progress_every: int = Field(default=DEFAULT_PROGRESS_EVERY, ge=1000)
     rebuild: bool = True
-
-
-@dataclass(slots=True)
-class PipelineState:
-    status: str = "idle"
-    step: str = "idle"
-    message: str = ""
-    started_at: str | None = None
-    finished_at: str | None = None
-    progress: dict[str, Any] = field(default_factory=dict)
-    logs: list[str] = field(default_factory=list)
-
-
-def _now_iso() -> str:
-    return datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    resume: bool = False
 
 
 class PipelineManager:
-    def __init__(self) -> None:
-        self._lock = threading.Lock()
-        self._stop = threading.Event()
-        self._thread: threading.Thread | None = None
-        self._state = PipelineState()
+    """Starts builds as a child process and reads their state from the shared store.
+
+    Any service worker may start, stop or observe the pipeline; the store's
+    ``begin_run`` transaction guarantees that only one build runs at a time.
+    """
 
-    def _append_log_locked(self, msg: str) -> None:
-        self._state.logs.append(msg)
-        if len(self._state.logs) > MAX_LOG_LINES:
-            self._state.logs = self._state.logs[-MAX_LOG_LINES :]
+    def __init__(self, store: PipelineStore) -> None:
+        self._store = store
 
     def snapshot(self) -> dict[str, Any]:
-        with self._lock:
-            return {
-                "status": self._state.status,
-                "step": self._state.step,
-                "message": self._state.message,
-                "started_at": self._state.started_at,
-                "finished_at": self._state.finished_at,
-                "progress": dict(self._state.progress),
-                "logs": list(self._state.logs),
-            }
+        return self._store.snapshot()
 
     def start(self, req: StartRequest) -> dict[str, Any]:
-        with self._lock:
-            if self._thread is not None and self._thread.is_alive():
-                raise HTTPException(status_code=409, detail="Pipeline is already running.")
-            self._stop.clear()
-            self._state = PipelineState(
-                status="running",
-                step="starting",
-                message="",
-                started_at=_now_iso(),
-                finished_at=None,
-                progress={},
-                logs=[],
-            )
-            self._append_log_locked("Pipeline start requested.")
-
-            config = PipelineConfig(
-                xml_gz_url=req.xml_gz_url,
-                dtd_url=req.dtd_url,
-                data_dir=DATA_DIR,
-                batch_size=req.batch_size,
-                progress_every=req.progress_every,
-                rebuild=req.rebuild,
-            )
+        config = PipelineConfig(
+            xml_gz_url=req.xml_gz_url,
+            dtd_url=req.dtd_url,
+            data_dir=DATA_DIR,
+            batch_size=req.batch_size,
+            progress_every=req.progress_every,
+            rebuild=req.rebuild,
+            resume=req.resume,
+            columnar_format=COLUMNAR_FORMAT,
+            max_records_per_sec=BUILD_MAX_RECORDS_PER_SEC,
+            max_write_mb_per_sec=BUILD_MAX_WRITE_MB_PER_SEC,
+            nice=BUILD_NICE,
+            pause_latency_ms=BUILD_PAUSE_LATENCY_MS,
+            optimize=BUILD_OPTIMIZE,
+            page_size=BUILD_PAGE_SIZE,
+        )
+        if not self._store.begin_run(config):
+            raise HTTPException(status_code=409, detail="Pipeline is already running.")
 
-            self._thread = threading.Thread(
-                target=self._run_job,
-                args=(config,),
-                daemon=True,
+        try:
+            process = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "dblp_builder.control",
+                    "--store",
+                    str(self._store.path),
+                    "--max-log-lines",
+                    str(MAX_LOG_LINES),
+                ],
+                cwd=str(BASE_DIR),
+                start_new_session=True,
             )
-            self._thread.start()
-            return self.snapshot()
+        except OSError as exc:
+            self._store.finish("error", str(exc), f"Pipeline error: {exc}")
+            raise HTTPException(status_code=500, detail=f"Cannot start pipeline: {exc}") from exc
+
+        threading.Thread(target=self._wait, args=(process,), daemon=True).start()
+        return self.snapshot()
+
+    def _wait(self, process: subprocess.Popen[bytes]) -> None:
+        returncode = process.wait()
+        if returncode != 0:
+            self._store.fail_if_active(process.pid, f"Pipeline process exited with code {returncode}.")
 
     def stop(self) -> dict[str, Any]:
-        self._stop.set()
-        with self._lock:
-            if self._state.status == "running":
-                self._state.status = "stopping"
-                self._state.message = "Stop requested."
-                self._append_log_locked("Stop requested.")
+        self._store.request_stop()
         return self.snapshot()
 
     def reset(self) -> dict[str, Any]:
-        with self._lock:
-            if self._thread is not None and self._thread.is_alive():
-                raise HTTPException(status_code=409, detail="Cannot reset while running.")
-            self._stop.clear()
-            self._state = PipelineState()
-            self._append_log_locked("Reset.")
+        if not self._store.reset():
+            raise HTTPException(status_code=409, detail="Cannot reset while running.")
         return self.snapshot()
 
-    def _run_job(self, config: PipelineConfig) -> None:
-        def _log(msg: str) -> None:
-            with self._lock:
-                self._append_log_locked(msg)
-                self._state.message = msg
-
-        def _progress(phase: str, payload: dict[str, Any]) -> None:
-            with self._lock:
-                self._state.step = phase
-                self._state.progress.update(payload)
-
-        def _should_stop() -> bool:
-            return self._stop.is_set()
 
-        try:
-            result = run_pipeline(
-                config=config,
-                log=_log,
-                progress=_progress,
-                should_stop=_should_stop,
-            )
-            with self._lock:
-                self._state.status = "completed"
-                self._state.step = "completed"
-                self._state.message = "Completed."
-                self._state.finished_at = _now_iso()
-                self._state.progress.update(result)
-                self._append_log_locked("Pipeline completed.")
-        except InterruptedError:
-            with self._lock:
-                self._state.status = "stopped"
-                self._state.step = "stopped"
-                self._state.message = "Stopped."
-                self._state.finished_at = _now_iso()
-                self._append_log_locked("Pipeline stopped.")
-        except Exception as exc:
-            with self._lock:
-                self._state.status = "error"
-                self._state.step = "error"
-                self._state.message = str(exc)
-                self._state.finished_at = _now_iso()
-                self._append_log_locked(f"Pipeline error: {exc}")
-
-
-manager = PipelineManager()
+pipeline_store = PipelineStore(
+    PIPELINE_STATE_PATH,
+    max_log_lines=MAX_LOG_LINES,
+    heartbeat_timeout=PIPELINE_HEARTBEAT_TIMEOUT,
+)
+manager = PipelineManager(pipeline_store)
+query_latency = QueryLatencyWindow(pipeline_store)
+
+scheduler: BuildScheduler | None = None
+if SCHEDULE_INTERVAL_HOURS > 0:
+    scheduler = BuildScheduler(
+        pipeline_store,
+        start_build=lambda: manager.start(StartRequest()),
+        interval_seconds=SCHEDULE_INTERVAL_HOURS * 3600,
+        windows=SCHEDULE_WINDOWS,
+        upstream_url=DEFAULT_XML_GZ_URL,
+        db_path=DB_PATH,
+        check_upstream=SCHEDULE_CHECK_UPSTREAM,
+        log=logger.info,
+    )
+else:
+    pipeline_store.update_schedule({"enabled": False})
 
 
 def _safe_file_info(path: Path) -> dict[str, Any]:
@@ -414,6 +677,154 @@ def _load_pc_members() -> list[dict[str, str]]:
 
 
 PC_MEMBERS = _load_pc_members()
+PC_MEMBERS_VERSION = hashlib.sha256(json.dumps(PC_MEMBERS, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+query_backend = create_backend(
+    QUERY_BACKEND,
+    connect=_get_connection,
+    prepare=_ensure_fullmeta_schema,
+    max_resolve=MAX_AUTHOR_RESOLVE,
+    author_cache_size=AUTHOR_CACHE_SIZE,
+    data_version=_db_version,
+)
+author_completer = AuthorCompleter(
+    connect=_get_connection,
+    prepare=_ensure_fullmeta_schema,
+    max_limit=AUTOCOMPLETE_MAX_LIMIT,
+    data_version=_db_version,
+)
+
+
+def _prefetch_indexes(conn: sqlite3.Connection) -> dict[str, float]:
+    """Scan the author lookup and pub_authors indexes so their pages are cached.
+
+    ``COUNT(*)`` would walk the table b-tree instead, so each index is read
+    through its leading column with ``INDEXED BY``.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT name, tbl_name FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name IN ('authors', 'pub_authors') ORDER BY name;"
+    )
+    timings: dict[str, float] = {}
+    for index_name, table in cur.fetchall():
+        cur.execute(f'PRAGMA index_info("{index_name}");')
+        columns = sorted(cur.fetchall(), key=lambda row: row["seqno"])
+        if not columns or columns[0]["name"] is None:
+            continue
+        started = time.time()
+        cur.execute(f'SELECT COUNT("{columns[0]["name"]}") FROM "{table}" INDEXED BY "{index_name}";')
+        cur.fetchone()
+        timings[index_name] = round((time.time() - started) * 1000, 1)
+    return timings
+
+
+class Warmup:
+    """Prepares a worker before it reports ready.
+
+    Warm-up prefetches the lookup indexes, loads the query backend and primes
+    the author-resolution cache with the PC member list. It runs in a
+    background thread at startup and retries until the database is usable.
+    Once ready, a changed database file triggers another warm-up in the
+    background without taking the worker out of rotation.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._state: dict[str, Any] = {
+            "ready": False,
+            "status": "pending",
+            "message": "",
+            "started_at": None,
+            "finished_at": None,
+            "steps": {},
+        }
+        self._version: tuple[int, int, int] | None = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def _set(self, **values: Any) -> None:
+        with self._lock:
+            self._state.update(values)
+
+    def _run(self) -> None:
+        while True:
+            self._set(
+                status="warming",
+                message="",
+                started_at=datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            )
+            try:
+                self._warm()
+                return
+            except (HTTPException, sqlite3.Error) as exc:
+                message = exc.detail if isinstance(exc, HTTPException) else str(exc)
+                logger.warning("Warm-up failed, retrying in %.0fs: %s", WARMUP_RETRY_SECONDS, message)
+                self._set(status="error", message=str(message))
+            except Exception as exc:
+                # Anything else (a malformed PC file, a backend bug) must not
+                # kill the thread and leave the worker "warming" forever.
+                logger.exception("Warm-up failed unexpectedly, retrying in %.0fs", WARMUP_RETRY_SECONDS)
+                self._set(status="error", message=f"{type(exc).__name__}: {exc}")
+            time.sleep(WARMUP_RETRY_SECONDS)
+
+    def _warm(self) -> None:
+        version = _db_version()
+        steps: dict[str, Any] = {}
+        started = time.time()
+        conn = _get_connection()
+        try:
+            _ensure_fullmeta_schema(conn)
+            if WARMUP_PREFETCH_INDEXES:
+                steps["prefetch_ms"] = _prefetch_indexes(conn)
+        finally:
+            conn.close()
+
+        step_started = time.time()
+        query_backend.load()
+        steps["backend_load_ms"] = round((time.time() - step_started) * 1000, 1)
+
+        if AUTOCOMPLETE_ENABLED:
+            step_started = time.time()
+            author_completer.load()
+            steps["autocomplete_load_ms"] = round((time.time() - step_started) * 1000, 1)
+
+        step_started = time.time()
+        with query_backend.session() as session:
+            for member in PC_MEMBERS:
+                session.resolve_author_ids(member["name"], exact_base_match=True)
+        steps["primed_authors"] = len(PC_MEMBERS)
+        steps["prime_ms"] = round((time.time() - step_started) * 1000, 1)
+
+        elapsed = time.time() - started
+        with self._lock:
+            self._version = version
+            self._state.update(
+                ready=True,
+                status="ready",
+                message="",
+                finished_at=datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                steps=steps,
+            )
+        logger.info("Warm-up finished in %.1fs: %s", elapsed, steps)
+
+    def check(self) -> dict[str, Any]:
+        version = _db_version()
+        with self._lock:
+            state = dict(self._state)
+            stale = state["ready"] and version != self._version
+        if stale and version is not None:
+            self.start()
+        return state
+
+
+warmup = Warmup()
 
 
 @app.get("/api/health")
@@ -426,20 +837,26 @@ def api_health() -> dict[str, Any]:
     return {"status": "ok"}
 
 
+@app.get("/api/ready")
+def api_ready() -> JSONResponse:
+    if not WARMUP_ENABLED:
+        api_health()
+        return JSONResponse({"status": "ready", "warmup": False})
+    state = warmup.check()
+    if _db_version() is None:
+        state.update(ready=False, status="unavailable", message="Database file is not available.")
+    elif state["ready"]:
+        state["status"] = "ready"
+    return JSONResponse({**state, "warmup": True}, status_code=200 if state["ready"] else 503)
+
+
 @app.get("/api/stats")
 def api_stats() -> dict[str, Any]:
-    conn = _get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) AS cnt FROM publications;")
-        pub_count = int(cur.fetchone()["cnt"])
-        cur.execute("SELECT COUNT(*) AS cnt FROM authors;")
-        author_count = int(cur.fetchone()["cnt"])
-    finally:
-        conn.close()
+    with query_backend.session() as session:
+        counts = session.counts()
     return {
-        "publications": pub_count,
-        "authors": author_count,
+        "publications": counts["publications"],
+        "authors": counts["authors"],
         "data_source": "DBLP",
         "data_date": _detect_data_date(),
     }
@@ -466,71 +883,49 @@ def api_coauthors_pairs(
     if author_limit is not None:
         author_limit = min(int(author_limit), MAX_AUTHOR_RESOLVE)
     year_min = payload.year_min
+    annotate(
+        left=left_entries,
+        right=right_entries,
+        limit_per_pair=limit_per_pair,
+        author_limit=author_limit,
+        exact_base_match=payload.exact_base_match,
+        year_min=year_min,
+    )
 
-    conn = _get_connection()
-    try:
-        _ensure_fullmeta_schema(conn)
-
+    with query_backend.session() as session:
         left_ids: dict[str, list[int]] = {}
         right_ids: dict[str, list[int]] = {}
 
-        for entry in left_entries:
-            left_ids[entry] = _resolve_author_ids(
-                conn,
-                entry,
-                limit=author_limit,
-                exact_base_match=payload.exact_base_match,
-            )
-        for entry in right_entries:
-            right_ids[entry] = _resolve_author_ids(
-                conn,
-                entry,
-                limit=author_limit,
-                exact_base_match=payload.exact_base_match,
-            )
+        try:
+            for entry in left_entries:
+                left_ids[entry] = session.resolve_author_ids(
+                    entry,
+                    limit=author_limit,
+                    exact_base_match=payload.exact_base_match,
+                )
+            for entry in right_entries:
+                right_ids[entry] = session.resolve_author_ids(
+                    entry,
+                    limit=author_limit,
+                    exact_base_match=payload.exact_base_match,
+                )
+        except DataChangedError as exc:
+            raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "5"}) from exc
 
         matrix: dict[str, dict[str, int]] = {left: {} for left in left_entries}
         pair_pubs: list[dict[str, Any]] = []
 
-        cur = conn.cursor()
         for left_entry, left_author_ids in left_ids.items():
             for right_entry, right_author_ids in right_ids.items():
                 if not left_author_ids or not right_author_ids:
                     items: list[dict[str, Any]] = []
                 else:
-                    limit_sql = "" if limit_per_pair is None else "LIMIT ?"
-                    year_filter_sql = "" if year_min is None else "AND p.year >= ?"
-                    params: tuple[Any, ...] = (*left_author_ids, *right_author_ids)
-                    if year_min is not None:
-                        params = (*params, int(year_min))
-                    if limit_per_pair is not None:
-                        params = (*params, int(limit_per_pair))
-
-                    order_sql = "ORDER BY (p.year IS NULL) ASC, p.year DESC, p.title ASC"
-                    cur.execute(
-                        f"""
-                        SELECT DISTINCT p.title, p.year, p.venue, p.pub_type
-                        FROM pub_authors pa1
-                        JOIN pub_authors pa2 ON pa1.pub_id = pa2.pub_id
-                        JOIN publications p ON p.id = pa1.pub_id
-                        WHERE pa1.author_id IN ({_placeholders(left_author_ids)})
-                          AND pa2.author_id IN ({_placeholders(right_author_ids)})
-                        {year_filter_sql}
-                        {order_sql}
-                        {limit_sql};
-                        """,
-                        params,
+                    items = session.coauthored_publications(
+                        left_author_ids,
+                        right_author_ids,
+                        year_min=year_min,
+                        limit=limit_per_pair,
                     )
-                    rows = cur.fetchall()
-                    items = [
-                        {
-                            "title": row["title"],
-                            "year": row["year"],
-                            "venue": row["venue"],
-                            "pub_type": row["pub_type"],
-                        }
-                        for row in rows
-                    ]
 
                 matrix[left_entry][right_entry] = len(items)
                 pair_pubs.append(
@@ -542,19 +937,458 @@ def api_coauthors_pairs(
                     }
                 )
 
-        return {
-            "limit_per_pair": limit_per_pair,
-            "exact_base_match": payload.exact_base_match,
-            "left_authors": left_entries,
-            "right_authors": right_entries,
-            "matrix": matrix,
-            "pair_pubs": pair_pubs,
-            "pair_count": len(pair_pubs),
+    return {
+        "limit_per_pair": limit_per_pair,
+        "exact_base_match": payload.exact_base_match,
+        "left_authors": left_entries,
+        "right_authors": right_entries,
+        "matrix": matrix,
+        "pair_pubs": pair_pubs,
+        "pair_count": len(pair_pubs),
+    }
+
+
+@app.get("/api/publications/search")
+def api_publications_search(
+    q: str = Query(..., min_length=1),
+    year_min: int | None = None,
+    year_max: int | None = None,
+    venue: str | None = None,
+    pub_type: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    highlight: bool = False,
+) -> dict[str, Any]:
+    fts = fts_query_from_text(q, max_terms=MAX_SEARCH_TERMS)
+    if not fts:
+        raise HTTPException(status_code=400, detail="Query has no searchable terms.")
+    page_size = _clamp_limit(limit, default=20)
+
+    after = _decode_cursor(cursor)
+    if after is not None:
+        try:
+            after_score = float(after["s"])
+            after_id = int(after["id"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+
+    where = ["title_fts MATCH ?"]
+    params: list[Any] = [fts]
+    if year_min is not None:
+        where.append("p.year >= ?")
+        params.append(int(year_min))
+    if year_max is not None:
+        where.append("p.year <= ?")
+        params.append(int(year_max))
+    if venue:
+        where.append("p.venue = ?")
+        params.append(_normalize(venue))
+    if pub_type:
+        where.append("p.pub_type = ?")
+        params.append(_normalize(pub_type))
+    if after is not None:
+        where.append("(bm25(title_fts) > ? OR (bm25(title_fts) = ? AND p.id > ?))")
+        params.extend([after_score, after_score, after_id])
+
+    highlight_sql = (
+        f", highlight(title_fts, 0, char({ord(_MARK_OPEN)}), char({ord(_MARK_CLOSE)})) AS snippet"
+        if highlight
+        else ""
+    )
+    conn = _get_connection()
+    try:
+        _ensure_fullmeta_schema(conn)
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f"""
+                SELECT p.id, p.title, p.year, p.venue, p.pub_type,
+                       bm25(title_fts) AS score{highlight_sql}
+                FROM title_fts
+                JOIN publications p ON p.id = title_fts.rowid
+                WHERE {" AND ".join(where)}
+                ORDER BY score ASC, p.id ASC
+                LIMIT ?;
+                """,
+                (*params, page_size + 1),
+            )
+        except sqlite3.Error as exc:
+            raise HTTPException(status_code=503, detail=f"Title search is unavailable: {exc}") from exc
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    items = []
+    for row in rows:
+        item = {
+            "id": row["id"],
+            "title": row["title"],
+            "year": row["year"],
+            "venue": row["venue"],
+            "pub_type": row["pub_type"],
+            "score": row["score"],
+        }
+        if highlight:
+            item["snippet"] = _highlight_html(row["snippet"])
+        items.append(item)
+
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = _encode_cursor({"s": rows[-1]["score"], "id": rows[-1]["id"]})
+    return {
+        "query": fts,
+        "items": items,
+        "count": len(items),
+        "next_cursor": next_cursor,
+    }
+
+
+def _author_publications_page(
+    cur: sqlite3.Cursor,
+    author_id: int,
+    page_size: int,
+    after: dict[str, Any] | None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    keyset_sql = ""
+    params: list[Any] = [author_id]
+    if after is not None:
+        try:
+            after_year = None if after.get("y") is None else int(after["y"])
+            after_id = int(after["id"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+        if after_year is None:
+            keyset_sql = "AND p.year IS NULL AND p.id < ?"
+            params.append(after_id)
+        else:
+            keyset_sql = "AND (p.year < ? OR (p.year = ? AND p.id < ?) OR p.year IS NULL)"
+            params.extend([after_year, after_year, after_id])
+
+    cur.execute(
+        f"""
+        SELECT p.id, p.title, p.year, p.venue, p.pub_type
+        FROM pub_authors pa
+        JOIN publications p ON p.id = pa.pub_id
+        WHERE pa.author_id = ?
+        {keyset_sql}
+        ORDER BY (p.year IS NULL) ASC, p.year DESC, p.id DESC
+        LIMIT ?;
+        """,
+        (*params, page_size + 1),
+    )
+    rows = cur.fetchall()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    items = [
+        {
+            "id": row["id"],
+            "title": row["title"],
+            "year": row["year"],
+            "venue": row["venue"],
+            "pub_type": row["pub_type"],
+        }
+        for row in rows
+    ]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = _encode_cursor({"y": rows[-1]["year"], "id": rows[-1]["id"]})
+    return items, next_cursor
+
+
+def _lookup_author(conn: sqlite3.Connection, name: str | None, author_id: int | None) -> sqlite3.Row:
+    """Find one author by ID, or by exact DBLP name; 404 when neither matches."""
+    if author_id is None:
+        ids = resolve_author_ids(conn, name or "", MAX_AUTHOR_RESOLVE, exact_base_match=True)
+        if not ids:
+            raise HTTPException(status_code=404, detail="Author not found.")
+        author_id = ids[0]
+    cur = conn.cursor()
+    cur.execute("SELECT id, name FROM authors WHERE id = ?;", (int(author_id),))
+    author = cur.fetchone()
+    if author is None:
+        raise HTTPException(status_code=404, detail="Author not found.")
+    return author
+
+
+@app.get(AUTOCOMPLETE_ROUTE)
+def api_authors_autocomplete(q: str, limit: int | None = None) -> dict[str, Any]:
+    if not AUTOCOMPLETE_ENABLED:
+        raise HTTPException(status_code=404, detail="Autocomplete is disabled.")
+    limit = 10 if limit is None else limit
+    items = author_completer.complete(q, limit)
+    return {"query": q, "items": items, "count": len(items)}
+
+
+@app.get("/api/authors/profile")
+def api_author_profile(
+    name: str | None = None,
+    author_id: int | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    coauthor_limit: int | None = None,
+) -> dict[str, Any]:
+    if author_id is None and not _normalize(name or ""):
+        raise HTTPException(status_code=400, detail="Either name or author_id is required.")
+    page_size = _clamp_limit(limit, default=50)
+    top_k = _clamp_limit(coauthor_limit, default=20)
+    after = _decode_cursor(cursor)
+
+    conn = _get_connection()
+    try:
+        _ensure_fullmeta_schema(conn)
+        cur = conn.cursor()
+        author = _lookup_author(conn, name, author_id)
+        author_id = int(author["id"])
+
+        publications, next_cursor = _author_publications_page(cur, author_id, page_size, after)
+        result: dict[str, Any] = {
+            "author": {"id": author_id, "name": author["name"]},
+            "publications": publications,
+            "next_cursor": next_cursor,
         }
+        # Aggregates only change between builds, so they are sent with the
+        # first page and skipped while the client is paging.
+        if after is None:
+            cur.execute("SELECT COUNT(*) AS cnt FROM pub_authors WHERE author_id = ?;", (author_id,))
+            result["publication_count"] = int(cur.fetchone()["cnt"])
+
+            cur.execute(
+                """
+                SELECT a.id, a.name, COUNT(DISTINCT pa2.pub_id) AS cnt
+                FROM pub_authors pa1
+                JOIN pub_authors pa2 ON pa2.pub_id = pa1.pub_id
+                JOIN authors a ON a.id = pa2.author_id
+                WHERE pa1.author_id = ? AND pa2.author_id != pa1.author_id
+                GROUP BY a.id
+                ORDER BY cnt DESC, a.name ASC
+                LIMIT ?;
+                """,
+                (author_id, top_k),
+            )
+            result["coauthors"] = [
+                {"id": row["id"], "name": row["name"], "count": row["cnt"]}
+                for row in cur.fetchall()
+            ]
+
+            cur.execute(
+                """
+                SELECT p.year, COUNT(*) AS cnt
+                FROM pub_authors pa
+                JOIN publications p ON p.id = pa.pub_id
+                WHERE pa.author_id = ?
+                GROUP BY p.year
+                ORDER BY p.year ASC;
+                """,
+                (author_id,),
+            )
+            result["years"] = [{"year": row["year"], "count": row["cnt"]} for row in cur.fetchall()]
+
+            cur.execute(
+                """
+                SELECT p.venue, COUNT(*) AS cnt
+                FROM pub_authors pa
+                JOIN publications p ON p.id = pa.pub_id
+                WHERE pa.author_id = ?
+                GROUP BY p.venue
+                ORDER BY cnt DESC, p.venue ASC;
+                """,
+                (author_id,),
+            )
+            result["venues"] = [{"venue": row["venue"], "count": row["cnt"]} for row in cur.fetchall()]
+        return result
     finally:
         conn.close()
 
 
+def _year_filters(alias: str, year_min: int | None, year_max: int | None) -> tuple[list[str], list[Any]]:
+    where: list[str] = []
+    params: list[Any] = []
+    if year_min is not None:
+        where.append(f"{alias}.year >= ?")
+        params.append(int(year_min))
+    if year_max is not None:
+        where.append(f"{alias}.year <= ?")
+        params.append(int(year_max))
+    return where, params
+
+
+@app.get("/api/analytics/venues")
+def api_analytics_venues(
+    q: str | None = None,
+    year_min: int | None = None,
+    year_max: int | None = None,
+    pub_type: str | None = None,
+    limit: int | None = None,
+) -> dict[str, Any]:
+    """Top venues by publication count, optionally filtered by name, years and type."""
+    top_k = _clamp_limit(limit, default=20)
+    where, params = _year_filters("c", year_min, year_max)
+    if pub_type:
+        where.append("c.pub_type = ?")
+        params.append(_normalize(pub_type))
+    if q:
+        key = venue_key(q)
+        if not key:
+            raise HTTPException(status_code=400, detail="Venue filter has no searchable characters.")
+        where.append("c.venue_key LIKE ?")
+        params.append(f"%{key}%")
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    conn = _get_connection()
+    try:
+        _ensure_aggregates(conn)
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT c.venue_key, v.venue, SUM(c.pub_count) AS cnt
+            FROM venue_year_counts c
+            JOIN venues v ON v.venue_key = c.venue_key
+            {where_sql}
+            GROUP BY c.venue_key
+            ORDER BY cnt DESC, c.venue_key ASC
+            LIMIT ?;
+            """,
+            (*params, top_k),
+        )
+        items = [
+            {"venue_key": row["venue_key"], "venue": row["venue"], "count": row["cnt"]}
+            for row in cur.fetchall()
+        ]
+    finally:
+        conn.close()
+    return {"items": items, "count": len(items)}
+
+
+@app.get("/api/analytics/venue-years")
+def api_analytics_venue_years(
+    venue: str = Query(..., min_length=1),
+    year_min: int | None = None,
+    year_max: int | None = None,
+    pub_type: str | None = None,
+) -> dict[str, Any]:
+    """Publications per year (and per type) for one venue."""
+    key = venue_key(venue)
+    if not key:
+        raise HTTPException(status_code=400, detail="Venue has no searchable characters.")
+    where, params = _year_filters("c", year_min, year_max)
+    if pub_type:
+        where.append("c.pub_type = ?")
+        params.append(_normalize(pub_type))
+    filter_sql = "".join(f" AND {clause}" for clause in where)
+
+    conn = _get_connection()
+    try:
+        _ensure_aggregates(conn)
+        cur = conn.cursor()
+        cur.execute("SELECT venue_key, venue, pub_count FROM venues WHERE venue_key = ?;", (key,))
+        row = cur.fetchone()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Venue not found.")
+        result: dict[str, Any] = {
+            "venue": {"venue_key": row["venue_key"], "venue": row["venue"], "count": row["pub_count"]},
+        }
+        cur.execute(
+            f"""
+            SELECT c.year, SUM(c.pub_count) AS cnt
+            FROM venue_year_counts c
+            WHERE c.venue_key = ?{filter_sql}
+            GROUP BY c.year
+            ORDER BY c.year ASC;
+            """,
+            (key, *params),
+        )
+        result["years"] = [{"year": r["year"], "count": r["cnt"]} for r in cur.fetchall()]
+        cur.execute(
+            f"""
+            SELECT c.pub_type, SUM(c.pub_count) AS cnt
+            FROM venue_year_counts c
+            WHERE c.venue_key = ?{filter_sql}
+            GROUP BY c.pub_type
+            ORDER BY cnt DESC, c.pub_type ASC;
+            """,
+            (key, *params),
+        )
+        result["pub_types"] = [{"pub_type": r["pub_type"], "count": r["cnt"]} for r in cur.fetchall()]
+    finally:
+        conn.close()
+    return result
+
+
+@app.get("/api/analytics/author-venues")
+def api_analytics_author_venues(
+    name: str | None = None,
+    author_id: int | None = None,
+    year_min: int | None = None,
+    year_max: int | None = None,
+    limit: int | None = None,
+) -> dict[str, Any]:
+    """One author's top venues and per-year publication counts."""
+    if author_id is None and not _normalize(name or ""):
+        raise HTTPException(status_code=400, detail="Either name or author_id is required.")
+    top_k = _clamp_limit(limit, default=20)
+    where, params = _year_filters("c", year_min, year_max)
+    filter_sql = "".join(f" AND {clause}" for clause in where)
+
+    conn = _get_connection()
+    try:
+        _ensure_fullmeta_schema(conn)
+        _ensure_aggregates(conn)
+        author = _lookup_author(conn, name, author_id)
+        author_id = int(author["id"])
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT c.venue_key, v.venue, SUM(c.pub_count) AS cnt
+            FROM author_venue_year_counts c
+            JOIN venues v ON v.venue_key = c.venue_key
+            WHERE c.author_id = ?{filter_sql}
+            GROUP BY c.venue_key
+            ORDER BY cnt DESC, c.venue_key ASC
+            LIMIT ?;
+            """,
+            (author_id, *params, top_k),
+        )
+        venues = [
+            {"venue_key": row["venue_key"], "venue": row["venue"], "count": row["cnt"]}
+            for row in cur.fetchall()
+        ]
+        cur.execute(
+            f"""
+            SELECT c.year, SUM(c.pub_count) AS cnt
+            FROM author_venue_year_counts c
+            WHERE c.author_id = ?{filter_sql}
+            GROUP BY c.year
+            ORDER BY c.year ASC;
+            """,
+            (author_id, *params),
+        )
+        years = [{"year": row["year"], "count": row["cnt"]} for row in cur.fetchall()]
+    finally:
+        conn.close()
+    return {"author": {"id": author_id, "name": author["name"]}, "venues": venues, "years": years}
+
+
+@app.get("/api/admin/slow-requests")
+def api_admin_slow_requests(limit: int | None = None, order: str = "slowest") -> dict[str, Any]:
+    if order not in ("slowest", "recent"):
+        raise HTTPException(status_code=400, detail="order must be 'slowest' or 'recent'.")
+    entries = flight_recorder.snapshot(limit=None if limit is None else max(1, int(limit)), order=order)
+    return {
+        "threshold_ms": flight_recorder.threshold_ms,
+        "capacity": flight_recorder.capacity,
+        "entries": entries,
+        "count": len(entries),
+    }
+
+
+@app.post("/api/admin/slow-requests/reset")
+def api_admin_slow_requests_reset() -> dict[str, Any]:
+    flight_recorder.clear()
+    return {"status": "ok"}
+
+
 @app.get("/api/config")
 def api_config() -> dict[str, Any]:
     return {
@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import sqlite3
+import sys
+import time
+from dataclasses import MISSING, fields
+from pathlib import Path
+from typing import Any
+
+from .columnar import COLUMNAR_FORMATS, export_columnar
+from .control import PipelineStore
+from .optimize import VALID_PAGE_SIZES, optimize_db, optimize_live_db
+from .pipeline import PipelineConfig, _init_db, build_aggregates, run_pipeline
+from .shard import build_shard, merge_shards, plan_shards, record_offsets, run_sharded_pipeline, shard_byte_range
+from .snapshot import write_snapshot
+from .throttle import Throttle
+
+DEFAULT_XML_GZ_URL = "https://dblp.org/xml/dblp.xml.gz"
+DEFAULT_DTD_URL = "https://dblp.org/xml/dblp.dtd"
+
+
+def _config_defaults() -> dict[str, Any]:
+    return {f.name: f.default for f in fields(PipelineConfig) if f.default is not MISSING}
+
+
+def _add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = _config_defaults()
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path(os.getenv("DATA_DIR", "data")),
+        help="Directory holding the XML, DTD and database files (default: $DATA_DIR or ./data).",
+    )
+    parser.add_argument("--xml-gz-url", default=os.getenv("DBLP_XML_GZ_URL", DEFAULT_XML_GZ_URL))
+    parser.add_argument("--dtd-url", default=os.getenv("DBLP_DTD_URL", DEFAULT_DTD_URL))
+    parser.add_argument("--xml-gz-name", default=defaults["xml_gz_name"])
+    parser.add_argument("--xml-name", default=defaults["xml_name"])
+    parser.add_argument("--dtd-name", default=defaults["dtd_name"])
+    parser.add_argument("--db-name", default=defaults["db_name"])
+    parser.add_argument("--batch-size", type=int, default=defaults["batch_size"])
+    parser.add_argument("--progress-every", type=int, default=defaults["progress_every"])
+    parser.add_argument(
+        "--rebuild",
+        action=argparse.BooleanOptionalAction,
+        default=defaults["rebuild"],
+        help="Delete a leftover staged database before building.",
+    )
+    parser.add_argument(
+        "--offline",
+        action=argparse.BooleanOptionalAction,
+        default=defaults["offline"],
+        help="Use the local .xml.gz and DTD in --data-dir instead of downloading.",
+    )
+    parser.add_argument(
+        "--resume",
+        action=argparse.BooleanOptionalAction,
+        default=defaults["resume"],
+        help="Continue an interrupted build from its last checkpoint.",
+    )
+    parser.add_argument(
+        "--columnar-format",
+        choices=COLUMNAR_FORMATS,
+        default=defaults["columnar_format"],
+        help="Also export columnar files (npy, or parquet with pyarrow) after the build.",
+    )
+    parser.add_argument("--columnar-dir-name", default=defaults["columnar_dir_name"])
+    parser.add_argument(
+        "--max-records-per-sec",
+        type=float,
+        default=defaults["max_records_per_sec"],
+        help="Cap the record insert rate of each build process (0: unlimited).",
+    )
+    parser.add_argument(
+        "--max-write-mb-per-sec",
+        type=float,
+        default=defaults["max_write_mb_per_sec"],
+        help="Cap the write rate of each build process, including SQLite WAL writes (0: unlimited).",
+    )
+    parser.add_argument(
+        "--nice",
+        type=int,
+        default=defaults["nice"],
+        help="Raise the build process's nice value by N.",
+    )
+    parser.add_argument(
+        "--pause-latency-ms",
+        type=float,
+        default=defaults["pause_latency_ms"],
+        help="Pause while the service reports query latency above this (0: never; see --state-path).",
+    )
+    parser.add_argument(
+        "--state-path",
+        type=Path,
+        default=None,
+        help="Service control store read for --pause-latency-ms "
+        "(default: $PIPELINE_STATE_PATH or <data-dir>/pipeline_state.sqlite).",
+    )
+    _add_optimize_arguments(parser, defaults)
+
+
+def _add_optimize_arguments(parser: argparse.ArgumentParser, defaults: dict[str, Any]) -> None:
+    parser.add_argument(
+        "--optimize",
+        action=argparse.BooleanOptionalAction,
+        default=defaults["optimize"],
+        help="Merge FTS segments, ANALYZE and compact the output with VACUUM INTO.",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        choices=VALID_PAGE_SIZES,
+        default=defaults["page_size"],
+        help="Page size of the compacted database (default: keep the current one).",
+    )
+
+
+def _config_from_args(args: argparse.Namespace) -> PipelineConfig:
+    values = {f.name: getattr(args, f.name) for f in fields(PipelineConfig) if hasattr(args, f.name)}
+    values["data_dir"] = args.data_dir.expanduser().resolve()
+    return PipelineConfig(**values)
+
+
+def _throttle_from_args(args: argparse.Namespace, config: PipelineConfig) -> Throttle:
+    """Rate caps from ``config``, plus the latency pause fed by the service's control store."""
+    latency = None
+    if config.pause_latency_ms > 0:
+        state_path = args.state_path or Path(
+            os.getenv("PIPELINE_STATE_PATH", str(config.data_dir / "pipeline_state.sqlite"))
+        )
+        latency = PipelineStore(state_path.expanduser().resolve()).query_latency
+    return Throttle(
+        max_records_per_sec=config.max_records_per_sec,
+        max_write_mb_per_sec=config.max_write_mb_per_sec,
+        pause_latency_ms=config.pause_latency_ms,
+        latency=latency,
+        log=_log,
+    )
+
+
+def _log(msg: str) -> None:
+    stamp = time.strftime("%H:%M:%S")
+    print(f"[{stamp}] {msg}", file=sys.stderr, flush=True)
+
+
+def _progress(phase: str, payload: dict[str, Any]) -> None:
+    details = " ".join(f"{key}={value}" for key, value in payload.items())
+    _log(f"{phase}: {details}")
+
+
+def _install_stop_handler() -> list[bool]:
+    stop_flag = [False]
+
+    def _handle(signum: int, frame: Any) -> None:
+        if stop_flag[0]:
+            raise KeyboardInterrupt
+        stop_flag[0] = True
+        _log("Stop requested; finishing the current record (press Ctrl+C again to abort).")
+
+    signal.signal(signal.SIGINT, _handle)
+    signal.signal(signal.SIGTERM, _handle)
+    return stop_flag
+
+
+def _cmd_build(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    stop_flag = _install_stop_handler()
+    try:
+        if args.shards > 1:
+            if config.pause_latency_ms > 0:
+                _log("--pause-latency-ms is ignored by --shards builds; use the shard command on each machine")
+            result = run_sharded_pipeline(
+                config=config,
+                shard_count=args.shards,
+                workers=args.workers or args.shards,
+                log=_log,
+                progress=_progress,
+                should_stop=lambda: stop_flag[0],
+            )
+        else:
+            result = run_pipeline(
+                config=config,
+                log=_log,
+                progress=_progress,
+                should_stop=lambda: stop_flag[0],
+                throttle=_throttle_from_args(args, config),
+            )
+    except InterruptedError:
+        _log("Pipeline stopped.")
+        return 130
+
+    if args.snapshot_dir is not None:
+        write_snapshot(
+            db_path=config.db_path,
+            snapshot_root=args.snapshot_dir.expanduser().resolve(),
+            source_path=config.xml_gz_path,
+            log=_log,
+            source_date=args.source_date,
+        )
+    _log(f"Done: {result['processed_records']} records in {result['elapsed_seconds']}s")
+    return 0
+
+
+def _cmd_shard(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    if not config.xml_path.is_file():
+        _log(f"Error: decompressed XML not found: {config.xml_path}")
+        return 1
+    if not 0 <= args.shard_index < args.shard_count:
+        _log(f"Error: --shard-index must be in [0, {args.shard_count})")
+        return 1
+    offsets = record_offsets(config.xml_path)
+    total_records = args.total_records
+    if total_records is None:
+        total_records = len(offsets) - 1
+        _log(f"Counted {total_records} records; pass --total-records {total_records} on other machines")
+    record_start, record_end = plan_shards(total_records, args.shard_count)[args.shard_index]
+    xml_range = shard_byte_range(offsets, record_start, record_end)
+    del offsets
+    stop_flag = _install_stop_handler()
+    try:
+        build_shard(
+            config,
+            args.shard_index,
+            args.shard_count,
+            xml_range,
+            log=_log,
+            progress=_progress,
+            should_stop=lambda: stop_flag[0],
+            throttle=_throttle_from_args(args, config),
+        )
+    except InterruptedError:
+        _log("Shard build stopped.")
+        return 130
+    return 0
+
+
+def _cmd_merge(args: argparse.Namespace) -> int:
+    output = args.output.expanduser().resolve()
+    stop_flag = _install_stop_handler()
+    try:
+        merge_shards(
+            [path.expanduser().resolve() for path in args.shards],
+            output,
+            log=_log,
+            progress=_progress,
+            should_stop=lambda: stop_flag[0],
+        )
+        if args.optimize:
+            optimize_db(output, _log, _progress, lambda: stop_flag[0], page_size=args.page_size)
+    except InterruptedError:
+        _log("Merge stopped.")
+        return 130
+    return 0
+
+
+def _cmd_snapshot(args: argparse.Namespace) -> int:
+    data_dir = args.data_dir.expanduser().resolve()
+    write_snapshot(
+        db_path=data_dir / args.db_name,
+        snapshot_root=args.snapshot_dir.expanduser().resolve(),
+        source_path=data_dir / args.xml_gz_name,
+        log=_log,
+        source_date=args.source_date,
+    )
+    return 0
+
+
+def _cmd_aggregate(args: argparse.Namespace) -> int:
+    db_path = args.data_dir.expanduser().resolve() / args.db_name
+    if not db_path.is_file():
+        _log(f"Error: database not found: {db_path}")
+        return 1
+    conn = sqlite3.connect(str(db_path))
+    try:
+        _init_db(conn)
+        build_aggregates(conn, log=_log, progress=_progress)
+        conn.commit()
+    finally:
+        conn.close()
+    return 0
+
+
+def _cmd_export(args: argparse.Namespace) -> int:
+    data_dir = args.data_dir.expanduser().resolve()
+    output = args.output.expanduser().resolve() if args.output else data_dir / _config_defaults()["columnar_dir_name"]
+    stop_flag = _install_stop_handler()
+    try:
+        export_columnar(
+            data_dir / args.db_name,
+            output,
+            log=_log,
+            progress=_progress,
+            should_stop=lambda: stop_flag[0],
+            fmt=args.format,
+        )
+    except InterruptedError:
+        _log("Export stopped.")
+        return 130
+    return 0
+
+
+def _cmd_optimize(args: argparse.Namespace) -> int:
+    db_path = args.data_dir.expanduser().resolve() / args.db_name
+    if not db_path.is_file():
+        _log(f"Error: database not found: {db_path}")
+        return 1
+    stop_flag = _install_stop_handler()
+    try:
+        optimize_live_db(
+            db_path,
+            log=_log,
+            progress=_progress,
+            should_stop=lambda: stop_flag[0],
+            page_size=args.page_size,
+            vacuum=args.vacuum,
+        )
+    except InterruptedError:
+        _log("Optimize stopped.")
+        return 130
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dblp_builder",
+        description="Build the DBLP SQLite database without the web service.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Download (or reuse) dblp.xml.gz and build the database.")
+    _add_config_arguments(build)
+    build.add_argument(
+        "--snapshot-dir",
+        type=Path,
+        default=None,
+        help="Also write a versioned snapshot (database + manifest) under this directory.",
+    )
+    build.add_argument("--source-date", default=None, help="DBLP release date recorded in the manifest.")
+    build.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Split the build into N record ranges built in parallel, then merge them.",
+    )
+    build.add_argument("--workers", type=int, default=None, help="Parallel shard processes (default: --shards).")
+    build.set_defaults(func=_cmd_build)
+
+    shard = commands.add_parser(
+        "shard",
+        help="Build one record range into its own partial database (needs the decompressed XML).",
+    )
+    _add_config_arguments(shard)
+    shard.add_argument("--shard-index", type=int, required=True, help="Zero-based shard index.")
+    shard.add_argument("--shard-count", type=int, required=True)
+    shard.add_argument(
+        "--total-records",
+        type=int,
+        default=None,
+        help="Record count used to plan ranges; use the same value on every machine.",
+    )
+    shard.set_defaults(func=_cmd_shard)
+
+    merge = commands.add_parser("merge", help="Merge shard databases, in order, into one database.")
+    merge.add_argument("shards", nargs="+", type=Path, help="Shard databases in shard-index order.")
+    merge.add_argument("--output", type=Path, required=True, help="Merged database path.")
+    _add_optimize_arguments(merge, _config_defaults())
+    merge.set_defaults(func=_cmd_merge)
+
+    snapshot = commands.add_parser("snapshot", help="Write a versioned snapshot of an existing database.")
+    snapshot.add_argument("--data-dir", type=Path, default=Path(os.getenv("DATA_DIR", "data")))
+    snapshot.add_argument("--db-name", default=_config_defaults()["db_name"])
+    snapshot.add_argument("--xml-gz-name", default=_config_defaults()["xml_gz_name"])
+    snapshot.add_argument("--snapshot-dir", type=Path, required=True)
+    snapshot.add_argument("--source-date", default=None)
+    snapshot.set_defaults(func=_cmd_snapshot)
+
+    aggregate = commands.add_parser(
+        "aggregate",
+        help="Recompute the venue/year aggregate tables of an existing database.",
+    )
+    aggregate.add_argument("--data-dir", type=Path, default=Path(os.getenv("DATA_DIR", "data")))
+    aggregate.add_argument("--db-name", default=_config_defaults()["db_name"])
+    aggregate.set_defaults(func=_cmd_aggregate)
+
+    export = commands.add_parser("export", help="Write columnar files from an existing database.")
+    export.add_argument("--data-dir", type=Path, default=Path(os.getenv("DATA_DIR", "data")))
+    export.add_argument("--db-name", default=_config_defaults()["db_name"])
+    export.add_argument("--format", choices=COLUMNAR_FORMATS, default="npy")
+    export.add_argument("--output", type=Path, default=None, help="Output directory (default: <data-dir>/columnar).")
+    export.set_defaults(func=_cmd_export)
+
+    optimize = commands.add_parser(
+        "optimize",
+        help="Merge FTS segments, ANALYZE and compact an existing database (stop the service's builds first).",
+    )
+    optimize.add_argument("--data-dir", type=Path, default=Path(os.getenv("DATA_DIR", "data")))
+    optimize.add_argument("--db-name", default=_config_defaults()["db_name"])
+    optimize.add_argument(
+        "--page-size",
+        type=int,
+        choices=VALID_PAGE_SIZES,
+        default=_config_defaults()["page_size"],
+        help="Page size of the compacted database (default: keep the current one).",
+    )
+    optimize.add_argument(
+        "--vacuum",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Compact with VACUUM INTO and swap the file in place.",
+    )
+    optimize.set_defaults(func=_cmd_optimize)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        _log("Aborted.")
+        return 130
+    except Exception as exc:
+        _log(f"Error: {exc}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import ast
+import json
+import mmap
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from .throttle import _raise_if_stopped
+
+COLUMNAR_FORMAT = 1
+COLUMNAR_MANIFEST = "columnar.json"
+COLUMNAR_FORMATS = ("npy", "parquet")
+FETCH_ROWS = 50_000
+
+LogCallback = Callable[[str], None]
+ProgressCallback = Callable[[str, dict[str, Any]], None]
+ShouldStopCallback = Callable[[], bool]
+
+# array typecode -> .npy dtype descriptor (little-endian, as NumPy writes it).
+_NPY_DESCR = {"h": "<i2", "i": "<i4", "q": "<i8"}
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_SHAPE_WIDTH = 20
+
+# table -> [(column, kind, typecode)]; "dict" columns are stored as codes
+# (0 = NULL) plus a string heap of distinct values.
+_NPY_SCHEMA: dict[str, list[tuple[str, str, str]]] = {
+    "publications": [
+        ("id", "array", "i"),
+        ("title", "strings", "q"),
+        ("year", "array", "h"),
+        ("venue", "dict", "i"),
+        ("pub_type", "dict", "h"),
+    ],
+    "authors": [
+        ("id", "array", "i"),
+        ("name", "strings", "q"),
+    ],
+    "pub_authors": [
+        ("pub_id", "array", "i"),
+        ("author_id", "array", "i"),
+    ],
+}
+
+_EXPORT_SQL = {
+    "publications": "SELECT id, title, year, venue, pub_type FROM publications ORDER BY id;",
+    "authors": "SELECT id, name FROM authors ORDER BY id;",
+    "pub_authors": "SELECT pub_id, author_id FROM pub_authors ORDER BY rowid;",
+}
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except Exception as exc:
+        raise RuntimeError(
+            "pyarrow is required for Parquet exports. Install it or use the npy format."
+        ) from exc
+    return pyarrow
+
+
+class _NpyWriter:
+    """Streams a 1-D integer column into a ``.npy`` file.
+
+    The header reserves a fixed-width shape field that is patched on close,
+    so the row count does not need to be known up front.
+    """
+
+    def __init__(self, path: Path, typecode: str) -> None:
+        self.path = path
+        self.typecode = typecode
+        self.count = 0
+        self._fh = path.open("wb")
+        self._fh.write(self._header(0))
+
+    def _header(self, count: int) -> bytes:
+        shape = f"{count:>{_NPY_SHAPE_WIDTH}}"
+        text = f"{{'descr': '{_NPY_DESCR[self.typecode]}', 'fortran_order': False, 'shape': ({shape},), }}"
+        pad = -(len(_NPY_MAGIC) + 2 + len(text) + 1) % 64
+        body = (text + " " * pad + "\n").encode("latin1")
+        return _NPY_MAGIC + len(body).to_bytes(2, "little") + body
+
+    def write(self, values: array) -> None:
+        if sys.byteorder != "little":
+            values = array(values.typecode, values)
+            values.byteswap()
+        values.tofile(self._fh)
+        self.count += len(values)
+
+    def close(self) -> None:
+        self._fh.seek(0)
+        self._fh.write(self._header(self.count))
+        self._fh.close()
+
+
+class _HeapWriter:
+    """Writes strings as one UTF-8 blob plus an ``int64`` end-offset array.
+
+    Offsets have ``n + 1`` entries starting at 0; NULL is stored as an empty
+    string.
+    """
+
+    def __init__(self, directory: Path, stem: str) -> None:
+        self.data_path = directory / f"{stem}.heap"
+        self._data = self.data_path.open("wb")
+        self._offsets = _NpyWriter(directory / f"{stem}.offsets.npy", "q")
+        self._offsets.write(array("q", [0]))
+        self._end = 0
+
+    def write(self, values: list[str | None]) -> None:
+        ends = array("q")
+        for value in values:
+            if value:
+                encoded = value.encode("utf-8")
+                self._data.write(encoded)
+                self._end += len(encoded)
+            ends.append(self._end)
+        self._offsets.write(ends)
+
+    def close(self) -> int:
+        self._data.close()
+        self._offsets.close()
+        return self._offsets.count - 1
+
+
+def _export_npy_table(
+    conn: sqlite3.Connection,
+    table: str,
+    directory: Path,
+    should_stop: ShouldStopCallback,
+) -> int:
+    columns = _NPY_SCHEMA[table]
+    writers: list[Any] = []
+    dictionaries: dict[str, dict[str | None, int]] = {}
+    for column, kind, typecode in columns:
+        stem = f"{table}.{column}"
+        if kind == "strings":
+            writers.append(_HeapWriter(directory, stem))
+        elif kind == "dict":
+            writers.append(_NpyWriter(directory / f"{stem}.codes.npy", typecode))
+            dictionaries[column] = {None: 0}
+        else:
+            writers.append(_NpyWriter(directory / f"{stem}.npy", typecode))
+
+    cur = conn.cursor()
+    cur.execute(_EXPORT_SQL[table])
+    rows = 0
+    while True:
+        _raise_if_stopped(should_stop)
+        batch = cur.fetchmany(FETCH_ROWS)
+        if not batch:
+            break
+        for index, (column, kind, typecode) in enumerate(columns):
+            values = [row[index] for row in batch]
+            if kind == "strings":
+                writers[index].write(values)
+            elif kind == "dict":
+                codes = dictionaries[column]
+                writers[index].write(array(typecode, [codes.setdefault(v, len(codes)) for v in values]))
+            elif column == "year":
+                # 0 marks a missing year; DBLP years are always positive.
+                writers[index].write(
+                    array(typecode, [int(v) if v is not None and 0 < int(v) < 32768 else 0 for v in values])
+                )
+            else:
+                writers[index].write(array(typecode, [int(v) for v in values]))
+        rows += len(batch)
+
+    for writer in writers:
+        writer.close()
+    for column, codes in dictionaries.items():
+        heap = _HeapWriter(directory, f"{table}.{column}.values")
+        heap.write(list(codes))
+        heap.close()
+    return rows
+
+
+def _export_parquet_table(
+    conn: sqlite3.Connection,
+    table: str,
+    directory: Path,
+    should_stop: ShouldStopCallback,
+) -> int:
+    pa = _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    schemas = {
+        "publications": pa.schema(
+            [
+                ("id", pa.int32()),
+                ("title", pa.string()),
+                ("year", pa.int16()),
+                ("venue", pa.dictionary(pa.int32(), pa.string())),
+                ("pub_type", pa.dictionary(pa.int16(), pa.string())),
+            ]
+        ),
+        "authors": pa.schema([("id", pa.int32()), ("name", pa.string())]),
+        "pub_authors": pa.schema([("pub_id", pa.int32()), ("author_id", pa.int32())]),
+    }
+    schema = schemas[table]
+    cur = conn.cursor()
+    cur.execute(_EXPORT_SQL[table])
+    rows = 0
+    with pq.ParquetWriter(str(directory / f"{table}.parquet"), schema, compression="zstd") as writer:
+        while True:
+            _raise_if_stopped(should_stop)
+            batch = cur.fetchmany(FETCH_ROWS)
+            if not batch:
+                break
+            arrays = []
+            for index, field in enumerate(schema):
+                values = [row[index] for row in batch]
+                if pa.types.is_dictionary(field.type):
+                    arrays.append(pa.array(values, type=pa.string()).dictionary_encode().cast(field.type))
+                else:
+                    arrays.append(pa.array(values, type=field.type))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            rows += len(batch)
+    return rows
+
+
+def export_columnar(
+    db_path: Path,
+    output_dir: Path,
+    log: LogCallback,
+    progress: ProgressCallback,
+    should_stop: ShouldStopCallback,
+    fmt: str = "npy",
+) -> dict[str, Any]:
+    """Export publications (without ``raw_xml``), authors and pub_authors.
+
+    ``npy`` writes one ``.npy`` array per numeric column and an offset-encoded
+    UTF-8 heap per string column; ``parquet`` writes one file per table and
+    needs pyarrow. Files are written to a sibling temp directory and swapped
+    into ``output_dir`` once complete.
+    """
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format {fmt!r}; expected one of {COLUMNAR_FORMATS}")
+    if fmt == "parquet":
+        _require_pyarrow()
+    export_table = _export_parquet_table if fmt == "parquet" else _export_npy_table
+
+    started = time.time()
+    tmp_dir = output_dir.with_name(f".{output_dir.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    log(f"Exporting columnar ({fmt}) snapshot of {db_path} -> {output_dir}")
+
+    conn = sqlite3.connect(str(db_path))
+    counts: dict[str, int] = {}
+    try:
+        for table in _EXPORT_SQL:
+            counts[table] = export_table(conn, table, tmp_dir, should_stop)
+            progress("export_columnar", {"columnar_tables": len(counts), f"columnar_{table}": counts[table]})
+        manifest = {
+            "format": COLUMNAR_FORMAT,
+            "layout": fmt,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "db_file": db_path.name,
+            "counts": counts,
+        }
+        if fmt == "npy":
+            manifest["columns"] = {
+                table: {column: kind for column, kind, _ in columns} for table, columns in _NPY_SCHEMA.items()
+            }
+        (tmp_dir / COLUMNAR_MANIFEST).write_text(
+            json.dumps(manifest, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    finally:
+        conn.close()
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    os.replace(tmp_dir, output_dir)
+    elapsed = round(time.time() - started, 2)
+    log(f"Columnar export complete in {elapsed}s: {counts}")
+    return {"columnar_dir": str(output_dir), "columnar_format": fmt, "columnar_seconds": elapsed}
+
+
+def _map_npy(path: Path) -> Any:
+    """Memory-map a 1-D ``.npy`` file; NumPy when available, else a memoryview."""
+    try:
+        import numpy as np
+    except Exception:
+        np = None
+    if np is not None:
+        return np.load(path, mmap_mode="r")
+
+    with path.open("rb") as fh:
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[: len(_NPY_MAGIC) - 2] != _NPY_MAGIC[:-2]:
+        raise ValueError(f"Not a .npy file: {path}")
+    header_len = int.from_bytes(mapped[8:10], "little")
+    header = ast.literal_eval(mapped[10 : 10 + header_len].decode("latin1"))
+    typecode = {descr: code for code, descr in _NPY_DESCR.items()}.get(header["descr"])
+    if typecode is None or sys.byteorder != "little":
+        raise ValueError(f"Unsupported .npy dtype {header['descr']} in {path}; install numpy to read it.")
+    return memoryview(mapped)[10 + header_len :].cast(typecode)
+
+
+class StringColumn:
+    """Zero-copy view of a string heap: ``data[offsets[i]:offsets[i + 1]]``."""
+
+    def __init__(self, directory: Path, stem: str) -> None:
+        self.offsets = _map_npy(directory / f"{stem}.offsets.npy")
+        data_path = directory / f"{stem}.heap"
+        if data_path.stat().st_size:
+            with data_path.open("rb") as fh:
+                self.data: Any = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        return self.data[int(self.offsets[index]) : int(self.offsets[index + 1])].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class DictionaryColumn:
+    """Integer ``codes`` into a small ``values`` heap; code 0 is NULL."""
+
+    def __init__(self, directory: Path, stem: str) -> None:
+        self.codes = _map_npy(directory / f"{stem}.codes.npy")
+        self.values: list[str | None] = [None, *list(StringColumn(directory, f"{stem}.values"))[1:]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str | None:
+        return self.values[int(self.codes[index])]
+
+
+class ColumnarSnapshot:
+    """Reader for a directory written by :func:`export_columnar`.
+
+    ``npy`` columns are memory-mapped, so opening a snapshot is cheap and
+    scans only touch the pages they read. Years use 0 for NULL.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        try:
+            self.manifest = json.loads((self.path / COLUMNAR_MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise ValueError(f"Cannot read columnar manifest in {self.path}: {exc}") from exc
+        if self.manifest.get("format") != COLUMNAR_FORMAT:
+            raise ValueError(f"Unsupported columnar format in {self.path}: {self.manifest.get('format')}")
+        self.layout = self.manifest["layout"]
+        self._columns: dict[tuple[str, str], Any] = {}
+
+    @property
+    def counts(self) -> dict[str, int]:
+        return dict(self.manifest["counts"])
+
+    def column(self, table: str, column: str) -> Any:
+        key = (table, column)
+        if key not in self._columns:
+            self._columns[key] = self._open_column(table, column)
+        return self._columns[key]
+
+    def _open_column(self, table: str, column: str) -> Any:
+        if self.layout == "parquet":
+            _require_pyarrow()
+            import pyarrow.parquet as pq
+
+            return pq.read_table(self.path / f"{table}.parquet", columns=[column], memory_map=True).column(0)
+
+        try:
+            kind = self.manifest["columns"][table][column]
+        except KeyError as exc:
+            raise KeyError(f"Unknown column {table}.{column}") from exc
+        stem = f"{table}.{column}"
+        if kind == "strings":
+            return StringColumn(self.path, stem)
+        if kind == "dict":
+            return DictionaryColumn(self.path, stem)
+        return _map_npy(self.path / f"{stem}.npy")
+
+
+def open_columnar(path: Path) -> ColumnarSnapshot:
+    return ColumnarSnapshot(path)
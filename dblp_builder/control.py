@@ -0,0 +1,452 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .pipeline import PipelineConfig, run_pipeline
+from .throttle import Throttle
+
+HEARTBEAT_INTERVAL_SECONDS = 2.0
+STOP_POLL_INTERVAL_SECONDS = 0.5
+ACTIVE_STATUSES = ("running", "stopping")
+# Worker latency reports older than this are ignored by the build throttle.
+QUERY_LATENCY_MAX_AGE_SECONDS = 15.0
+
+
+@dataclass(slots=True)
+class PipelineState:
+    status: str = "idle"
+    step: str = "idle"
+    message: str = ""
+    started_at: str | None = None
+    finished_at: str | None = None
+    progress: dict[str, Any] = field(default_factory=dict)
+    logs: list[str] = field(default_factory=list)
+    throttle: dict[str, Any] = field(default_factory=dict)
+    schedule: dict[str, Any] = field(default_factory=dict)
+
+
+def _now_iso() -> str:
+    return datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def config_to_dict(config: PipelineConfig) -> dict[str, Any]:
+    values = asdict(config)
+    values["data_dir"] = str(config.data_dir)
+    return values
+
+
+def config_from_dict(values: dict[str, Any]) -> PipelineConfig:
+    return PipelineConfig(**{**values, "data_dir": Path(values["data_dir"])})
+
+
+class PipelineStore:
+    """Pipeline state, logs and stop flag kept in a small SQLite file.
+
+    Every service worker and the build process open the same file, so any of
+    them can start, stop or observe a build. A build counts as active while its
+    process keeps refreshing the heartbeat; a stale heartbeat means the process
+    died without reporting and the run is marked as failed.
+    """
+
+    def __init__(self, path: Path, max_log_lines: int = 1000, heartbeat_timeout: float = 60.0) -> None:
+        self.path = path
+        self.max_log_lines = max_log_lines
+        self.heartbeat_timeout = heartbeat_timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pipeline_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    status TEXT NOT NULL,
+                    step TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    config TEXT,
+                    pid INTEGER,
+                    stop_requested INTEGER NOT NULL DEFAULT 0,
+                    heartbeat REAL,
+                    throttle TEXT NOT NULL DEFAULT '{}',
+                    schedule TEXT NOT NULL DEFAULT '{}'
+                );
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(pipeline_state);")}
+            for column in ("throttle", "schedule"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE pipeline_state ADD COLUMN {column} TEXT NOT NULL DEFAULT '{{}}';")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pipeline_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    line TEXT NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_latency (
+                    worker INTEGER PRIMARY KEY,
+                    latency_ms REAL,
+                    requests INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO pipeline_state(id, status, step, message) "
+                "VALUES (1, 'idle', 'idle', '');"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _transaction(self) -> sqlite3.Connection:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE;")
+        return conn
+
+    def _append_log(self, conn: sqlite3.Connection, msg: str) -> None:
+        cur = conn.execute("INSERT INTO pipeline_logs(line) VALUES (?);", (msg,))
+        conn.execute("DELETE FROM pipeline_logs WHERE id <= ?;", (cur.lastrowid - self.max_log_lines,))
+
+    def _is_stale(self, row: sqlite3.Row) -> bool:
+        if row["status"] not in ACTIVE_STATUSES:
+            return False
+        heartbeat = row["heartbeat"]
+        return heartbeat is None or time.time() - heartbeat > self.heartbeat_timeout
+
+    def _reap_stale(self, conn: sqlite3.Connection) -> None:
+        row = conn.execute("SELECT status, heartbeat FROM pipeline_state WHERE id = 1;").fetchone()
+        if not self._is_stale(row):
+            return
+        msg = "Pipeline process is no longer running."
+        conn.execute(
+            "UPDATE pipeline_state SET status = 'error', step = 'error', message = ?, "
+            "finished_at = ?, pid = NULL WHERE id = 1;",
+            (msg, _now_iso()),
+        )
+        self._append_log(conn, f"Pipeline error: {msg}")
+
+    def _update(self, **values: Any) -> None:
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        conn = self._transaction()
+        try:
+            conn.execute(f"UPDATE pipeline_state SET {assignments} WHERE id = 1;", tuple(values.values()))
+            conn.execute("COMMIT;")
+        finally:
+            conn.close()
+
+    def _read_state(self) -> tuple[sqlite3.Row, list[str]]:
+        conn = self._connect()
+        try:
+            # Deferred: a consistent read that never waits for the build's writes.
+            conn.execute("BEGIN;")
+            row = conn.execute("SELECT * FROM pipeline_state WHERE id = 1;").fetchone()
+            logs = [r["line"] for r in conn.execute("SELECT line FROM pipeline_logs ORDER BY id;")]
+            conn.execute("COMMIT;")
+        finally:
+            conn.close()
+        return row, logs
+
+    def snapshot(self) -> dict[str, Any]:
+        row, logs = self._read_state()
+        if self._is_stale(row):
+            # Only a dead build needs the write lock; the check is repeated under it.
+            conn = self._transaction()
+            try:
+                self._reap_stale(conn)
+                conn.execute("COMMIT;")
+            finally:
+                conn.close()
+            row, logs = self._read_state()
+        state = PipelineState(
+            status=row["status"],
+            step=row["step"],
+            message=row["message"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            progress=json.loads(row["progress"] or "{}"),
+            logs=logs,
+            throttle=json.loads(row["throttle"] or "{}"),
+            schedule=json.loads(row["schedule"] or "{}"),
+        )
+        return asdict(state)
+
+    def begin_run(self, config: PipelineConfig) -> bool:
+        """Claim the pipeline for a new run; False if another run is active."""
+        conn = self._transaction()
+        try:
+            self._reap_stale(conn)
+            row = conn.execute("SELECT status FROM pipeline_state WHERE id = 1;").fetchone()
+            if row["status"] in ACTIVE_STATUSES:
+                conn.execute("ROLLBACK;")
+                return False
+            conn.execute(
+                "UPDATE pipeline_state SET status = 'running', step = 'starting', message = '', "
+                "started_at = ?, finished_at = NULL, progress = '{}', config = ?, pid = NULL, "
+                "stop_requested = 0, heartbeat = ?, throttle = '{}' WHERE id = 1;",
+                (_now_iso(), json.dumps(config_to_dict(config)), time.time()),
+            )
+            conn.execute("DELETE FROM pipeline_logs;")
+            self._append_log(conn, "Pipeline start requested.")
+            conn.execute("COMMIT;")
+            return True
+        finally:
+            conn.close()
+
+    def load_config(self) -> PipelineConfig:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT config FROM pipeline_state WHERE id = 1;").fetchone()
+        finally:
+            conn.close()
+        if row is None or not row["config"]:
+            raise RuntimeError(f"No pipeline config recorded in {self.path}.")
+        return config_from_dict(json.loads(row["config"]))
+
+    def attach(self, pid: int) -> None:
+        self._update(pid=pid, heartbeat=time.time())
+
+    def heartbeat(self) -> None:
+        self._update(heartbeat=time.time())
+
+    def log(self, msg: str) -> None:
+        conn = self._transaction()
+        try:
+            self._append_log(conn, msg)
+            conn.execute("UPDATE pipeline_state SET message = ? WHERE id = 1;", (msg,))
+            conn.execute("COMMIT;")
+        finally:
+            conn.close()
+
+    def progress(self, phase: str, payload: dict[str, Any]) -> None:
+        conn = self._transaction()
+        try:
+            row = conn.execute("SELECT progress FROM pipeline_state WHERE id = 1;").fetchone()
+            progress = json.loads(row["progress"] or "{}")
+            progress.update(payload)
+            conn.execute(
+                "UPDATE pipeline_state SET step = ?, progress = ?, heartbeat = ? WHERE id = 1;",
+                (phase, json.dumps(progress), time.time()),
+            )
+            conn.execute("COMMIT;")
+        finally:
+            conn.close()
+
+    def finish(self, status: str, message: str, log_line: str, result: dict[str, Any] | None = None) -> None:
+        conn = self._transaction()
+        try:
+            row = conn.execute("SELECT progress FROM pipeline_state WHERE id = 1;").fetchone()
+            progress = json.loads(row["progress"] or "{}")
+            progress.update(result or {})
+            conn.execute(
+                "UPDATE pipeline_state SET status = ?, step = ?, message = ?, finished_at = ?, "
+                "progress = ?, pid = NULL WHERE id = 1;",
+                (status, status, message, _now_iso(), json.dumps(progress)),
+            )
+            self._append_log(conn, log_line)
+            conn.execute("COMMIT;")
+        finally:
+            conn.close()
+
+    def fail_if_active(self, pid: int, message: str) -> None:
+        """Record a crash when the build process exits without reporting."""
+        conn = self._transaction()
+        try:
+            row = conn.execute("SELECT status, pid FROM pipeline_state WHERE id = 1;").fetchone()
+            if row["status"] in ACTIVE_STATUSES and row["pid"] in (None, pid):
+                conn.execute(
+                    "UPDATE pipeline_state SET status = 'error', step = 'error', message = ?, "
+                    "finished_at = ?, pid = NULL WHERE id = 1;",
+                    (message, _now_iso()),
+                )
+                self._append_log(conn, f"Pipeline error: {message}")
+            conn.execute("COMMIT;")
+        finally:
+            conn.close()
+
+    def request_stop(self) -> None:
+        conn = self._transaction()
+        try:
+            row = conn.execute("SELECT status FROM pipeline_state WHERE id = 1;").fetchone()
+            conn.execute("UPDATE pipeline_state SET stop_requested = 1 WHERE id = 1;")
+            if row["status"] == "running":
+                conn.execute(
+                    "UPDATE pipeline_state SET status = 'stopping', message = 'Stop requested.' "
+                    "WHERE id = 1;"
+                )
+                self._append_log(conn, "Stop requested.")
+            conn.execute("COMMIT;")
+        finally:
+            conn.close()
+
+    def stop_requested(self) -> bool:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT stop_requested FROM pipeline_state WHERE id = 1;").fetchone()
+        finally:
+            conn.close()
+        return bool(row["stop_requested"])
+
+    def set_throttle(self, state: dict[str, Any]) -> None:
+        self._update(throttle=json.dumps(state))
+
+    def publish_latency(self, worker: int, latency_ms: float | None, requests: int) -> None:
+        """Record a service worker's recent query latency for the build throttle."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_latency(worker, latency_ms, requests, updated_at) "
+                "VALUES (?, ?, ?, ?);",
+                (worker, latency_ms, requests, time.time()),
+            )
+        finally:
+            conn.close()
+
+    def query_latency(self, max_age: float = QUERY_LATENCY_MAX_AGE_SECONDS) -> float | None:
+        """Highest recent latency any worker reported, or None without fresh reports."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT MAX(latency_ms) AS latency_ms FROM query_latency WHERE updated_at >= ?;",
+                (time.time() - max_age,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return row["latency_ms"]
+
+    def claim_schedule_tick(self, interval: float) -> dict[str, Any] | None:
+        """Let one worker per ``interval`` run the scheduler; returns its state or None."""
+        conn = self._transaction()
+        try:
+            row = conn.execute("SELECT schedule FROM pipeline_state WHERE id = 1;").fetchone()
+            schedule = json.loads(row["schedule"] or "{}")
+            now = time.time()
+            if schedule.get("next_tick_at", 0) > now:
+                conn.execute("ROLLBACK;")
+                return None
+            schedule["next_tick_at"] = now + interval
+            conn.execute("UPDATE pipeline_state SET schedule = ? WHERE id = 1;", (json.dumps(schedule),))
+            conn.execute("COMMIT;")
+            return schedule
+        finally:
+            conn.close()
+
+    def update_schedule(self, values: dict[str, Any]) -> None:
+        conn = self._transaction()
+        try:
+            row = conn.execute("SELECT schedule FROM pipeline_state WHERE id = 1;").fetchone()
+            schedule = json.loads(row["schedule"] or "{}")
+            schedule.update(values)
+            conn.execute("UPDATE pipeline_state SET schedule = ? WHERE id = 1;", (json.dumps(schedule),))
+            conn.execute("COMMIT;")
+        finally:
+            conn.close()
+
+    def reset(self) -> bool:
+        conn = self._transaction()
+        try:
+            self._reap_stale(conn)
+            row = conn.execute("SELECT status FROM pipeline_state WHERE id = 1;").fetchone()
+            if row["status"] in ACTIVE_STATUSES:
+                conn.execute("ROLLBACK;")
+                return False
+            state = PipelineState()
+            conn.execute(
+                "UPDATE pipeline_state SET status = ?, step = ?, message = ?, started_at = NULL, "
+                "finished_at = NULL, progress = '{}', pid = NULL, stop_requested = 0, "
+                "heartbeat = NULL, throttle = '{}' WHERE id = 1;",
+                (state.status, state.step, state.message),
+            )
+            conn.execute("DELETE FROM pipeline_logs;")
+            self._append_log(conn, "Reset.")
+            conn.execute("COMMIT;")
+            return True
+        finally:
+            conn.close()
+
+
+def run_pipeline_process(store: PipelineStore) -> int:
+    """Run the recorded pipeline config, reporting into ``store``."""
+    store.attach(os.getpid())
+    done = threading.Event()
+
+    def _beat() -> None:
+        while not done.wait(HEARTBEAT_INTERVAL_SECONDS):
+            try:
+                store.heartbeat()
+            except sqlite3.Error:
+                pass
+
+    beat_thread = threading.Thread(target=_beat, daemon=True)
+    beat_thread.start()
+
+    last_poll = 0.0
+    stop_seen = False
+
+    def _should_stop() -> bool:
+        nonlocal last_poll, stop_seen
+        now = time.monotonic()
+        if not stop_seen and now - last_poll >= STOP_POLL_INTERVAL_SECONDS:
+            last_poll = now
+            stop_seen = store.stop_requested()
+        return stop_seen
+
+    try:
+        config = store.load_config()
+        throttle = Throttle(
+            max_records_per_sec=config.max_records_per_sec,
+            max_write_mb_per_sec=config.max_write_mb_per_sec,
+            pause_latency_ms=config.pause_latency_ms,
+            latency=store.query_latency,
+            report=store.set_throttle,
+            log=store.log,
+        )
+        result = run_pipeline(
+            config=config,
+            log=store.log,
+            progress=store.progress,
+            should_stop=_should_stop,
+            throttle=throttle,
+        )
+        store.finish("completed", "Completed.", "Pipeline completed.", result)
+        return 0
+    except InterruptedError:
+        store.finish("stopped", "Stopped.", "Pipeline stopped.")
+        return 0
+    except Exception as exc:
+        store.finish("error", str(exc), f"Pipeline error: {exc}")
+        return 1
+    finally:
+        done.set()
+        beat_thread.join(timeout=HEARTBEAT_INTERVAL_SECONDS)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the pipeline recorded in a control store.")
+    parser.add_argument("--store", required=True, type=Path, help="Pipeline control store path.")
+    parser.add_argument("--max-log-lines", type=int, default=1000)
+    args = parser.parse_args(argv)
+    return run_pipeline_process(PipelineStore(args.store, max_log_lines=args.max_log_lines))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
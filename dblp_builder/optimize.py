@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from .snapshot import install_database
+from .throttle import Throttle, _raise_if_stopped
+
+ProgressCallback = Callable[[str, dict[str, Any]], None]
+LogCallback = Callable[[str], None]
+ShouldStopCallback = Callable[[], bool]
+
+VALID_PAGE_SIZES = tuple(2**n for n in range(9, 17))
+
+
+def _file_size(db_path: Path) -> int:
+    total = 0
+    for suffix in ("", "-wal"):
+        try:
+            total += Path(f"{db_path}{suffix}").stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def _fts_tables(conn: sqlite3.Connection) -> list[str]:
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%USING fts5%' "
+        "ORDER BY name;"
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def optimize_db(
+    db_path: Path,
+    log: LogCallback,
+    progress: ProgressCallback,
+    should_stop: ShouldStopCallback,
+    page_size: int | None = None,
+    vacuum: bool = True,
+    throttle: Throttle | None = None,
+) -> dict[str, Any]:
+    """Finish a freshly built database for serving.
+
+    Merges each FTS5 index into a single segment, collects planner statistics
+    (``ANALYZE`` + ``PRAGMA optimize``) and, with ``vacuum``, compacts the file
+    with ``VACUUM INTO`` a temporary copy (at ``page_size`` if given) that then
+    replaces ``db_path``. Compaction is skipped when the disk does not have
+    room for the copy.
+
+    ``db_path`` must be a staged file no other process has open; use
+    :func:`optimize_live_db` for a database the service is reading. Each step
+    is a single statement, so ``throttle`` paces the work between steps: it
+    waits out the write-rate cap for what the last step wrote and pauses for
+    query latency before the next one.
+    """
+    if page_size is not None and page_size not in VALID_PAGE_SIZES:
+        raise ValueError(f"Invalid page size {page_size}; use a power of two from 512 to 65536.")
+
+    if page_size is not None and not vacuum:
+        log("Page size only changes with VACUUM INTO; ignoring the requested page size")
+        page_size = None
+
+    started = time.time()
+    timings: dict[str, float] = {}
+    size_before = _file_size(db_path)
+    conn = sqlite3.connect(str(db_path))
+    try:
+        page_size_before = conn.execute("PRAGMA page_size;").fetchone()[0]
+        stats: dict[str, Any] = {
+            "size_before_bytes": size_before,
+            "page_size_before": page_size_before,
+        }
+        log(f"Optimizing {db_path} ({size_before} bytes, page size {page_size_before})")
+
+        step_started = time.time()
+        tables = _fts_tables(conn)
+        for table in tables:
+            _raise_if_stopped(should_stop)
+            conn.execute(f"INSERT INTO {table}({table}) VALUES ('optimize');")
+            conn.commit()
+            if throttle is not None:
+                throttle.pace(should_stop)
+        timings["fts_optimize"] = round(time.time() - step_started, 2)
+        progress("optimize", {"optimize_step": "fts_optimize", "fts_tables": tables})
+
+        _raise_if_stopped(should_stop)
+        step_started = time.time()
+        conn.execute("ANALYZE;")
+        conn.execute("PRAGMA optimize;")
+        conn.commit()
+        if throttle is not None:
+            throttle.pace(should_stop)
+        timings["analyze"] = round(time.time() - step_started, 2)
+        progress("optimize", {"optimize_step": "analyze"})
+
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        stats["size_after_bytes"] = _file_size(db_path)
+        stats["page_size_after"] = page_size_before
+
+        _raise_if_stopped(should_stop)
+        if vacuum:
+            free = shutil.disk_usage(db_path.parent).free
+            if free < stats["size_after_bytes"]:
+                log(f"Skipping VACUUM INTO: {free} bytes free, {stats['size_after_bytes']} needed")
+            else:
+                step_started = time.time()
+                stats.update(_vacuum_into(conn, db_path, page_size, log))
+                conn = None
+                timings["vacuum"] = round(time.time() - step_started, 2)
+                progress("optimize", {"optimize_step": "vacuum"})
+                if throttle is not None:
+                    throttle.pace(should_stop)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    stats["optimize_seconds"] = timings
+    stats["optimize_elapsed_seconds"] = round(time.time() - started, 2)
+    progress("optimize", {"optimize_step": "done", **stats})
+    log(
+        f"Optimize complete in {stats['optimize_elapsed_seconds']}s: "
+        f"{stats['size_before_bytes']} -> {stats['size_after_bytes']} bytes, "
+        f"page size {stats['page_size_before']} -> {stats['page_size_after']}"
+    )
+    return {"optimize": stats}
+
+
+def _vacuum_into(
+    conn: sqlite3.Connection,
+    db_path: Path,
+    page_size: int | None,
+    log: LogCallback,
+) -> dict[str, Any]:
+    """``VACUUM INTO`` a sibling file, verify it and move it over ``db_path``; closes ``conn``."""
+    tmp_path = db_path.with_name(f".{db_path.name}.{os.getpid()}.vacuum")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        if page_size is not None:
+            # Applies to the VACUUM INTO target even though the source is in WAL mode.
+            conn.execute(f"PRAGMA page_size = {int(page_size)};")
+        conn.execute("VACUUM INTO ?;", (str(tmp_path),))
+        conn.close()
+
+        check = sqlite3.connect(str(tmp_path))
+        try:
+            result = check.execute("PRAGMA quick_check;").fetchone()[0]
+            if result != "ok":
+                raise RuntimeError(f"Compacted database failed quick_check: {result}")
+            actual_page_size = check.execute("PRAGMA page_size;").fetchone()[0]
+        finally:
+            check.close()
+        if page_size is not None and actual_page_size != page_size:
+            log(f"Requested page size {page_size} was not applied; database uses {actual_page_size}")
+
+        # ``conn`` was the only connection and checkpointed on close, so the
+        # staged file has no -wal/-shm left that could pair with the new one.
+        os.replace(tmp_path, db_path)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{tmp_path}{suffix}").unlink(missing_ok=True)
+    return {"size_after_bytes": _file_size(db_path), "page_size_after": actual_page_size}
+
+
+def optimize_live_db(
+    db_path: Path,
+    log: LogCallback,
+    progress: ProgressCallback,
+    should_stop: ShouldStopCallback,
+    page_size: int | None = None,
+    vacuum: bool = True,
+    throttle: Throttle | None = None,
+) -> dict[str, Any]:
+    """Optimize a database that may be in use without writing to it.
+
+    The database is copied to a private sibling file with the SQLite backup
+    API, optimized there and installed over ``db_path`` with
+    :func:`~dblp_builder.snapshot.install_database`. The copy is not the
+    pipeline's staging path, so a build in progress is left alone.
+    """
+    staged_path = db_path.with_name(f".{db_path.name}.{os.getpid()}.optimize")
+    log(f"Copying {db_path} -> {staged_path}")
+    try:
+        source = sqlite3.connect(str(db_path))
+        try:
+            target = sqlite3.connect(str(staged_path))
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+        if throttle is not None:
+            throttle.pace(should_stop)
+        stats = optimize_db(
+            staged_path, log, progress, should_stop, page_size=page_size, vacuum=vacuum, throttle=throttle
+        )
+        _raise_if_stopped(should_stop)
+        install_database(staged_path, db_path, log)
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            Path(f"{staged_path}{suffix}").unlink(missing_ok=True)
+    stats["optimize"]["size_after_bytes"] = _file_size(db_path)
+    return stats
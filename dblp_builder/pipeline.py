@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import gzip
+import io
+import re
 import sqlite3
 import time
+import unicodedata
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable
@@ -10,6 +13,11 @@ from urllib.parse import urlparse
 
 import requests
 
+from .columnar import export_columnar
+from .optimize import optimize_db
+from .snapshot import install_database, staged_db_path
+from .throttle import Throttle, _raise_if_stopped, lower_priority
+
 ALLOWED_DOWNLOAD_HOSTS = {"dblp.org", "dblp.uni-trier.de"}
 
 PUB_TAGS = {
@@ -22,6 +30,8 @@ PUB_TAGS = {
     "mastersthesis",
     "www",
 }
+# dblp.xml starts every record on its own line.
+RECORD_START_RE = re.compile(rb"^<(" + b"|".join(t.encode() for t in sorted(PUB_TAGS)) + rb")[\s>]")
 
 ProgressCallback = Callable[[str, dict[str, Any]], None]
 LogCallback = Callable[[str], None]
@@ -52,6 +62,16 @@ class PipelineConfig:
     batch_size: int = 1000
     progress_every: int = 10000
     rebuild: bool = True
+    offline: bool = False
+    resume: bool = False
+    columnar_format: str | None = None
+    columnar_dir_name: str = "columnar"
+    max_records_per_sec: float = 0.0
+    max_write_mb_per_sec: float = 0.0
+    nice: int = 0
+    pause_latency_ms: float = 0.0
+    optimize: bool = True
+    page_size: int | None = None
 
     @property
     def xml_gz_path(self) -> Path:
@@ -69,14 +89,38 @@ class PipelineConfig:
     def db_path(self) -> Path:
         return self.data_dir / self.db_name
 
+    @property
+    def staging_path(self) -> Path:
+        return staged_db_path(self.db_path)
+
+    @property
+    def columnar_dir(self) -> Path:
+        return self.data_dir / self.columnar_dir_name
+
 
 def _normalize(text: str) -> str:
     return " ".join(text.split())
 
 
-def _raise_if_stopped(should_stop: ShouldStopCallback) -> None:
-    if should_stop():
-        raise InterruptedError("Pipeline stopped by user request.")
+def venue_key(venue: str | None) -> str | None:
+    """Case- and punctuation-insensitive venue key ("Proc. VLDB Endow." -> "proc vldb endow")."""
+    if venue is None:
+        return None
+    key = "".join(ch if ch.isalnum() else " " for ch in venue.casefold())
+    return " ".join(key.split()) or None
+
+
+def author_name_key(name: str | None) -> str | None:
+    """Accent-, case- and punctuation-insensitive author key.
+
+    "Jürgen Schmidhuber" and "jurgen schmidhuber" both map to "jurgen schmidhuber".
+    """
+    if name is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    key = "".join(ch if ch.isalnum() else " " for ch in stripped.casefold())
+    return " ".join(key.split()) or None
 
 
 def _download_file(
@@ -86,6 +130,7 @@ def _download_file(
     log: LogCallback,
     progress: ProgressCallback,
     should_stop: ShouldStopCallback,
+    throttle: Throttle | None = None,
 ) -> None:
     log(f"Downloading {url} -> {target_path}")
     _validate_download_url(url)
@@ -105,6 +150,8 @@ def _download_file(
                     continue
                 fh.write(chunk)
                 downloaded += len(chunk)
+                if throttle is not None:
+                    throttle.pace(should_stop, bytes_hint=len(chunk))
                 if downloaded - last_report >= 5 * 1024 * 1024:
                     progress(
                         phase,
@@ -132,6 +179,7 @@ def _decompress_xml(
     log: LogCallback,
     progress: ProgressCallback,
     should_stop: ShouldStopCallback,
+    throttle: Throttle | None = None,
 ) -> None:
     log(f"Decompressing {source_gz} -> {target_xml}")
     target_xml.parent.mkdir(parents=True, exist_ok=True)
@@ -146,6 +194,8 @@ def _decompress_xml(
                 break
             dst.write(chunk)
             written += len(chunk)
+            if throttle is not None:
+                throttle.pace(should_stop, bytes_hint=len(chunk))
             if written - last_report >= 20 * 1024 * 1024:
                 progress("decompress_xml", {"written_bytes": written})
                 last_report = written
@@ -178,10 +228,18 @@ def _init_db(conn: sqlite3.Connection) -> None:
         """
         CREATE TABLE IF NOT EXISTS authors (
             id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL UNIQUE
+            name TEXT NOT NULL UNIQUE,
+            name_key TEXT
         );
         """
     )
+    cur.execute("PRAGMA table_info(authors);")
+    if "name_key" not in {row[1] for row in cur.fetchall()}:
+        # Databases built before name keys existed get the column and a backfill.
+        cur.execute("ALTER TABLE authors ADD COLUMN name_key TEXT;")
+        conn.create_function("author_name_key", 1, author_name_key, deterministic=True)
+        cur.execute("UPDATE authors SET name_key = author_name_key(name);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_authors_name_key ON authors(name_key);")
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS pub_authors (
@@ -192,8 +250,15 @@ def _init_db(conn: sqlite3.Connection) -> None:
         );
         """
     )
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_pub_authors_pub ON pub_authors(pub_id);")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_pub_authors_author ON pub_authors(author_id);")
+    # Composite indexes cover both join directions, so author lookups and the
+    # pairs self-join never have to visit the pub_authors table itself.
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pub_authors_author_pub ON pub_authors(author_id, pub_id);"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pub_authors_pub_author ON pub_authors(pub_id, author_id);"
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_publications_year ON publications(year);")
 
     cur.execute(
         """
@@ -207,6 +272,61 @@ def _init_db(conn: sqlite3.Connection) -> None:
         USING fts5(name, content='authors', content_rowid='id');
         """
     )
+    # Aggregates are rebuilt from scratch at the end of every full build.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS venues (
+            venue_key TEXT PRIMARY KEY,
+            venue TEXT NOT NULL,
+            pub_count INTEGER NOT NULL
+        );
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS venue_year_counts (
+            venue_key TEXT NOT NULL,
+            year INTEGER,
+            pub_type TEXT,
+            pub_count INTEGER NOT NULL
+        );
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS author_venue_year_counts (
+            author_id INTEGER NOT NULL,
+            venue_key TEXT NOT NULL,
+            year INTEGER,
+            pub_count INTEGER NOT NULL
+        );
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_venue_year_counts_key_year "
+        "ON venue_year_counts(venue_key, year, pub_type, pub_count);"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_author_venue_year_counts_author "
+        "ON author_venue_year_counts(author_id, venue_key, year, pub_count);"
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS build_checkpoint (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            status TEXT NOT NULL,
+            records_seen INTEGER NOT NULL,
+            processed_records INTEGER NOT NULL,
+            last_pub_id INTEGER NOT NULL,
+            max_author_id INTEGER NOT NULL,
+            fts_pub_id INTEGER NOT NULL,
+            fts_author_id INTEGER NOT NULL,
+            xml_size INTEGER NOT NULL,
+            xml_mtime_ns INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        """
+    )
     conn.commit()
 
 
@@ -231,6 +351,198 @@ def _extract_year_venue(elem: Any) -> tuple[int | None, str | None]:
     return year, venue
 
 
+def read_checkpoint(db_path: Path) -> dict[str, Any] | None:
+    if not db_path.exists():
+        return None
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute("SELECT * FROM build_checkpoint WHERE id = 1;").fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return dict(row) if row is not None else None
+
+
+def _write_checkpoint(
+    cur: sqlite3.Cursor,
+    status: str,
+    records_seen: int,
+    processed_records: int,
+    max_author_id: int,
+    xml_stat: Any,
+) -> None:
+    """Record build progress inside the batch transaction it describes.
+
+    Pending pub_authors and FTS rows are flushed before every commit, so the FTS
+    high-water marks always equal the last publication and author written.
+    """
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM publications;")
+    last_pub_id = int(cur.fetchone()[0])
+    cur.execute(
+        "INSERT OR REPLACE INTO build_checkpoint("
+        "id, status, records_seen, processed_records, last_pub_id, max_author_id, "
+        "fts_pub_id, fts_author_id, xml_size, xml_mtime_ns, updated_at"
+        ") VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+        (
+            status,
+            records_seen,
+            processed_records,
+            last_pub_id,
+            max_author_id,
+            last_pub_id,
+            max_author_id,
+            xml_stat.st_size,
+            xml_stat.st_mtime_ns,
+            time.time(),
+        ),
+    )
+
+
+def build_aggregates(
+    conn: sqlite3.Connection,
+    log: LogCallback,
+    progress: ProgressCallback,
+) -> dict[str, int]:
+    """Recompute the venue/year aggregate tables from the loaded publications.
+
+    Venues are grouped by :func:`venue_key`; each key is displayed with its most
+    frequent spelling. Publications without a venue are left out.
+    """
+    started = time.time()
+    conn.create_function("venue_key", 1, venue_key, deterministic=True)
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS temp.venue_map;")
+    cur.execute("CREATE TEMP TABLE venue_map (venue TEXT PRIMARY KEY, venue_key TEXT NOT NULL);")
+    cur.execute(
+        "INSERT INTO venue_map(venue, venue_key) "
+        "SELECT venue, venue_key(venue) "
+        "FROM (SELECT DISTINCT venue FROM publications WHERE venue IS NOT NULL) "
+        "WHERE venue_key(venue) IS NOT NULL;"
+    )
+    for table in ("venues", "venue_year_counts", "author_venue_year_counts"):
+        cur.execute(f"DELETE FROM {table};")
+    cur.execute(
+        """
+        INSERT INTO venues(venue_key, venue, pub_count)
+        SELECT venue_key, venue, total FROM (
+            SELECT m.venue_key, p.venue,
+                   SUM(COUNT(*)) OVER (PARTITION BY m.venue_key) AS total,
+                   ROW_NUMBER() OVER (PARTITION BY m.venue_key ORDER BY COUNT(*) DESC, p.venue) AS rn
+            FROM publications p
+            JOIN venue_map m ON m.venue = p.venue
+            GROUP BY m.venue_key, p.venue
+        )
+        WHERE rn = 1;
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO venue_year_counts(venue_key, year, pub_type, pub_count)
+        SELECT m.venue_key, p.year, p.pub_type, COUNT(*)
+        FROM publications p
+        JOIN venue_map m ON m.venue = p.venue
+        GROUP BY m.venue_key, p.year, p.pub_type;
+        """
+    )
+    progress("build_aggregates", {"aggregates": "venues"})
+    cur.execute(
+        """
+        INSERT INTO author_venue_year_counts(author_id, venue_key, year, pub_count)
+        SELECT pa.author_id, m.venue_key, p.year, COUNT(DISTINCT p.id)
+        FROM pub_authors pa
+        JOIN publications p ON p.id = pa.pub_id
+        JOIN venue_map m ON m.venue = p.venue
+        GROUP BY pa.author_id, m.venue_key, p.year;
+        """
+    )
+    cur.execute("DROP TABLE temp.venue_map;")
+    counts = {
+        table: int(cur.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0])
+        for table in ("venues", "venue_year_counts", "author_venue_year_counts")
+    }
+    progress(
+        "build_aggregates",
+        {"aggregates": "done", **{f"{table}_rows": n for table, n in counts.items()}},
+    )
+    log(f"Aggregates rebuilt in {time.time() - started:.2f}s: {counts}")
+    return counts
+
+
+def _iterparse(source: Any) -> Any:
+    """``lxml.etree.iterparse`` over dblp.xml with ``end`` events.
+
+    Secure parser: the local DTD is loaded for legitimate character entities
+    (e.g. ``&auml;``), but any other external entity resolves to an empty
+    string to prevent XXE, and network access is disabled. Since lxml 5,
+    iterparse has no ``parser`` argument and builds its own parser, so the
+    options are passed here and the resolver is registered on the iterator.
+    """
+    from lxml import etree as ET
+
+    class _SafeResolver(ET.Resolver):
+        def resolve(self, system_url, public_id, context):
+            if system_url and system_url.endswith(".dtd"):
+                return self.resolve_filename(system_url, context)
+            return self.resolve_string("", context)
+
+    context = ET.iterparse(
+        source,
+        events=("end",),
+        load_dtd=True,
+        resolve_entities=True,
+        huge_tree=True,
+        no_network=True,
+    )
+    context.resolvers.add(_SafeResolver())
+    return context
+
+
+class _XmlRange(io.RawIOBase):
+    """dblp.xml's prolog, the records in bytes ``[start, end)`` and a closing root tag.
+
+    Lets a shard parse its own byte range as a complete document. ``name`` is
+    the real path, so lxml resolves the relative DTD reference (and its
+    character entities) as it does for the whole file.
+    """
+
+    def __init__(self, xml_path: Path, start: int, end: int) -> None:
+        super().__init__()
+        self.name = str(xml_path)
+        self._fh = xml_path.open("rb")
+        prolog_end = 0
+        for line in self._fh:
+            if RECORD_START_RE.match(line):
+                break
+            prolog_end += len(line)
+        self._parts = [[0, prolog_end], [max(start, prolog_end), end]]
+        self._tail = b"</dblp>\n"
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        view = memoryview(buffer).cast("B")
+        while self._parts:
+            part = self._parts[0]
+            if part[0] < part[1]:
+                self._fh.seek(part[0])
+                read = self._fh.readinto(view[: min(len(view), part[1] - part[0])])
+                if read:
+                    part[0] += read
+                    return read
+            self._parts.pop(0)
+        read = min(len(view), len(self._tail))
+        view[:read] = self._tail[:read]
+        self._tail = self._tail[read:]
+        return read
+
+    def close(self) -> None:
+        self._fh.close()
+        super().close()
+
+
 def _build_db(
     xml_path: Path,
     db_path: Path,
@@ -239,7 +551,17 @@ def _build_db(
     log: LogCallback,
     progress: ProgressCallback,
     should_stop: ShouldStopCallback,
+    resume: bool = False,
+    xml_range: tuple[int, int] | None = None,
+    build_fts: bool = True,
+    throttle: Throttle | None = None,
 ) -> dict[str, Any]:
+    """Parse dblp.xml into ``db_path``.
+
+    ``xml_range`` restricts the build to the records starting in that half-open
+    byte range, for sharded builds; only those bytes (plus the prolog) are
+    parsed. Shards skip the FTS tables, which are rebuilt once after merging.
+    """
     try:
         from lxml import etree as ET
     except Exception as exc:
@@ -247,7 +569,23 @@ def _build_db(
             "lxml is required for building from dblp.xml. Install it in the runtime environment."
         ) from exc
 
-    log(f"Building sqlite db from {xml_path} -> {db_path}")
+    xml_stat = xml_path.stat()
+    checkpoint = read_checkpoint(db_path) if resume else None
+    if checkpoint is not None:
+        if (checkpoint["xml_size"], checkpoint["xml_mtime_ns"]) != (
+            xml_stat.st_size,
+            xml_stat.st_mtime_ns,
+        ):
+            raise RuntimeError(
+                f"{xml_path} changed since the checkpoint was written; start a full rebuild instead."
+            )
+        log(
+            f"Resuming sqlite db {db_path} after {checkpoint['processed_records']} records "
+            f"({checkpoint['records_seen']} XML records to skip)"
+        )
+    else:
+        log(f"Building sqlite db from {xml_path} -> {db_path}")
+
     conn = sqlite3.connect(str(db_path))
     _init_db(conn)
     cur = conn.cursor()
@@ -257,39 +595,40 @@ def _build_db(
         "VALUES (?, ?, ?, ?, ?);"
     )
 
-    insert_author = "INSERT OR IGNORE INTO authors(name) VALUES (?);"
+    insert_author = "INSERT OR IGNORE INTO authors(name, name_key) VALUES (?, ?);"
     insert_pub_author = "INSERT INTO pub_authors(pub_id, author_id) VALUES (?, ?);"
     insert_title_fts = "INSERT INTO title_fts(rowid, title) VALUES (?, ?);"
     insert_author_fts = "INSERT INTO author_fts(rowid, name) VALUES (?, ?);"
 
     author_cache: dict[str, int] = {}
+    if checkpoint is not None:
+        cur.execute("SELECT id, name FROM authors;")
+        author_cache = {name: author_id for author_id, name in cur.fetchall()}
     pending_pub_authors: list[tuple[int, int]] = []
     pending_titles: list[tuple[int, str]] = []
     pending_authors: list[tuple[int, str]] = []
+    batch_bytes = 0
 
-    # Secure XML parser: allow local DTD for legitimate character entities
-    # (e.g. &auml;) but block external SYSTEM entity resolution to prevent XXE.
-    class _SafeResolver(ET.Resolver):
-        def resolve(self, system_url, public_id, context):
-            if system_url and system_url.endswith(".dtd"):
-                return self.resolve_filename(system_url, context)
-            return self.resolve_string("", context)
-
-    parser = ET.XMLParser(
-        load_dtd=True,
-        resolve_entities=True,
-        huge_tree=True,
-        no_network=True,
-    )
-    parser.resolvers.add(_SafeResolver())
-
-    context = ET.iterparse(
-        str(xml_path),
-        events=("end",),
-        parser=parser,
-    )
-
+    seen = 0
     count = 0
+    skip_until = 0
+    max_author_id = 0
+    if checkpoint is not None:
+        if checkpoint["status"] == "completed":
+            conn.close()
+            log("Checkpoint reports a completed build; nothing to resume.")
+            return {
+                "processed_records": checkpoint["processed_records"],
+                "elapsed_seconds": 0.0,
+                "records_per_sec": 0.0,
+                "db_path": str(db_path),
+            }
+        skip_until = checkpoint["records_seen"]
+        count = checkpoint["processed_records"]
+        max_author_id = checkpoint["max_author_id"]
+    resumed_from = count
+    source: Any = str(xml_path) if xml_range is None else _XmlRange(xml_path, *xml_range)
+    context = _iterparse(source)
     start = time.time()
     last_report = start
     try:
@@ -298,6 +637,13 @@ def _build_db(
             if elem.tag not in PUB_TAGS:
                 continue
 
+            seen += 1
+            if seen <= skip_until:
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+                continue
+
             title_elem = elem.find("title")
             if title_elem is None or title_elem.text is None:
                 elem.clear()
@@ -305,11 +651,13 @@ def _build_db(
 
             title = _normalize(title_elem.text)
             year, venue = _extract_year_venue(elem)
-            raw_xml = ET.tostring(elem, encoding="unicode")
+            raw_xml = ET.tostring(elem, encoding="unicode", with_tail=False)
             cur.execute(insert_pub, (title, year, venue, elem.tag, raw_xml))
+            batch_bytes += len(raw_xml) + len(title)
 
             pub_id = cur.lastrowid
-            pending_titles.append((pub_id, title))
+            if build_fts:
+                pending_titles.append((pub_id, title))
 
             for author_elem in elem.findall("author"):
                 if author_elem.text is None:
@@ -317,14 +665,16 @@ def _build_db(
                 author = _normalize(author_elem.text)
                 author_id = author_cache.get(author)
                 if author_id is None:
-                    cur.execute(insert_author, (author,))
+                    cur.execute(insert_author, (author, author_name_key(author)))
                     cur.execute("SELECT id FROM authors WHERE name = ?;", (author,))
                     row = cur.fetchone()
                     if row is None:
                         continue
                     author_id = row[0]
                     author_cache[author] = author_id
-                    pending_authors.append((author_id, author))
+                    max_author_id = max(max_author_id, author_id)
+                    if build_fts:
+                        pending_authors.append((author_id, author))
                 pending_pub_authors.append((pub_id, author_id))
 
             count += 1
@@ -335,7 +685,11 @@ def _build_db(
                 pending_pub_authors.clear()
                 pending_titles.clear()
                 pending_authors.clear()
+                _write_checkpoint(cur, "building", seen, count, max_author_id, xml_stat)
                 conn.commit()
+                if throttle is not None:
+                    throttle.pace(should_stop, records=batch_size, bytes_hint=batch_bytes)
+                batch_bytes = 0
 
             if progress_every > 0 and count % progress_every == 0:
                 now = time.time()
@@ -346,7 +700,7 @@ def _build_db(
                         "build_db",
                         {
                             "processed_records": count,
-                            "records_per_sec": round(count / elapsed, 2),
+                            "records_per_sec": round((count - resumed_from) / elapsed, 2),
                         },
                     )
                     last_report = now
@@ -361,13 +715,20 @@ def _build_db(
             cur.executemany(insert_title_fts, pending_titles)
         if pending_authors:
             cur.executemany(insert_author_fts, pending_authors)
+        if build_fts:
+            build_aggregates(conn, log, progress)
+            if throttle is not None:
+                throttle.pace(should_stop)
 
+        _write_checkpoint(cur, "completed", seen, count, max_author_id, xml_stat)
         conn.commit()
     finally:
         conn.close()
+        if isinstance(source, _XmlRange):
+            source.close()
 
     elapsed = max(time.time() - start, 0.001)
-    rate = round(count / elapsed, 2)
+    rate = round((count - resumed_from) / elapsed, 2)
     progress("build_db", {"processed_records": count, "records_per_sec": rate})
     log(f"Build complete: {count} records, {rate} rec/s")
     return {
@@ -379,45 +740,52 @@ def _build_db(
 
 
 def _cleanup_db_files(db_path: Path, log: LogCallback) -> None:
-    for suffix in ("", "-wal", "-shm"):
+    for suffix in ("", "-wal", "-shm", ".manifest.json"):
         path = Path(f"{db_path}{suffix}")
         if path.exists():
             path.unlink(missing_ok=True)
             log(f"Removed existing file: {path}")
 
 
-def run_pipeline(
+def _prepare_sources(
     config: PipelineConfig,
     log: LogCallback,
     progress: ProgressCallback,
     should_stop: ShouldStopCallback,
-) -> dict[str, Any]:
-    started = time.time()
-    config.data_dir.mkdir(parents=True, exist_ok=True)
-    log(f"Pipeline start (data_dir={config.data_dir})")
-
-    if config.rebuild:
-        _cleanup_db_files(config.db_path, log)
-
-    _raise_if_stopped(should_stop)
-    _download_file(
-        config.dtd_url,
-        config.dtd_path,
-        "download_dtd",
-        log,
-        progress,
-        should_stop,
-    )
+    reuse_xml: bool = False,
+    throttle: Throttle | None = None,
+) -> None:
+    if reuse_xml:
+        log(f"Reusing decompressed XML {config.xml_path}")
+        return
+
+    if config.offline:
+        for path in (config.dtd_path, config.xml_gz_path):
+            if not path.is_file():
+                raise FileNotFoundError(f"Offline build requires an existing local file: {path}")
+        log(f"Offline mode: using local {config.xml_gz_path} and {config.dtd_path}")
+    else:
+        _raise_if_stopped(should_stop)
+        _download_file(
+            config.dtd_url,
+            config.dtd_path,
+            "download_dtd",
+            log,
+            progress,
+            should_stop,
+            throttle,
+        )
 
-    _raise_if_stopped(should_stop)
-    _download_file(
-        config.xml_gz_url,
-        config.xml_gz_path,
-        "download_xml_gz",
-        log,
-        progress,
-        should_stop,
-    )
+        _raise_if_stopped(should_stop)
+        _download_file(
+            config.xml_gz_url,
+            config.xml_gz_path,
+            "download_xml_gz",
+            log,
+            progress,
+            should_stop,
+            throttle,
+        )
 
     _raise_if_stopped(should_stop)
     _decompress_xml(
@@ -426,18 +794,84 @@ def run_pipeline(
         log,
         progress,
         should_stop,
+        throttle,
     )
 
+
+def run_pipeline(
+    config: PipelineConfig,
+    log: LogCallback,
+    progress: ProgressCallback,
+    should_stop: ShouldStopCallback,
+    throttle: Throttle | None = None,
+) -> dict[str, Any]:
+    """Download, decompress and build ``config.db_path``.
+
+    The database is built and optimized at ``config.staging_path`` and only
+    replaces ``config.db_path`` once complete, so the service keeps answering
+    from the previous build meanwhile; ``rebuild`` and ``resume`` apply to the
+    staged file. Without an explicit ``throttle`` the config's rate caps apply,
+    but not its latency pause, which needs query latencies from the service
+    workers.
+    """
+    started = time.time()
+    config.data_dir.mkdir(parents=True, exist_ok=True)
+    log(f"Pipeline start (data_dir={config.data_dir})")
+    if throttle is None:
+        throttle = Throttle(config.max_records_per_sec, config.max_write_mb_per_sec)
+    niceness = lower_priority(config.nice)
+    if niceness is not None:
+        log(f"Build process niceness set to {niceness}")
+
+    staging_path = config.staging_path
+    resume = False
+    if config.resume:
+        checkpoint = read_checkpoint(staging_path)
+        if checkpoint is None:
+            log("No build checkpoint found; starting a full build.")
+        elif not config.xml_path.is_file():
+            raise FileNotFoundError(f"Cannot resume without the original XML: {config.xml_path}")
+        else:
+            resume = True
+
+    if config.rebuild and not resume:
+        _cleanup_db_files(staging_path, log)
+
+    _prepare_sources(config, log, progress, should_stop, reuse_xml=resume, throttle=throttle)
+
     _raise_if_stopped(should_stop)
     build_stats = _build_db(
         xml_path=config.xml_path,
-        db_path=config.db_path,
+        db_path=staging_path,
         batch_size=config.batch_size,
         progress_every=config.progress_every,
         log=log,
         progress=progress,
         should_stop=should_stop,
+        resume=resume,
+        throttle=throttle,
     )
+    if config.optimize:
+        _raise_if_stopped(should_stop)
+        build_stats.update(
+            optimize_db(staging_path, log, progress, should_stop, page_size=config.page_size, throttle=throttle)
+        )
+    throttle.finish()
+    _raise_if_stopped(should_stop)
+    install_database(staging_path, config.db_path, log)
+    build_stats["db_path"] = str(config.db_path)
+    if config.columnar_format:
+        _raise_if_stopped(should_stop)
+        build_stats.update(
+            export_columnar(
+                config.db_path,
+                config.columnar_dir,
+                log=log,
+                progress=progress,
+                should_stop=should_stop,
+                fmt=config.columnar_format,
+            )
+        )
 
     elapsed = round(time.time() - started, 2)
     result = {
@@ -448,5 +882,7 @@ def run_pipeline(
         "dtd_path": str(config.dtd_path),
         **build_stats,
     }
+    if throttle.active:
+        result["throttle"] = throttle.state()
     log(f"Pipeline finished in {elapsed}s")
     return result
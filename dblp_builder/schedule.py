@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import requests
+
+from .control import ACTIVE_STATUSES, PipelineStore
+from .pipeline import _validate_download_url
+
+TICK_SECONDS = 60.0
+
+LogCallback = Callable[[str], None]
+
+
+def parse_windows(spec: str) -> list[tuple[int, int]]:
+    """Parse ``"01:00-05:00,22:30-02:00"`` into (start, end) minutes of the UTC day.
+
+    A window whose end is before its start wraps past midnight.
+    """
+    windows: list[tuple[int, int]] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            start_text, end_text = part.split("-")
+            bounds = []
+            for text in (start_text, end_text):
+                hours, minutes = text.strip().split(":")
+                value = int(hours) * 60 + int(minutes)
+                if not 0 <= value <= 24 * 60:
+                    raise ValueError
+                bounds.append(value)
+        except ValueError:
+            raise ValueError(f"Invalid schedule window {part!r}; expected HH:MM-HH:MM (UTC).") from None
+        windows.append((bounds[0], bounds[1]))
+    return windows
+
+
+def in_window(windows: list[tuple[int, int]], when: datetime) -> bool:
+    if not windows:
+        return True
+    minute = when.hour * 60 + when.minute
+    for start, end in windows:
+        if start <= end and start <= minute < end:
+            return True
+        if start > end and (minute >= start or minute < end):
+            return True
+    return False
+
+
+def upstream_signature(url: str, timeout: float = 30.0) -> dict[str, Any]:
+    """ETag, Last-Modified and size of the upstream dump, from a HEAD request."""
+    _validate_download_url(url)
+    response = requests.head(url, allow_redirects=True, timeout=timeout)
+    response.raise_for_status()
+    return {
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "content_length": response.headers.get("content-length"),
+    }
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_iso(value: str | None) -> float:
+    if not value:
+        return 0.0
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+def _built_after(signature: dict[str, Any], db_path: Path) -> bool:
+    """True if ``db_path`` is newer than the upstream dump described by ``signature``."""
+    try:
+        upstream = parsedate_to_datetime(signature["last_modified"]).timestamp()
+        return db_path.stat().st_mtime > upstream
+    except (KeyError, TypeError, ValueError, OSError):
+        return False
+
+
+class BuildScheduler:
+    """Starts periodic rebuilds from a service worker.
+
+    Every worker runs one, but the store hands each tick to a single worker.
+    A build starts when ``interval_seconds`` have passed since the last check,
+    the current UTC time is inside one of ``windows`` (any time if empty) and,
+    with ``check_upstream``, the dump's HEAD signature differs from the one the
+    last scheduled build used. A successful build records its signature once
+    the pipeline reports ``completed``; failed or stopped builds are retried at
+    the next interval.
+    """
+
+    def __init__(
+        self,
+        store: PipelineStore,
+        start_build: Callable[[], Any],
+        interval_seconds: float,
+        windows: list[tuple[int, int]],
+        upstream_url: str,
+        db_path: Path,
+        check_upstream: bool = True,
+        log: LogCallback | None = None,
+        tick_seconds: float = TICK_SECONDS,
+    ) -> None:
+        self._store = store
+        self._start_build = start_build
+        self.interval_seconds = interval_seconds
+        self.windows = windows
+        self.upstream_url = upstream_url
+        self.db_path = db_path
+        self.check_upstream = check_upstream
+        self._log = log or (lambda msg: None)
+        self.tick_seconds = tick_seconds
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "enabled": True,
+            "interval_hours": round(self.interval_seconds / 3600, 3),
+            "windows_utc": [f"{s // 60:02d}:{s % 60:02d}-{e // 60:02d}:{e % 60:02d}" for s, e in self.windows],
+            "check_upstream": self.check_upstream,
+        }
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="build-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as exc:
+                self._log(f"Build scheduler error: {exc}")
+            self._stop.wait(self.tick_seconds)
+
+    def tick(self) -> None:
+        schedule = self._store.claim_schedule_tick(self.tick_seconds)
+        if schedule is None:
+            return
+        now = time.time()
+        status = self._store.snapshot()["status"]
+        updates = self.describe()
+
+        if schedule.get("pending") and status not in ACTIVE_STATUSES:
+            updates["pending"] = False
+            updates["last_result"] = status
+            if status == "completed":
+                updates["last_built_signature"] = schedule.get("pending_signature")
+
+        window_open = in_window(self.windows, datetime.fromtimestamp(now, tz=timezone.utc))
+        due_at = _parse_iso(schedule.get("last_check_at")) + self.interval_seconds
+        updates["window_open"] = window_open
+        updates["next_check_at"] = _iso(max(due_at, now))
+        if status in ACTIVE_STATUSES or not window_open or now < due_at:
+            self._store.update_schedule(updates)
+            return
+
+        updates["last_check_at"] = _iso(now)
+        updates["next_check_at"] = _iso(now + self.interval_seconds)
+        signature = None
+        if self.check_upstream:
+            try:
+                signature = upstream_signature(self.upstream_url)
+            except Exception as exc:
+                updates["last_error"] = f"Upstream check failed: {exc}"
+                self._store.update_schedule(updates)
+                return
+            updates["upstream"] = signature
+            last_built = updates.get("last_built_signature", schedule.get("last_built_signature"))
+            if last_built is None and _built_after(signature, self.db_path):
+                # First check on an existing database that is already newer than the dump.
+                last_built = updates["last_built_signature"] = signature
+            if signature == last_built:
+                updates["last_decision"] = "upstream unchanged"
+                updates["last_error"] = None
+                self._store.update_schedule(updates)
+                return
+
+        try:
+            self._start_build()
+        except Exception as exc:
+            updates["last_error"] = f"Cannot start build: {exc}"
+            self._store.update_schedule(updates)
+            return
+        self._log("Scheduled build started.")
+        updates.update(
+            pending=True,
+            pending_signature=signature,
+            last_started_at=_iso(now),
+            last_decision="build started",
+            last_error=None,
+        )
+        self._store.update_schedule(updates)
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import multiprocessing
+import sqlite3
+import sys
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any
+
+from .columnar import export_columnar
+from .optimize import optimize_db
+from .pipeline import (
+    RECORD_START_RE,
+    LogCallback,
+    PipelineConfig,
+    ProgressCallback,
+    ShouldStopCallback,
+    _build_db,
+    _cleanup_db_files,
+    _init_db,
+    _prepare_sources,
+    _raise_if_stopped,
+    build_aggregates,
+    read_checkpoint,
+)
+from .snapshot import install_database
+from .throttle import Throttle, lower_priority
+
+_worker_stop: Any = None
+
+
+def record_offsets(xml_path: Path) -> array:
+    """Byte offsets of every publication record's start tag, in document order.
+
+    dblp.xml starts every record on its own line, so this is a line scan
+    rather than a parse. A final entry marks the end of the last record (the
+    closing root tag), so there is one more offset than records.
+    """
+    offsets = array("q")
+    position = 0
+    end = None
+    with xml_path.open("rb") as fh:
+        for line in fh:
+            if RECORD_START_RE.match(line):
+                offsets.append(position)
+            elif line.startswith(b"</dblp>"):
+                end = position
+            position += len(line)
+    offsets.append(position if end is None else end)
+    return offsets
+
+
+def shard_byte_range(offsets: array, record_start: int, record_end: int | None) -> tuple[int, int]:
+    """Byte range ``[start, end)`` of records ``[record_start, record_end)``; ``None`` means to the end."""
+    total = len(offsets) - 1
+    end = total if record_end is None else min(record_end, total)
+    return offsets[min(record_start, total)], offsets[end]
+
+
+def plan_shards(total_records: int, shard_count: int) -> list[tuple[int, int | None]]:
+    if shard_count < 1:
+        raise ValueError("shard_count must be at least 1.")
+    size = max(1, -(-total_records // shard_count))
+    ranges: list[tuple[int, int | None]] = []
+    for index in range(shard_count):
+        end = None if index == shard_count - 1 else (index + 1) * size
+        ranges.append((index * size, end))
+    return ranges
+
+
+def shard_path(config: PipelineConfig, shard_index: int, shard_count: int) -> Path:
+    stem = Path(config.db_name).stem
+    return config.data_dir / "shards" / f"{stem}.shard-{shard_index:03d}-of-{shard_count:03d}.sqlite"
+
+
+def build_shard(
+    config: PipelineConfig,
+    shard_index: int,
+    shard_count: int,
+    xml_range: tuple[int, int],
+    log: LogCallback,
+    progress: ProgressCallback,
+    should_stop: ShouldStopCallback,
+    throttle: Throttle | None = None,
+) -> dict[str, Any]:
+    """Build the records in one byte range of the XML into a partial database.
+
+    ``xml_range`` comes from :func:`shard_byte_range`; only that part of the
+    file is parsed, so shards split the parse work instead of each one
+    re-reading every record before its own.
+
+    Like :func:`run_pipeline`, the config's rate caps and nice value apply to
+    this process unless an explicit ``throttle`` is given.
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard_index must be in [0, {shard_count}).")
+    if throttle is None:
+        throttle = Throttle(config.max_records_per_sec, config.max_write_mb_per_sec)
+    niceness = lower_priority(config.nice)
+    if niceness is not None:
+        log(f"Shard process niceness set to {niceness}")
+    path = shard_path(config, shard_index, shard_count)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    resume = config.resume and read_checkpoint(path) is not None
+    if not resume:
+        _cleanup_db_files(path, log)
+    log(f"Shard {shard_index + 1}/{shard_count}: bytes [{xml_range[0]}, {xml_range[1]}) -> {path}")
+    stats = _build_db(
+        xml_path=config.xml_path,
+        db_path=path,
+        batch_size=config.batch_size,
+        progress_every=config.progress_every,
+        log=log,
+        progress=progress,
+        should_stop=should_stop,
+        resume=resume,
+        xml_range=xml_range,
+        build_fts=False,
+        throttle=throttle,
+    )
+    throttle.finish()
+    return {**stats, "shard_index": shard_index, "shard_count": shard_count}
+
+
+def merge_shards(
+    shard_paths: list[Path],
+    db_path: Path,
+    log: LogCallback,
+    progress: ProgressCallback,
+    should_stop: ShouldStopCallback,
+    throttle: Throttle | None = None,
+) -> dict[str, Any]:
+    """Combine shard databases (in record order) into ``db_path``.
+
+    Publications are appended with an ID offset, authors are unified by name
+    in first-seen order, pub_authors is remapped onto the merged IDs and the FTS
+    tables are rebuilt once at the end. The result matches a serial build.
+    ``throttle`` is paced after each shard and after the rebuilds.
+    """
+    checkpoints = []
+    for path in shard_paths:
+        checkpoint = read_checkpoint(path)
+        if checkpoint is None or checkpoint["status"] != "completed":
+            raise RuntimeError(f"Shard is missing or incomplete: {path}")
+        checkpoints.append(checkpoint)
+
+    start = time.time()
+    _cleanup_db_files(db_path, log)
+    conn = sqlite3.connect(str(db_path))
+    _init_db(conn)
+    cur = conn.cursor()
+    processed = 0
+    records_seen = 0
+    try:
+        for index, path in enumerate(shard_paths):
+            _raise_if_stopped(should_stop)
+            log(f"Merging shard {index + 1}/{len(shard_paths)}: {path}")
+            cur.execute("ATTACH DATABASE ? AS shard;", (str(path),))
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM publications;")
+            offset = int(cur.fetchone()[0])
+
+            cur.execute(
+                "INSERT INTO publications(id, title, year, venue, pub_type, raw_xml) "
+                "SELECT id + ?, title, year, venue, pub_type, raw_xml FROM shard.publications ORDER BY id;",
+                (offset,),
+            )
+            cur.execute(
+                "INSERT OR IGNORE INTO authors(name, name_key) "
+                "SELECT name, name_key FROM shard.authors ORDER BY id;"
+            )
+            cur.execute("DROP TABLE IF EXISTS temp.author_map;")
+            cur.execute(
+                "CREATE TEMP TABLE author_map (shard_id INTEGER PRIMARY KEY, author_id INTEGER NOT NULL);"
+            )
+            cur.execute(
+                "INSERT INTO author_map(shard_id, author_id) "
+                "SELECT s.id, a.id FROM shard.authors s JOIN main.authors a ON a.name = s.name;"
+            )
+            cur.execute(
+                "INSERT INTO pub_authors(pub_id, author_id) "
+                "SELECT pa.pub_id + ?, m.author_id FROM shard.pub_authors pa "
+                "JOIN author_map m ON m.shard_id = pa.author_id ORDER BY pa.rowid;",
+                (offset,),
+            )
+            conn.commit()
+            cur.execute("DETACH DATABASE shard;")
+            if throttle is not None:
+                throttle.pace(should_stop, records=checkpoints[index]["processed_records"])
+
+            processed += checkpoints[index]["processed_records"]
+            records_seen += checkpoints[index]["records_seen"]
+            progress("merge_shards", {"merged_shards": index + 1, "processed_records": processed})
+
+        _raise_if_stopped(should_stop)
+        log("Rebuilding FTS indexes")
+        progress("merge_shards", {"fts": "rebuilding"})
+        cur.execute("INSERT INTO title_fts(title_fts) VALUES ('rebuild');")
+        cur.execute("INSERT INTO author_fts(author_fts) VALUES ('rebuild');")
+        if throttle is not None:
+            throttle.pace(should_stop)
+        build_aggregates(conn, log, progress)
+        if throttle is not None:
+            throttle.pace(should_stop)
+
+        last = checkpoints[-1]
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM authors;")
+        max_author_id = int(cur.fetchone()[0])
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM publications;")
+        last_pub_id = int(cur.fetchone()[0])
+        cur.execute(
+            "INSERT OR REPLACE INTO build_checkpoint("
+            "id, status, records_seen, processed_records, last_pub_id, max_author_id, "
+            "fts_pub_id, fts_author_id, xml_size, xml_mtime_ns, updated_at"
+            ") VALUES (1, 'completed', ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+            (
+                records_seen,
+                processed,
+                last_pub_id,
+                max_author_id,
+                last_pub_id,
+                max_author_id,
+                last["xml_size"],
+                last["xml_mtime_ns"],
+                time.time(),
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    elapsed = max(time.time() - start, 0.001)
+    log(f"Merge complete: {processed} records from {len(shard_paths)} shards in {elapsed:.2f}s")
+    return {
+        "processed_records": processed,
+        "elapsed_seconds": round(elapsed, 2),
+        "shard_count": len(shard_paths),
+        "db_path": str(db_path),
+    }
+
+
+def _init_worker(stop_event: Any) -> None:
+    global _worker_stop
+    _worker_stop = stop_event
+
+
+def _shard_job(
+    config: PipelineConfig,
+    shard_index: int,
+    shard_count: int,
+    xml_range: tuple[int, int],
+) -> dict[str, Any]:
+    prefix = f"[shard {shard_index + 1}/{shard_count}]"
+
+    def _log(msg: str) -> None:
+        print(f"{prefix} {msg}", file=sys.stderr, flush=True)
+
+    def _progress(phase: str, payload: dict[str, Any]) -> None:
+        _log(f"{phase}: {payload}")
+
+    return build_shard(
+        config,
+        shard_index,
+        shard_count,
+        xml_range,
+        log=_log,
+        progress=_progress,
+        should_stop=_worker_stop.is_set,
+    )
+
+
+def run_sharded_pipeline(
+    config: PipelineConfig,
+    shard_count: int,
+    workers: int,
+    log: LogCallback,
+    progress: ProgressCallback,
+    should_stop: ShouldStopCallback,
+) -> dict[str, Any]:
+    """Prepare sources, build every shard in parallel processes, then merge.
+
+    Shards are merged and optimized at ``config.staging_path``, which then
+    replaces ``config.db_path``. Every shard process and the merge apply the
+    config's rate caps on their own.
+    """
+    started = time.time()
+    config.data_dir.mkdir(parents=True, exist_ok=True)
+    log(f"Sharded pipeline start (data_dir={config.data_dir}, shards={shard_count}, workers={workers})")
+    _prepare_sources(config, log, progress, should_stop, reuse_xml=config.resume and config.xml_path.is_file())
+
+    _raise_if_stopped(should_stop)
+    offsets = record_offsets(config.xml_path)
+    total_records = len(offsets) - 1
+    xml_ranges = [shard_byte_range(offsets, start, end) for start, end in plan_shards(total_records, shard_count)]
+    del offsets
+    log(f"Counted {total_records} records in {config.xml_path}")
+
+    ctx = multiprocessing.get_context("spawn")
+    stop_event = ctx.Event()
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=max(1, workers),
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(stop_event,),
+    ) as pool:
+        pending: set[Future[dict[str, Any]]] = {
+            pool.submit(_shard_job, config, index, shard_count, xml_ranges[index])
+            for index in range(shard_count)
+        }
+        try:
+            while pending:
+                finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stats = future.result()
+                    done += 1
+                    log(f"Shard {stats['shard_index'] + 1}/{shard_count} done: {stats['processed_records']} records")
+                    progress("build_shards", {"shards_done": done, "shard_count": shard_count})
+                if should_stop():
+                    stop_event.set()
+        except BaseException:
+            stop_event.set()
+            for future in pending:
+                future.cancel()
+            raise
+    _raise_if_stopped(should_stop)
+
+    shard_paths = [shard_path(config, index, shard_count) for index in range(shard_count)]
+    throttle = Throttle(config.max_records_per_sec, config.max_write_mb_per_sec)
+    merge_stats = merge_shards(shard_paths, config.staging_path, log, progress, should_stop, throttle=throttle)
+    if config.optimize:
+        _raise_if_stopped(should_stop)
+        merge_stats.update(
+            optimize_db(
+                config.staging_path, log, progress, should_stop, page_size=config.page_size, throttle=throttle
+            )
+        )
+    throttle.finish()
+    _raise_if_stopped(should_stop)
+    install_database(config.staging_path, config.db_path, log)
+    merge_stats["db_path"] = str(config.db_path)
+    if config.columnar_format:
+        _raise_if_stopped(should_stop)
+        merge_stats.update(
+            export_columnar(
+                config.db_path,
+                config.columnar_dir,
+                log=log,
+                progress=progress,
+                should_stop=should_stop,
+                fmt=config.columnar_format,
+            )
+        )
+    elapsed = round(time.time() - started, 2)
+    log(f"Sharded pipeline finished in {elapsed}s")
+    return {
+        "status": "completed",
+        **merge_stats,
+        "elapsed_seconds": elapsed,
+        "xml_path": str(config.xml_path),
+    }
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_FORMAT = 1
+COPY_CHUNK_BYTES = 4 * 1024 * 1024
+STAGED_SUFFIX = "next"
+REQUIRED_TABLES = frozenset({"publications", "authors", "pub_authors"})
+
+LogCallback = Callable[[str], None]
+
+
+def _copy_with_digest(source: Path, target: Path) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with source.open("rb") as src, target.open("wb") as dst:
+        while True:
+            chunk = src.read(COPY_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    return digest.hexdigest(), size
+
+
+def _write_json_atomic(path: Path, payload: dict[str, Any]) -> None:
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _table_counts(db_path: Path) -> dict[str, int]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        # Fold the WAL into the main file so a plain file copy is self-contained.
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        return {
+            table: int(conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0])
+            for table in ("publications", "authors", "pub_authors")
+        }
+    finally:
+        conn.close()
+
+
+def source_date_of(path: Path) -> str | None:
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    return datetime.fromtimestamp(mtime, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def write_snapshot(
+    db_path: Path,
+    snapshot_root: Path,
+    source_path: Path | None,
+    log: LogCallback,
+    source_date: str | None = None,
+) -> Path:
+    """Copy a finished database into ``snapshot_root/<version>/`` with a manifest."""
+    counts = _table_counts(db_path)
+    created = datetime.now(tz=timezone.utc)
+    version = created.strftime("%Y%m%dT%H%M%SZ")
+    target_dir = snapshot_root / version
+    target_dir.mkdir(parents=True, exist_ok=False)
+
+    log(f"Writing snapshot {version} -> {target_dir}")
+    target_db = target_dir / db_path.name
+    checksum, size = _copy_with_digest(db_path, target_db)
+
+    source: dict[str, Any] = {"date": source_date}
+    if source_path is not None:
+        source["file"] = source_path.name
+        if source_path.exists():
+            source["size_bytes"] = source_path.stat().st_size
+        if source["date"] is None:
+            source["date"] = source_date_of(source_path)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "created_at": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "db_file": target_db.name,
+        "sha256": checksum,
+        "size_bytes": size,
+        "counts": counts,
+        "source": source,
+    }
+    _write_json_atomic(target_dir / MANIFEST_NAME, manifest)
+    log(f"Snapshot written: {target_db} ({size} bytes, sha256={checksum})")
+    return target_dir
+
+
+def read_manifest(snapshot_dir: Path) -> dict[str, Any]:
+    manifest_path = snapshot_dir / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"Cannot read snapshot manifest {manifest_path}: {exc}") from exc
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format in {manifest_path}: {manifest.get('format')}")
+    return manifest
+
+
+def resolve_snapshot_dir(path: Path) -> Path:
+    """Accept a snapshot directory or a root holding versioned snapshots (newest wins)."""
+    if (path / MANIFEST_NAME).is_file():
+        return path
+    candidates: list[Path] = []
+    if path.is_dir():
+        candidates = sorted(
+            child for child in path.iterdir() if (child / MANIFEST_NAME).is_file()
+        )
+    if not candidates:
+        raise FileNotFoundError(f"No snapshot manifest found under {path}")
+    return candidates[-1]
+
+
+def installed_manifest_path(db_path: Path) -> Path:
+    return db_path.with_name(f"{db_path.name}.{MANIFEST_NAME}")
+
+
+def staged_db_path(db_path: Path) -> Path:
+    """Side path a new database is built or optimized in before it replaces ``db_path``."""
+    return db_path.with_name(f"{db_path.name}.{STAGED_SUFFIX}")
+
+
+def _checkpoint_live_wal(db_path: Path, log: LogCallback) -> None:
+    # A live database left in WAL mode by an older in-place build may still
+    # have frames in its -wal file. Fold them back first: once the new file is
+    # in place, the next connection would otherwise read that WAL on top of it.
+    if not Path(f"{db_path}-wal").exists():
+        return
+    conn = sqlite3.connect(str(db_path))
+    try:
+        busy, frames, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE);").fetchone()
+    finally:
+        conn.close()
+    if busy:
+        raise RuntimeError(f"Cannot checkpoint {db_path}-wal ({frames} frames) before replacing {db_path}")
+    if frames > 0:
+        log(f"Checkpointed {frames} WAL frames of {db_path} before replacing it")
+
+
+def install_database(staged_path: Path, db_path: Path, log: LogCallback) -> None:
+    """Check a finished database at ``staged_path`` and atomically move it to ``db_path``.
+
+    The staged file is switched to rollback-journal mode first. Service
+    connections only read, so the live database then never has -wal/-shm
+    files; workers that still hold the previous file keep reading it until
+    they reconnect. A stale installed snapshot manifest is removed.
+    """
+    conn = sqlite3.connect(str(staged_path))
+    try:
+        result = conn.execute("PRAGMA quick_check;").fetchone()[0]
+        if result != "ok":
+            raise RuntimeError(f"Staged database {staged_path} failed quick_check: {result}")
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+        missing = REQUIRED_TABLES - tables
+        if missing:
+            raise RuntimeError(f"Staged database {staged_path} is missing tables: {', '.join(sorted(missing))}")
+        mode = conn.execute("PRAGMA journal_mode = DELETE;").fetchone()[0]
+        if mode != "delete":
+            raise RuntimeError(f"Cannot leave WAL mode on {staged_path} (journal_mode={mode})")
+    finally:
+        conn.close()
+    with staged_path.open("rb+") as fh:
+        os.fsync(fh.fileno())
+
+    _checkpoint_live_wal(db_path, log)
+    os.replace(staged_path, db_path)
+    installed_manifest_path(db_path).unlink(missing_ok=True)
+    log(f"Installed {staged_path} -> {db_path}")
+
+
+def read_installed_manifest(db_path: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(installed_manifest_path(db_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _install_lock(db_path: Path) -> Iterator[None]:
+    lock_path = db_path.with_name(f"{db_path.name}.lock")
+    with lock_path.open("a") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def install_snapshot(snapshot_path: Path, db_path: Path, log: LogCallback) -> dict[str, Any]:
+    """Verify a snapshot and atomically place its database at ``db_path``.
+
+    The installed manifest is kept next to the database; if it already matches
+    the snapshot checksum the copy is skipped. Installs are serialized on a
+    sibling ``.lock`` file and the manifest is checked again once the lock is
+    held, so several workers starting from the same snapshot only pay for it
+    once and never swap the file under each other.
+    """
+    snapshot_dir = resolve_snapshot_dir(snapshot_path)
+    manifest = read_manifest(snapshot_dir)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with _install_lock(db_path):
+        installed = read_installed_manifest(db_path)
+        if installed and installed.get("sha256") == manifest["sha256"] and db_path.exists():
+            log(f"Snapshot {manifest['version']} already installed at {db_path}")
+            return installed
+
+        source_db = snapshot_dir / manifest["db_file"]
+        tmp_path = db_path.with_name(f".{db_path.name}.{os.getpid()}.tmp")
+        log(f"Installing snapshot {manifest['version']} from {snapshot_dir} -> {db_path}")
+        try:
+            checksum, _ = _copy_with_digest(source_db, tmp_path)
+            if checksum != manifest["sha256"]:
+                raise ValueError(
+                    f"Snapshot checksum mismatch for {source_db}: "
+                    f"expected {manifest['sha256']}, got {checksum}"
+                )
+            install_database(tmp_path, db_path, log)
+        finally:
+            for suffix in ("", "-wal", "-shm", "-journal"):
+                Path(f"{tmp_path}{suffix}").unlink(missing_ok=True)
+
+        _write_json_atomic(installed_manifest_path(db_path), manifest)
+    return manifest
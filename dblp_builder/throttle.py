@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Callable
+
+LatencyProbe = Callable[[], "float | None"]
+ThrottleReport = Callable[[dict[str, Any]], None]
+LogCallback = Callable[[str], None]
+ShouldStopCallback = Callable[[], bool]
+
+WINDOW_SECONDS = 5.0
+LATENCY_CHECK_SECONDS = 2.0
+PAUSE_POLL_SECONDS = 1.0
+REPORT_INTERVAL_SECONDS = 2.0
+_PROC_IO = "/proc/self/io"
+
+
+def _raise_if_stopped(should_stop: ShouldStopCallback) -> None:
+    if should_stop():
+        raise InterruptedError("Pipeline stopped by user request.")
+
+
+def _process_write_bytes() -> int | None:
+    """Bytes this process has passed to ``write()`` so far (Linux only).
+
+    This includes SQLite's WAL and checkpoint writes, which the pipeline does
+    not see directly.
+    """
+    try:
+        with open(_PROC_IO, encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+class Throttle:
+    """Keeps a build under record/write rate caps and yields to query traffic.
+
+    The pipeline calls :meth:`pace` after each unit of work. Rates are held over
+    short windows so a slow stretch does not turn into a burst later. When
+    ``latency`` reports a query latency above ``pause_latency_ms`` the build
+    sleeps until it falls back below the threshold (or no worker reports one).
+    """
+
+    def __init__(
+        self,
+        max_records_per_sec: float = 0.0,
+        max_write_mb_per_sec: float = 0.0,
+        pause_latency_ms: float = 0.0,
+        latency: LatencyProbe | None = None,
+        report: ThrottleReport | None = None,
+        log: LogCallback | None = None,
+    ) -> None:
+        self.max_records_per_sec = max(0.0, float(max_records_per_sec))
+        self.max_write_bytes_per_sec = max(0.0, float(max_write_mb_per_sec)) * 1024 * 1024
+        self.pause_latency_ms = max(0.0, float(pause_latency_ms))
+        self._latency = latency if self.pause_latency_ms > 0 else None
+        self._report = report
+        self._log = log or (lambda msg: None)
+        self._pause_started: float | None = None
+        self._use_proc_io = _process_write_bytes() is not None
+        self._window_start = time.monotonic()
+        self._window_records = 0
+        self._window_bytes = 0
+        self._last_write_bytes = _process_write_bytes() or 0
+        self._last_latency_check = 0.0
+        self._last_report = 0.0
+        self._state: dict[str, Any] = {
+            "max_records_per_sec": self.max_records_per_sec or None,
+            "max_write_mb_per_sec": max_write_mb_per_sec or None,
+            "pause_latency_ms": self.pause_latency_ms or None,
+            "paused": False,
+            "pauses": 0,
+            "paused_seconds": 0.0,
+            "throttled_seconds": 0.0,
+            "query_latency_ms": None,
+        }
+
+    @property
+    def active(self) -> bool:
+        return bool(self.max_records_per_sec or self.max_write_bytes_per_sec or self._latency)
+
+    def state(self) -> dict[str, Any]:
+        state = dict(self._state)
+        paused_seconds = state["paused_seconds"]
+        if self._pause_started is not None:
+            paused_seconds += time.monotonic() - self._pause_started
+        state["paused_seconds"] = round(paused_seconds, 1)
+        state["throttled_seconds"] = round(state["throttled_seconds"], 1)
+        return state
+
+    def _publish(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if self._report is None or (not force and now - self._last_report < REPORT_INTERVAL_SECONDS):
+            return
+        self._last_report = now
+        try:
+            self._report(self.state())
+        except Exception:
+            pass
+
+    def _written_bytes(self, bytes_hint: int) -> int:
+        if not self._use_proc_io:
+            return bytes_hint
+        current = _process_write_bytes()
+        if current is None:
+            return bytes_hint
+        delta = max(0, current - self._last_write_bytes)
+        self._last_write_bytes = current
+        return delta
+
+    def pace(self, should_stop: ShouldStopCallback, records: int = 0, bytes_hint: int = 0) -> None:
+        """Account for finished work and sleep as needed.
+
+        ``bytes_hint`` is used for the write cap only where per-process I/O
+        counters are unavailable.
+        """
+        if not self.active:
+            return
+        self._window_records += records
+        self._window_bytes += self._written_bytes(bytes_hint)
+
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        required = 0.0
+        if self.max_records_per_sec:
+            required = max(required, self._window_records / self.max_records_per_sec)
+        if self.max_write_bytes_per_sec:
+            required = max(required, self._window_bytes / self.max_write_bytes_per_sec)
+        delay = required - elapsed
+        if delay > 0:
+            self._sleep(delay, should_stop)
+            self._state["throttled_seconds"] += delay
+        if time.monotonic() - self._window_start >= WINDOW_SECONDS:
+            self._window_start = time.monotonic()
+            self._window_records = 0
+            self._window_bytes = 0
+
+        if self._latency is not None and now - self._last_latency_check >= LATENCY_CHECK_SECONDS:
+            self._last_latency_check = now
+            self._wait_for_queries(should_stop)
+        self._publish()
+
+    def _sleep(self, seconds: float, should_stop: ShouldStopCallback) -> None:
+        deadline = time.monotonic() + seconds
+        while True:
+            _raise_if_stopped(should_stop)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, PAUSE_POLL_SECONDS))
+
+    def _probe(self) -> float | None:
+        try:
+            latency = self._latency() if self._latency is not None else None
+        except Exception:
+            latency = None
+        self._state["query_latency_ms"] = None if latency is None else round(latency, 1)
+        return latency
+
+    def _wait_for_queries(self, should_stop: ShouldStopCallback) -> None:
+        latency = self._probe()
+        if latency is None or latency <= self.pause_latency_ms:
+            return
+        started = self._pause_started = time.monotonic()
+        self._state["paused"] = True
+        self._state["pauses"] += 1
+        self._log(f"Build paused: query latency {latency:.0f} ms > {self.pause_latency_ms:.0f} ms")
+        self._publish(force=True)
+        try:
+            while latency is not None and latency > self.pause_latency_ms:
+                self._sleep(PAUSE_POLL_SECONDS, should_stop)
+                latency = self._probe()
+                self._publish()
+            self._log(f"Build resumed after {time.monotonic() - started:.0f}s")
+        finally:
+            self._pause_started = None
+            self._state["paused"] = False
+            self._state["paused_seconds"] += time.monotonic() - started
+            # Do not count the pause against the rate window.
+            self._window_start = time.monotonic()
+            self._window_records = 0
+            self._window_bytes = 0
+            self._last_write_bytes = _process_write_bytes() or self._last_write_bytes
+            self._publish(force=True)
+
+    def finish(self) -> None:
+        if self.active:
+            self._publish(force=True)
+
+
+def lower_priority(increment: int) -> int | None:
+    """Raise this process's nice value; on Linux this also lowers its default I/O priority."""
+    if increment <= 0 or not hasattr(os, "nice"):
+        return None
+    return os.nice(increment)
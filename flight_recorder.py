@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+MAX_STATEMENTS_PER_TRACE = 200
+MAX_SQL_CHARS = 2000
+
+ExplainCallback = Callable[[str, Any], list[str]]
+
+_current_trace: ContextVar["RequestTrace | None"] = ContextVar("dblp_request_trace", default=None)
+
+
+class RequestTrace:
+    """What one request did: its payload, author resolutions and SQL timings.
+
+    Only the first ``MAX_STATEMENTS_PER_TRACE`` statements are kept in full;
+    later ones still count towards the totals and the slowest statement.
+    """
+
+    def __init__(self, method: str, path: str, payload: dict[str, Any] | None = None) -> None:
+        self.method = method
+        self.path = path
+        self.payload = payload or {}
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+        self.started_at = datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.resolutions: list[dict[str, Any]] = []
+        self.statements: list[dict[str, Any]] = []
+        self.statement_count = 0
+        self.sql_ms = 0.0
+        self.slowest: dict[str, Any] | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        """Time from the start of the trace to :func:`end_trace` (or now, while active)."""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return (end - self.started) * 1000
+
+    def add_statement(self, sql: str, params: Any) -> dict[str, Any]:
+        entry = {
+            "sql": " ".join(sql.split())[:MAX_SQL_CHARS],
+            "params": len(params) if hasattr(params, "__len__") else 0,
+            "ms": 0.0,
+            "rows": 0,
+        }
+        self.statement_count += 1
+        if len(self.statements) < MAX_STATEMENTS_PER_TRACE:
+            self.statements.append(entry)
+        # Kept for EXPLAIN only; stripped before the entry is exposed.
+        entry["_sql"] = sql
+        entry["_params"] = params
+        return entry
+
+    def add_time(self, entry: dict[str, Any], seconds: float, rows: int = 0) -> None:
+        ms = seconds * 1000
+        entry["ms"] += ms
+        entry["rows"] += rows
+        self.sql_ms += ms
+        if self.slowest is None or entry["ms"] > self.slowest["ms"]:
+            self.slowest = entry
+
+
+def current_trace() -> RequestTrace | None:
+    return _current_trace.get()
+
+
+def start_trace(method: str, path: str, payload: dict[str, Any] | None = None) -> Any:
+    """Begin tracing the current context; returns a token for :func:`end_trace`."""
+    return _current_trace.set(RequestTrace(method, path, payload))
+
+
+def end_trace(token: Any) -> RequestTrace | None:
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if trace is not None:
+        trace.finished = time.perf_counter()
+    return trace
+
+
+def annotate(**payload: Any) -> None:
+    """Replace the recorded payload with the normalized form the handler used."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.payload = payload
+
+
+def note_resolution(name: str, tier: str, count: int, cached: bool = False) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.resolutions.append({"name": name, "tier": tier, "ids": count, "cached": cached})
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times execute and fetch calls while a trace is active.
+
+    SQLite does most of the work lazily while rows are stepped, so fetch time
+    is added to the statement that produced the rows.
+    """
+
+    _trace_entry: dict[str, Any] | None = None
+
+    def execute(self, sql: str, parameters: Any = (), /) -> "TracedCursor":
+        trace = _current_trace.get()
+        if trace is None:
+            self._trace_entry = None
+            return super().execute(sql, parameters)
+        entry = trace.add_statement(sql, parameters)
+        self._trace_entry = entry
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            trace.add_time(entry, time.perf_counter() - started)
+
+    def _timed_fetch(self, fetch: Callable[[], Any], many: bool) -> Any:
+        trace = _current_trace.get()
+        entry = self._trace_entry
+        if trace is None or entry is None:
+            return fetch()
+        started = time.perf_counter()
+        result = fetch()
+        rows = len(result) if many else int(result is not None)
+        trace.add_time(entry, time.perf_counter() - started, rows)
+        return result
+
+    def fetchone(self) -> Any:
+        return self._timed_fetch(super().fetchone, many=False)
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        if size is None:
+            return self._timed_fetch(super().fetchmany, many=True)
+        return self._timed_fetch(lambda: super(TracedCursor, self).fetchmany(size), many=True)
+
+    def fetchall(self) -> list[Any]:
+        return self._timed_fetch(super().fetchall, many=True)
+
+    def __next__(self) -> Any:
+        trace = _current_trace.get()
+        entry = self._trace_entry
+        if trace is None or entry is None:
+            return super().__next__()
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            trace.add_time(entry, time.perf_counter() - started)
+            raise
+        trace.add_time(entry, time.perf_counter() - started, 1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """``sqlite3.connect(..., factory=TracedConnection)`` hands out traced cursors."""
+
+    def cursor(self, factory: Any = TracedCursor) -> Any:
+        return super().cursor(factory)
+
+
+def _public_statement(statement: dict[str, Any]) -> dict[str, Any]:
+    public = {key: value for key, value in statement.items() if not key.startswith("_")}
+    public["ms"] = round(public["ms"], 2)
+    return public
+
+
+class FlightRecorder:
+    """Keeps the slowest requests that took at least ``threshold_ms``.
+
+    At most ``capacity`` entries are held in a min-heap by duration; once it
+    is full, a new entry replaces the fastest one, and requests faster than
+    all held entries are not recorded. The plan of each entry's slowest
+    statement is captured with ``explain`` when the entry is recorded, outside
+    the request's own trace; ``record`` therefore runs queries and belongs in
+    a worker thread, not on the event loop.
+    """
+
+    def __init__(self, threshold_ms: float, capacity: int, explain: ExplainCallback | None = None) -> None:
+        self.threshold_ms = threshold_ms
+        self.capacity = max(1, int(capacity))
+        self._explain = explain
+        # (duration_ms, sequence, entry); the sequence breaks ties and orders "recent".
+        self._entries: list[tuple[float, int, dict[str, Any]]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def wants(self, trace: RequestTrace) -> bool:
+        """Whether ``record`` would keep ``trace``; cheap enough for the event loop."""
+        duration_ms = trace.duration_ms
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return False
+        with self._lock:
+            return len(self._entries) < self.capacity or duration_ms > self._entries[0][0]
+
+    def record(self, trace: RequestTrace, status_code: int) -> None:
+        if not self.wants(trace):
+            return
+        duration_ms = trace.duration_ms
+
+        slowest = None
+        if trace.slowest is not None:
+            slowest = _public_statement(trace.slowest)
+            if self._explain is not None:
+                try:
+                    slowest["plan"] = self._explain(trace.slowest["_sql"], trace.slowest["_params"])
+                except Exception as exc:
+                    slowest["plan_error"] = str(exc)
+
+        entry = {
+            "method": trace.method,
+            "path": trace.path,
+            "status_code": status_code,
+            "started_at": trace.started_at,
+            "duration_ms": round(duration_ms, 2),
+            "payload": trace.payload,
+            "resolutions": trace.resolutions,
+            "sql_ms": round(trace.sql_ms, 2),
+            "statement_count": trace.statement_count,
+            "statements": [_public_statement(statement) for statement in trace.statements],
+            "slowest_statement": slowest,
+        }
+        item = (duration_ms, next(self._sequence), entry)
+        with self._lock:
+            if len(self._entries) < self.capacity:
+                heapq.heappush(self._entries, item)
+            else:
+                heapq.heappushpop(self._entries, item)
+
+    def snapshot(self, limit: int | None = None, order: str = "slowest") -> list[dict[str, Any]]:
+        with self._lock:
+            items = list(self._entries)
+        if order == "slowest":
+            items.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        else:
+            items.sort(key=lambda item: item[1], reverse=True)
+        entries = [entry for _, _, entry in items]
+        return entries if limit is None else entries[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,845 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator
+
+from dblp_builder.pipeline import author_name_key
+from flight_recorder import note_resolution
+
+logger = logging.getLogger("dblp_service")
+
+ConnectCallback = Callable[[], sqlite3.Connection]
+PrepareCallback = Callable[[sqlite3.Connection], None]
+DataVersionCallback = Callable[[], Any]
+
+
+class DataChangedError(RuntimeError):
+    """The database file no longer matches the data a backend has loaded."""
+
+
+class BackendLoadingError(RuntimeError):
+    """A backend has no data yet; it is being loaded in the background."""
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text or "").split()).strip()
+
+
+def fts_query_from_text(text: str, max_terms: int = 6) -> str:
+    cleaned = "".join((ch.lower() if ch.isalnum() else " ") for ch in text)
+    tokens = cleaned.split()
+    uniq: list[str] = []
+    seen = set()
+    for t in tokens:
+        if len(t) < 2:
+            continue
+        if t in seen:
+            continue
+        seen.add(t)
+        uniq.append(t)
+        if len(uniq) >= max_terms:
+            break
+    return " ".join(uniq)
+
+
+def _placeholders(items: list[int]) -> str:
+    return ",".join("?" for _ in items) if items else "NULL"
+
+
+def _resolve_limit(limit: int | None, max_resolve: int) -> int:
+    return max_resolve if limit is None else max(1, min(int(limit), max_resolve))
+
+
+def resolve_fuzzy_author_ids(conn: sqlite3.Connection, normalized: str, lim: int) -> tuple[list[int], str]:
+    """Resolve through FTS, then a LIKE scan; returns the IDs and the tier that matched."""
+    cur = conn.cursor()
+    fts = fts_query_from_text(normalized)
+    if fts:
+        try:
+            cur.execute(
+                "SELECT rowid AS id FROM author_fts WHERE author_fts MATCH ? LIMIT ?;",
+                (fts, lim),
+            )
+            ids = [int(r[0]) for r in cur.fetchall()]
+            if ids:
+                return ids, "fts"
+        except sqlite3.Error:
+            pass
+
+    cur.execute("SELECT id FROM authors WHERE name LIKE ? LIMIT ?;", (f"%{normalized}%", lim))
+    ids = [int(r[0]) for r in cur.fetchall()]
+    return ids, "like" if ids else "none"
+
+
+def has_name_key(conn: sqlite3.Connection) -> bool:
+    """True when ``authors.name_key`` exists (databases built before it lack the column)."""
+    return any(row[1] == "name_key" for row in conn.execute("PRAGMA table_info(authors);").fetchall())
+
+
+def _resolve_author_ids_with_tier(
+    conn: sqlite3.Connection,
+    normalized: str,
+    max_resolve: int,
+    limit: int | None,
+    exact_base_match: bool,
+    name_key: bool | None = None,
+) -> tuple[list[int], str]:
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM authors WHERE name = ? LIMIT 1;", (normalized,))
+    row = cur.fetchone()
+    if row:
+        return [int(row[0])], "exact"
+
+    lim = _resolve_limit(limit, max_resolve)
+    key = author_name_key(normalized)
+    if key and (has_name_key(conn) if name_key is None else name_key):
+        cur.execute("SELECT id FROM authors WHERE name_key = ? ORDER BY id LIMIT ?;", (key, lim))
+        ids = [int(r[0]) for r in cur.fetchall()]
+        if ids:
+            return ids, "folded"
+    if exact_base_match:
+        return [], "none"
+    return resolve_fuzzy_author_ids(conn, normalized, lim)
+
+
+def resolve_author_ids(
+    conn: sqlite3.Connection,
+    name_query: str,
+    max_resolve: int,
+    limit: int | None = None,
+    exact_base_match: bool = False,
+) -> list[int]:
+    normalized = _normalize(name_query)
+    if not normalized:
+        return []
+    ids, tier = _resolve_author_ids_with_tier(conn, normalized, max_resolve, limit, exact_base_match)
+    note_resolution(normalized, tier, len(ids))
+    return ids
+
+
+def _publication_sort_key(item: dict[str, Any]) -> tuple[Any, ...]:
+    year = item["year"]
+    return (year is None, -(year or 0), item["title"])
+
+
+class AuthorCache:
+    """LRU of resolved author IDs, cleared whenever the database changes.
+
+    ``data_version`` returns a value identifying the current database file;
+    :meth:`validate` is called once per session and drops every entry when
+    that value moves, so a rebuilt or newly installed database is never
+    answered from stale IDs.
+    """
+
+    def __init__(self, max_entries: int, data_version: DataVersionCallback | None = None) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._data_version = data_version
+        self._version: Any = None
+        self._entries: OrderedDict[tuple[Any, ...], tuple[tuple[int, ...], str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def validate(self, version: Any = None) -> None:
+        """Clear the cache if the data version moved.
+
+        Backends serving loaded data pass the version that data was loaded
+        from; otherwise the current ``data_version`` is used.
+        """
+        if version is None:
+            if self._data_version is None:
+                return
+            version = self._data_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def get(self, key: tuple[Any, ...]) -> tuple[list[int], str] | None:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            self._entries.move_to_end(key)
+            return list(cached[0]), cached[1]
+
+    def put(self, key: tuple[Any, ...], ids: list[int], tier: str) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = (tuple(ids), tier)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class QuerySession(ABC):
+    """Read operations served for one request."""
+
+    def __init__(self, cache: AuthorCache) -> None:
+        self.cache = cache
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """Return publication and author totals."""
+
+    def resolve_author_ids(
+        self,
+        name_query: str,
+        limit: int | None = None,
+        exact_base_match: bool = False,
+    ) -> list[int]:
+        """Resolve a free-form name to candidate author IDs (cached)."""
+        normalized = _normalize(name_query)
+        if not normalized:
+            return []
+        key = (normalized, limit, exact_base_match)
+        cached = self.cache.get(key)
+        if cached is not None:
+            ids, tier = cached
+            note_resolution(normalized, tier, len(ids), cached=True)
+            return ids
+        ids, tier = self._resolve_author_ids(normalized, limit, exact_base_match)
+        self.cache.put(key, ids, tier)
+        note_resolution(normalized, tier, len(ids))
+        return ids
+
+    @abstractmethod
+    def _resolve_author_ids(
+        self,
+        normalized: str,
+        limit: int | None,
+        exact_base_match: bool,
+    ) -> tuple[list[int], str]:
+        """Resolve an already normalized name, bypassing the cache.
+
+        Returns the IDs and the tier that produced them: ``exact``, ``fts``,
+        ``folded`` (accent/case-insensitive key), ``like`` or ``none``.
+        """
+
+    @abstractmethod
+    def coauthored_publications(
+        self,
+        left_author_ids: list[int],
+        right_author_ids: list[int],
+        year_min: int | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return distinct publications written by one left and one right author."""
+
+
+class QueryBackend(ABC):
+    name: str
+    author_cache: AuthorCache
+
+    @abstractmethod
+    def session(self) -> Any:
+        """Context manager yielding a :class:`QuerySession`."""
+
+    def load(self) -> None:
+        """Prepare the backend before serving; a no-op unless overridden."""
+
+
+class SQLiteSession(QuerySession):
+    def __init__(self, conn: sqlite3.Connection, max_resolve: int, cache: AuthorCache) -> None:
+        super().__init__(cache)
+        self.conn = conn
+        self.max_resolve = max_resolve
+        self._name_key: bool | None = None
+
+    def counts(self) -> dict[str, int]:
+        cur = self.conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM publications;")
+        pub_count = int(cur.fetchone()[0])
+        cur.execute("SELECT COUNT(*) FROM authors;")
+        author_count = int(cur.fetchone()[0])
+        return {"publications": pub_count, "authors": author_count}
+
+    def _resolve_author_ids(
+        self,
+        normalized: str,
+        limit: int | None,
+        exact_base_match: bool,
+    ) -> tuple[list[int], str]:
+        if self._name_key is None:
+            self._name_key = has_name_key(self.conn)
+        return _resolve_author_ids_with_tier(
+            self.conn,
+            normalized,
+            self.max_resolve,
+            limit,
+            exact_base_match,
+            name_key=self._name_key,
+        )
+
+    def coauthored_publications(
+        self,
+        left_author_ids: list[int],
+        right_author_ids: list[int],
+        year_min: int | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        limit_sql = "" if limit is None else "LIMIT ?"
+        year_filter_sql = "" if year_min is None else "AND p.year >= ?"
+        params: tuple[Any, ...] = (*left_author_ids, *right_author_ids)
+        if year_min is not None:
+            params = (*params, int(year_min))
+        if limit is not None:
+            params = (*params, int(limit))
+
+        order_sql = "ORDER BY (p.year IS NULL) ASC, p.year DESC, p.title ASC"
+        cur = self.conn.cursor()
+        cur.execute(
+            f"""
+            SELECT DISTINCT p.title, p.year, p.venue, p.pub_type
+            FROM pub_authors pa1
+            JOIN pub_authors pa2 ON pa1.pub_id = pa2.pub_id
+            JOIN publications p ON p.id = pa1.pub_id
+            WHERE pa1.author_id IN ({_placeholders(left_author_ids)})
+              AND pa2.author_id IN ({_placeholders(right_author_ids)})
+            {year_filter_sql}
+            {order_sql}
+            {limit_sql};
+            """,
+            params,
+        )
+        return [
+            {
+                "title": row[0],
+                "year": row[1],
+                "venue": row[2],
+                "pub_type": row[3],
+            }
+            for row in cur.fetchall()
+        ]
+
+
+class SQLiteBackend(QueryBackend):
+    """Default backend: every request runs SQL against the database file."""
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        connect: ConnectCallback,
+        prepare: PrepareCallback,
+        max_resolve: int,
+        author_cache: AuthorCache,
+        data_version: DataVersionCallback | None = None,
+    ) -> None:
+        # Each session opens the current file, so ``data_version`` only matters
+        # to the author cache.
+        self._connect = connect
+        self._prepare = prepare
+        self._max_resolve = max_resolve
+        self.author_cache = author_cache
+
+    @contextmanager
+    def session(self) -> Iterator[SQLiteSession]:
+        conn = self._connect()
+        try:
+            self._prepare(conn)
+            self.author_cache.validate()
+            yield SQLiteSession(conn, self._max_resolve, self.author_cache)
+        finally:
+            conn.close()
+
+
+class StringHeap:
+    """Immutable list of strings stored as one UTF-8 buffer plus end offsets."""
+
+    def __init__(self, values: Iterable[str | None] = ()) -> None:
+        self._buf = bytearray()
+        self._ends = array("q")
+        self._present = bytearray()
+        for value in values:
+            self.append(value)
+
+    def append(self, value: str | None) -> None:
+        if value is not None:
+            self._buf += value.encode("utf-8")
+        self._ends.append(len(self._buf))
+        self._present.append(value is not None)
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __getitem__(self, index: int) -> str | None:
+        if not self._present[index]:
+            return None
+        start = self._ends[index - 1] if index > 0 else 0
+        return self._buf[start : self._ends[index]].decode("utf-8")
+
+    def encoded(self, index: int) -> bytes:
+        """UTF-8 bytes of the value at ``index`` (empty for ``None``)."""
+        start = self._ends[index - 1] if index > 0 else 0
+        return bytes(self._buf[start : self._ends[index]])
+
+
+class _MemoryData:
+    """Slim columns loaded from SQLite; ``raw_xml`` stays on disk.
+
+    Publications and authors are addressed by their database IDs. Each
+    author's publication IDs are stored contiguously (CSR layout):
+    ``author_pubs[author_offsets[a]:author_offsets[a + 1]]``.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, version: Any = None) -> None:
+        self.version = version
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM publications;")
+        max_pub_id = int(cur.fetchone()[0])
+
+        venue_codes: dict[str | None, int] = {None: 0}
+        self.venues: list[str | None] = [None]
+        type_codes: dict[str | None, int] = {None: 0}
+        self.pub_types: list[str | None] = [None]
+        self.pub_present = bytearray(max_pub_id + 1)
+        self.years = array("h", bytes(2 * (max_pub_id + 1)))
+        self.venue_of = array("i", bytes(4 * (max_pub_id + 1)))
+        self.type_of = array("b", bytes(max_pub_id + 1))
+        self.titles = StringHeap([None])
+
+        cur.execute("SELECT id, title, year, venue, pub_type FROM publications ORDER BY id;")
+        for pub_id, title, year, venue, pub_type in cur:
+            self.pub_present[pub_id] = 1
+            while len(self.titles) < pub_id:
+                self.titles.append(None)
+            self.titles.append(title)
+            # 0 marks a missing year; DBLP years are always positive.
+            self.years[pub_id] = int(year) if year is not None and 0 < int(year) < 32768 else 0
+            code = venue_codes.get(venue)
+            if code is None:
+                code = venue_codes[venue] = len(self.venues)
+                self.venues.append(venue)
+            self.venue_of[pub_id] = code
+            code = type_codes.get(pub_type)
+            if code is None:
+                code = type_codes[pub_type] = len(self.pub_types)
+                self.pub_types.append(pub_type)
+            self.type_of[pub_id] = code
+        self.publication_count = int(sum(self.pub_present))
+
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM authors;")
+        max_author_id = int(cur.fetchone()[0])
+        self.author_ids: dict[str, int] = {}
+        # Folded key -> author IDs in ID order; computed here when the database
+        # predates the name_key column.
+        self.author_keys: dict[str, list[int]] = {}
+        key_sql = "name_key" if has_name_key(conn) else "NULL"
+        cur.execute(f"SELECT id, name, {key_sql} FROM authors ORDER BY id;")
+        for author_id, name, key in cur:
+            self.author_ids[name] = int(author_id)
+            key = key if key_sql == "name_key" else author_name_key(name)
+            if key:
+                self.author_keys.setdefault(key, []).append(int(author_id))
+        self.author_count = len(self.author_ids)
+
+        self.author_offsets = array("q", bytes(8 * (max_author_id + 2)))
+        self.author_pubs = array("i")
+        current = 0
+        cur.execute("SELECT author_id, pub_id FROM pub_authors ORDER BY author_id, pub_id;")
+        for author_id, pub_id in cur:
+            while current < author_id:
+                current += 1
+                self.author_offsets[current] = len(self.author_pubs)
+            self.author_pubs.append(pub_id)
+        while current <= max_author_id:
+            current += 1
+            self.author_offsets[current] = len(self.author_pubs)
+
+    def pubs_of(self, author_id: int) -> array:
+        if author_id < 0 or author_id + 1 >= len(self.author_offsets):
+            return array("i")
+        return self.author_pubs[self.author_offsets[author_id] : self.author_offsets[author_id + 1]]
+
+
+class MemorySession(QuerySession):
+    def __init__(self, data: _MemoryData, backend: "MemoryBackend") -> None:
+        super().__init__(backend.author_cache)
+        self.data = data
+        self.backend = backend
+
+    def counts(self) -> dict[str, int]:
+        return {"publications": self.data.publication_count, "authors": self.data.author_count}
+
+    def _resolve_author_ids(
+        self,
+        normalized: str,
+        limit: int | None,
+        exact_base_match: bool,
+    ) -> tuple[list[int], str]:
+        author_id = self.data.author_ids.get(normalized)
+        if author_id is not None:
+            return [author_id], "exact"
+        lim = _resolve_limit(limit, self.backend.max_resolve)
+        folded = self.data.author_keys.get(author_name_key(normalized) or "")
+        if folded:
+            return folded[:lim], "folded"
+        if exact_base_match:
+            return [], "none"
+        # Fuzzy tiers need the FTS index, which stays in the database file.
+        with self.backend.fallback_connection(self.data.version) as conn:
+            return resolve_fuzzy_author_ids(conn, normalized, lim)
+
+    def coauthored_publications(
+        self,
+        left_author_ids: list[int],
+        right_author_ids: list[int],
+        year_min: int | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        data = self.data
+        left_pubs: set[int] = set()
+        for author_id in left_author_ids:
+            left_pubs.update(data.pubs_of(author_id))
+        if not left_pubs:
+            return []
+        if len(right_author_ids) == 1:
+            matched = {pub for pub in data.pubs_of(right_author_ids[0]) if pub in left_pubs}
+        else:
+            matched = set()
+            for author_id in right_author_ids:
+                matched.update(pub for pub in data.pubs_of(author_id) if pub in left_pubs)
+
+        unique: dict[tuple[Any, ...], dict[str, Any]] = {}
+        for pub_id in matched:
+            year = data.years[pub_id] or None
+            if year_min is not None and (year is None or year < year_min):
+                continue
+            item = {
+                "title": data.titles[pub_id],
+                "year": year,
+                "venue": data.venues[data.venue_of[pub_id]],
+                "pub_type": data.pub_types[data.type_of[pub_id]],
+            }
+            unique.setdefault((item["title"], year, item["venue"], item["pub_type"]), item)
+        items = sorted(unique.values(), key=_publication_sort_key)
+        return items if limit is None else items[: int(limit)]
+
+
+class MemoryBackend(QueryBackend):
+    """Serves pairs, stats and exact author resolution from in-process arrays.
+
+    Data is loaded from the SQLite file and reloaded in the background when
+    ``data_version`` moves. Until the reload finishes, sessions keep answering
+    from the previous data, and fuzzy lookups that need the database file
+    raise :class:`DataChangedError` instead of mixing IDs from two builds.
+    Without warm-up, the first session starts the initial load in the
+    background and sessions raise :class:`BackendLoadingError` until it is done.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        connect: ConnectCallback,
+        prepare: PrepareCallback,
+        max_resolve: int,
+        author_cache: AuthorCache,
+        data_version: DataVersionCallback | None = None,
+    ) -> None:
+        self._connect = connect
+        self._prepare = prepare
+        self.max_resolve = max_resolve
+        self.author_cache = author_cache
+        self._data_version = data_version
+        self._lock = threading.Lock()
+        self._data: _MemoryData | None = None
+        # Last version a background reload was started for; a failed reload is
+        # not retried until the database changes again.
+        self._reload_version: Any = None
+        # Set while the initial background load runs; a failed one is retried
+        # by the next session.
+        self._loading = False
+        self._loading_lock = threading.Lock()
+
+    def load(self) -> None:
+        version = self._data_version() if self._data_version is not None else None
+        with self._lock:
+            if self._data is not None and version == self._data.version:
+                return
+            started = time.time()
+            conn = self._connect()
+            try:
+                self._prepare(conn)
+                self._data = _MemoryData(conn, version)
+            finally:
+                conn.close()
+            logger.info(
+                "Memory backend loaded %d publications and %d authors in %.1fs",
+                self._data.publication_count,
+                self._data.author_count,
+                time.time() - started,
+            )
+
+    def _reload(self) -> None:
+        try:
+            self.load()
+        except Exception as exc:
+            logger.warning("Memory backend reload failed: %s", exc)
+
+    def _initial_load(self) -> None:
+        try:
+            self.load()
+        except Exception as exc:
+            logger.warning("Memory backend load failed: %s", exc)
+        finally:
+            self._loading = False
+
+    @contextmanager
+    def fallback_connection(self, version: Any = None) -> Iterator[sqlite3.Connection]:
+        """Connection to the database file, which must still be at ``version``."""
+        conn = self._connect()
+        try:
+            # Checked after opening: the connection reads the file it opened
+            # even if a new build replaces it later.
+            if self._data_version is not None and self._data_version() != version:
+                raise DataChangedError("The database changed; the memory backend is reloading.")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def session(self) -> Iterator[MemorySession]:
+        data = self._data
+        if data is None:
+            # Loading takes seconds on a full dump; never do it inside a request.
+            with self._loading_lock:
+                if not self._loading:
+                    self._loading = True
+                    threading.Thread(target=self._initial_load, name="memory-backend-load", daemon=True).start()
+            raise BackendLoadingError("The memory backend is loading; retry shortly.")
+        if self._data_version is not None:
+            version = self._data_version()
+            if version != data.version and version != self._reload_version:
+                self._reload_version = version
+                threading.Thread(target=self._reload, name="memory-backend-reload", daemon=True).start()
+        self.author_cache.validate(data.version)
+        yield MemorySession(data, self)
+
+
+class _CompletionIndex:
+    """Authors sorted by folded name key, with precomputed rankings.
+
+    A key prefix covers a contiguous range of ``keys``, found by binary search
+    on the UTF-8 bytes (byte order equals code point order) and ranked by
+    publication count. Every prefix whose range holds more than
+    ``LARGE_RANGE`` names has its top ``max_limit`` entries stored at load
+    time. Smaller ranges merge the stored top entries of each ``BLOCK`` of
+    keys they span and scan the partial blocks at both ends.
+    """
+
+    BLOCK = 64
+    LARGE_RANGE = 1024
+
+    def __init__(self, conn: sqlite3.Connection, max_limit: int) -> None:
+        self.max_limit = max_limit
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM authors;")
+        max_author_id = int(cur.fetchone()[0])
+        pub_counts = array("i", bytes(4 * (max_author_id + 1)))
+        cur.execute("SELECT author_id, COUNT(*) FROM pub_authors GROUP BY author_id;")
+        for author_id, count in cur:
+            if 0 <= author_id <= max_author_id:
+                pub_counts[author_id] = count
+
+        if has_name_key(conn):
+            cur.execute("SELECT id, name, name_key FROM authors WHERE name_key != '' ORDER BY name_key, id;")
+            rows: Iterable[tuple[int, str, str]] = cur
+        else:
+            cur.execute("SELECT id, name FROM authors;")
+            keyed = ((author_id, name, author_name_key(name)) for author_id, name in cur)
+            rows = sorted((row for row in keyed if row[2]), key=lambda row: (row[2], row[0]))
+
+        self.keys = StringHeap()
+        self.names = StringHeap()
+        self.ids = array("i")
+        self.counts = array("i")
+        for author_id, name, key in rows:
+            self.keys.append(key)
+            self.names.append(name)
+            self.ids.append(author_id)
+            self.counts.append(pub_counts[author_id])
+
+        size = len(self.ids)
+        # Higher scores rank first: publication count, then key order.
+        self.scores = array("q", ((count << 32) | (0xFFFFFFFF - i) for i, count in enumerate(self.counts)))
+        self._block_width = min(max_limit, self.BLOCK)
+        self.block_top = array("i")
+        for start in range(0, size, self.BLOCK):
+            block = range(start, min(start + self.BLOCK, size))
+            top = heapq.nlargest(self._block_width, block, key=self.scores.__getitem__)
+            self.block_top.extend(top + [-1] * (self._block_width - len(top)))
+        self.large: dict[bytes, tuple[int, ...]] = {}
+        self._index_large_ranges()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _index_large_ranges(self) -> None:
+        pending = [(b"", 0, len(self.ids))]
+        while pending:
+            prefix, lo, hi = pending.pop()
+            length = len(prefix) + 1
+            index = lo
+            while index < hi:
+                child = self.keys.encoded(index)[:length]
+                if len(child) < length:
+                    # The key equals ``prefix``; it sorts before its extensions.
+                    index += 1
+                    continue
+                end = self._lower_bound(child + b"\xff", index, hi)
+                if end - index > self.LARGE_RANGE:
+                    self.large[child] = tuple(self._top(index, end, self.max_limit))
+                    pending.append((child, index, end))
+                index = end
+
+    def _lower_bound(self, key: bytes, lo: int, hi: int) -> int:
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.keys.encoded(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _top(self, lo: int, hi: int, limit: int) -> list[int]:
+        if hi - lo <= 2 * self.BLOCK:
+            return heapq.nlargest(limit, range(lo, hi), key=self.scores.__getitem__)
+        first = -(-lo // self.BLOCK)
+        last = hi // self.BLOCK
+        candidates = list(range(lo, first * self.BLOCK))
+        candidates.extend(range(last * self.BLOCK, hi))
+        width = self._block_width
+        # Blocks between ``first`` and ``last`` are full, so their lists hold no padding.
+        for start in range(first * width, last * width, width):
+            candidates.extend(self.block_top[start : start + min(limit, width)])
+        return heapq.nlargest(limit, candidates, key=self.scores.__getitem__)
+
+    def complete(self, prefix: bytes, limit: int) -> list[int]:
+        top = self.large.get(prefix)
+        if top is not None:
+            return list(top[:limit])
+        lo = self._lower_bound(prefix, 0, len(self.ids))
+        return self._top(lo, self._lower_bound(prefix + b"\xff", lo, len(self.ids)), limit)
+
+
+class AuthorCompleter:
+    """Author name autocomplete from an in-memory prefix index.
+
+    The index is loaded on first use (or during warm-up) and rebuilt in the
+    background when ``data_version`` moves; lookups keep using the previous
+    index until the new one is ready.
+    """
+
+    def __init__(
+        self,
+        connect: ConnectCallback,
+        prepare: PrepareCallback,
+        max_limit: int = 20,
+        data_version: DataVersionCallback | None = None,
+    ) -> None:
+        self._connect = connect
+        self._prepare = prepare
+        self.max_limit = max(1, int(max_limit))
+        self._data_version = data_version
+        self._lock = threading.Lock()
+        self._index: _CompletionIndex | None = None
+        self._version: Any = None
+        # Last version a background reload was started for; a failed reload is
+        # not retried until the database changes again.
+        self._reload_version: Any = None
+
+    @property
+    def version(self) -> Any:
+        """Data version the index being served was built from (``None`` before the first load)."""
+        return self._version if self._index is not None else None
+
+    def load(self) -> None:
+        version = self._data_version() if self._data_version is not None else None
+        with self._lock:
+            if self._index is not None and version == self._version:
+                return
+            started = time.time()
+            conn = self._connect()
+            try:
+                self._prepare(conn)
+                index = _CompletionIndex(conn, self.max_limit)
+            finally:
+                conn.close()
+            self._index, self._version = index, version
+            logger.info("Autocomplete index loaded %d author names in %.1fs", len(index), time.time() - started)
+
+    def _reload(self) -> None:
+        try:
+            self.load()
+        except Exception as exc:
+            logger.warning("Autocomplete index reload failed: %s", exc)
+
+    def _current(self) -> _CompletionIndex:
+        index = self._index
+        if index is None:
+            self.load()
+            assert self._index is not None
+            return self._index
+        if self._data_version is not None:
+            version = self._data_version()
+            if version != self._version and version != self._reload_version:
+                self._reload_version = version
+                threading.Thread(target=self._reload, name="autocomplete-reload", daemon=True).start()
+        return index
+
+    def complete(self, text: str, limit: int) -> list[dict[str, Any]]:
+        """Authors whose folded name starts with the folded ``text``, most publications first.
+
+        Trailing whitespace is kept as a word boundary, so ``"li "`` does not
+        match "Lichtenberg".
+        """
+        key = author_name_key(text)
+        if not key:
+            return []
+        if text[-1:].isspace():
+            key += " "
+        index = self._current()
+        limit = max(1, min(int(limit), self.max_limit))
+        return [
+            {"id": index.ids[i], "name": index.names[i], "publication_count": index.counts[i]}
+            for i in index.complete(key.encode("utf-8"), limit)
+        ]
+
+
+BACKENDS: dict[str, type[QueryBackend]] = {
+    SQLiteBackend.name: SQLiteBackend,
+    MemoryBackend.name: MemoryBackend,
+}
+
+
+def create_backend(
+    name: str,
+    connect: ConnectCallback,
+    prepare: PrepareCallback,
+    max_resolve: int,
+    author_cache_size: int = 0,
+    data_version: DataVersionCallback | None = None,
+) -> QueryBackend:
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError as exc:
+        raise ValueError(f"Unknown QUERY_BACKEND {name!r}; expected one of {sorted(BACKENDS)}") from exc
+    return backend_cls(
+        connect,
+        prepare,
+        max_resolve,
+        AuthorCache(author_cache_size, data_version),
+        data_version=data_version,
+    )
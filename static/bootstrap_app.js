@@ -25,6 +25,7 @@ const I18N = {
     bootstrap_batch: "Batch Size",
     bootstrap_progress_every: "Progress Every",
     bootstrap_rebuild: "Rebuild database (remove existing sqlite/wal/shm)",
+    bootstrap_resume: "Resume from the last checkpoint if one exists",
     bootstrap_start: "Start",
     bootstrap_stop: "Stop",
     bootstrap_reset: "Reset",
@@ -95,6 +96,7 @@ const I18N = {
     bootstrap_batch: "批处理大小",
     bootstrap_progress_every: "进度上报间隔",
     bootstrap_rebuild: "重建数据库（删除已有 sqlite/wal/shm）",
+    bootstrap_resume: "若存在断点则从上次断点继续",
     bootstrap_start: "开始",
     bootstrap_stop: "停止",
     bootstrap_reset: "重置",
@@ -327,6 +329,7 @@ if (startFormEl) {
       xml_gz_url: document.getElementById("xml-gz-url")?.value?.trim(),
       dtd_url: document.getElementById("dtd-url")?.value?.trim(),
       rebuild: Boolean(document.getElementById("rebuild")?.checked),
+      resume: Boolean(document.getElementById("resume")?.checked),
       batch_size: Number(document.getElementById("batch-size")?.value || 1000),
       progress_every: Number(document.getElementById("progress-every")?.value || 10000),
     };
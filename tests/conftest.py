@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+SAMPLE_DTD = """<!ELEMENT dblp (article|inproceedings|proceedings|book|incollection|phdthesis|mastersthesis|www)*>
+<!ENTITY uuml "&#252;">
+"""
+
+# A small dump: Ada Lovelace has publications in several years (and one
+# without a year) for paging, two venues recur across years for the
+# aggregates, and one title carries markup characters.
+SAMPLE_RECORDS = [
+    '<article key="a/1"><author>Ada Lovelace</author><author>Charles Babbage</author>'
+    "<title>Notes on the analytical engine.</title><year>1999</year><journal>Taylor</journal></article>",
+    '<article key="a/2"><author>Ada Lovelace</author><author>Grace Hopper</author>'
+    "<title>Engines &amp; &lt;loops&gt; revisited.</title><year>2001</year><journal>Taylor</journal></article>",
+    '<inproceedings key="b/3"><author>Ada Lovelace</author><author>Charles Babbage</author>'
+    "<author>Grace Hopper</author><title>Difference engine compilers.</title><year>2003</year>"
+    "<booktitle>ACM</booktitle></inproceedings>",
+    '<inproceedings key="b/4"><author>Ada Lovelace</author><author>J&uuml;rgen Schmidhuber</author>'
+    "<title>Recurrent engines.</title><year>2003</year><booktitle>ACM</booktitle></inproceedings>",
+    '<article key="a/5"><author>Ada Lovelace</author><title>Undated engine notes.</title>'
+    "<journal>Taylor</journal></article>",
+    '<inproceedings key="b/6"><author>Grace Hopper</author><title>Compilers.</title>'
+    "<year>2003</year><booktitle>ACM</booktitle></inproceedings>",
+    '<www key="homepages/x"><author>Nobody Here</author></www>',
+]
+
+
+def write_sample_dump(data_dir: Path, records: list[str] = SAMPLE_RECORDS) -> Path:
+    """Write ``dblp.dtd`` and ``dblp.xml`` with ``records`` into ``data_dir``; returns the XML path."""
+    (data_dir / "dblp.dtd").write_text(SAMPLE_DTD, encoding="utf-8")
+    xml = '<?xml version="1.0" encoding="ISO-8859-1"?>\n<!DOCTYPE dblp SYSTEM "dblp.dtd">\n<dblp>\n'
+    xml += "".join(record + "\n" for record in records) + "</dblp>\n"
+    xml_path = data_dir / "dblp.xml"
+    xml_path.write_text(xml, encoding="latin-1")
+    return xml_path
+
+
+def build_sample_db(data_dir: Path, db_name: str = "dblp.sqlite", batch_size: int = 100) -> Path:
+    from dblp_builder.pipeline import _build_db
+
+    xml_path = write_sample_dump(data_dir)
+    db_path = data_dir / db_name
+    _build_db(xml_path, db_path, batch_size, 1000, lambda msg: None, lambda phase, payload: None, lambda: False)
+    return db_path
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory: pytest.TempPathFactory):
+    """``app`` serving the sample database, without warm-up or scheduling."""
+    pytest.importorskip("lxml")
+    data_dir = tmp_path_factory.mktemp("data")
+    build_sample_db(data_dir)
+    overrides = {
+        "DATA_DIR": str(data_dir),
+        "DB_PATH": str(data_dir / "dblp.sqlite"),
+        "WARMUP_ENABLED": "0",
+        "SCHEDULE_INTERVAL_HOURS": "0",
+        "CAPTURE_SAMPLE_RATE": "0",
+        "SNAPSHOT_PATH": "",
+    }
+    backup = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield importlib.import_module("app")
+    finally:
+        for key, value in backup.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@pytest.fixture(scope="session")
+def client(app_module):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app_module.app)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from dblp_builder.__main__ import main as builder_main
+
+
+def _get(client, path: str, **params):
+    response = client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _venues(body) -> list[tuple[str, int]]:
+    return [(item["venue"], item["count"]) for item in body["items"]]
+
+
+def test_top_venues_and_filters(client) -> None:
+    assert _venues(_get(client, "/api/analytics/venues")) == [("ACM", 3), ("Taylor", 3)]
+    assert _venues(_get(client, "/api/analytics/venues", year_min=2000)) == [("ACM", 3), ("Taylor", 1)]
+    assert _venues(_get(client, "/api/analytics/venues", year_max=2001)) == [("Taylor", 2)]
+    assert _venues(_get(client, "/api/analytics/venues", pub_type="article")) == [("Taylor", 3)]
+    assert _venues(_get(client, "/api/analytics/venues", q="TAY")) == [("Taylor", 3)]
+    assert _venues(_get(client, "/api/analytics/venues", limit=1)) == [("ACM", 3)]
+    assert client.get("/api/analytics/venues", params={"q": "--"}).status_code == 400
+
+
+def test_venue_years(client) -> None:
+    body = _get(client, "/api/analytics/venue-years", venue="taylor")
+    assert body["venue"] == {"venue_key": "taylor", "venue": "Taylor", "count": 3}
+    assert body["years"] == [
+        {"year": None, "count": 1},
+        {"year": 1999, "count": 1},
+        {"year": 2001, "count": 1},
+    ]
+    assert body["pub_types"] == [{"pub_type": "article", "count": 3}]
+
+    body = _get(client, "/api/analytics/venue-years", venue="ACM", year_min=2004)
+    assert body["venue"]["count"] == 3
+    assert body["years"] == []
+    assert client.get("/api/analytics/venue-years", params={"venue": "Nature"}).status_code == 404
+
+
+def test_author_venues(client) -> None:
+    body = _get(client, "/api/analytics/author-venues", name="Ada Lovelace")
+    assert _venues({"items": body["venues"]}) == [("Taylor", 3), ("ACM", 2)]
+    assert body["years"] == [
+        {"year": None, "count": 1},
+        {"year": 1999, "count": 1},
+        {"year": 2001, "count": 1},
+        {"year": 2003, "count": 2},
+    ]
+    body = _get(client, "/api/analytics/author-venues", author_id=body["author"]["id"], year_min=2002)
+    assert _venues({"items": body["venues"]}) == [("ACM", 2)]
+    assert client.get("/api/analytics/author-venues").status_code == 400
+
+
+def test_aggregate_command_rebuilds_missing_tables(
+    app_module, client, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    db_path = tmp_path / "dblp.sqlite"
+    shutil.copyfile(app_module.DB_PATH, db_path)
+    conn = sqlite3.connect(str(db_path))
+    try:
+        # An older build: no aggregate tables, and a venue spelled differently.
+        for table in ("venues", "venue_year_counts", "author_venue_year_counts"):
+            conn.execute(f"DROP TABLE {table};")
+        cur = conn.execute(
+            "INSERT INTO publications(title, year, venue, pub_type, raw_xml) "
+            "VALUES ('Late notes.', 2005, 'TAYLOR', 'article', '<article/>');"
+        )
+        ada = conn.execute("SELECT id FROM authors WHERE name = 'Ada Lovelace';").fetchone()[0]
+        conn.execute("INSERT INTO pub_authors(pub_id, author_id) VALUES (?, ?);", (cur.lastrowid, ada))
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setattr(app_module, "DB_PATH", db_path)
+
+    assert client.get("/api/analytics/venues").status_code == 503
+
+    assert builder_main(["aggregate", "--data-dir", str(tmp_path), "--db-name", db_path.name]) == 0
+    # Spellings are grouped by venue key and shown as the most frequent one.
+    assert _venues(_get(client, "/api/analytics/venues")) == [("Taylor", 4), ("ACM", 3)]
+    body = _get(client, "/api/analytics/author-venues", name="Ada Lovelace")
+    assert _venues({"items": body["venues"]}) == [("Taylor", 4), ("ACM", 2)]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from dblp_builder.pipeline import author_name_key
+from query_backend import AuthorCompleter, _CompletionIndex
+
+
+class _SmallIndex(_CompletionIndex):
+    # Small enough that a few hundred names exercise the stored top lists of
+    # large ranges, the per-block merge and the partial-block scans.
+    BLOCK = 4
+    LARGE_RANGE = 16
+
+
+def _make_db(path: Path, with_name_key: bool = True, seed: int = 7, size: int = 400) -> None:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.execute("CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT UNIQUE, name_key TEXT);")
+        conn.execute("CREATE TABLE pub_authors (pub_id INTEGER, author_id INTEGER);")
+        names = set()
+        while len(names) < size:
+            first = "".join(rng.choice("aab") for _ in range(rng.randint(1, 4)))
+            last = "".join(rng.choice("abé") for _ in range(rng.randint(1, 3)))
+            names.add(f"{first.title()} {last.title()}")
+        pub_id = 0
+        for author_id, name in enumerate(sorted(names), start=1):
+            conn.execute(
+                "INSERT INTO authors(id, name, name_key) VALUES (?, ?, ?);",
+                (author_id, name, author_name_key(name) or ""),
+            )
+            for _ in range(rng.choice([0, 0, 1, 2, 3, 5, 8])):
+                pub_id += 1
+                conn.execute("INSERT INTO pub_authors(pub_id, author_id) VALUES (?, ?);", (pub_id, author_id))
+        if not with_name_key:
+            conn.execute("ALTER TABLE authors DROP COLUMN name_key;")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _brute_force(index: _CompletionIndex, prefix: bytes, limit: int) -> list[int]:
+    matches = [i for i in range(len(index)) if index.keys.encoded(i).startswith(prefix)]
+    # Most publications first, then key order (the index is sorted by key).
+    matches.sort(key=lambda i: (-index.counts[i], i))
+    return matches[:limit]
+
+
+@pytest.fixture(params=[True, False], ids=["name_key", "no_name_key"])
+def index(request: pytest.FixtureRequest, tmp_path: Path) -> _CompletionIndex:
+    db_path = tmp_path / "authors.sqlite"
+    _make_db(db_path, with_name_key=request.param)
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return _SmallIndex(conn, max_limit=6)
+    finally:
+        conn.close()
+
+
+def test_index_is_sorted_by_key(index: _CompletionIndex) -> None:
+    keys = [index.keys.encoded(i) for i in range(len(index))]
+    assert len(keys) == 400
+    assert keys == sorted(keys)
+    assert index.large, "fixture should produce prefixes above LARGE_RANGE"
+
+
+@pytest.mark.parametrize("limit", [1, 3, 6])
+def test_complete_matches_brute_force(index: _CompletionIndex, limit: int) -> None:
+    prefixes = {b"", b"x", b"a a", "é".encode("utf-8")}
+    for i in range(len(index)):
+        key = index.keys.encoded(i)
+        prefixes.update(key[:length] for length in range(1, len(key) + 1))
+    for prefix in sorted(prefixes):
+        if prefix.decode("utf-8", "ignore").encode("utf-8") != prefix:
+            continue  # half of a multi-byte character; callers always pass whole text
+        assert index.complete(prefix, limit) == _brute_force(index, prefix, limit), prefix
+
+
+def test_completer_folds_text_and_keeps_word_boundaries(tmp_path: Path) -> None:
+    db_path = tmp_path / "authors.sqlite"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT, name_key TEXT);")
+    conn.execute("CREATE TABLE pub_authors (pub_id INTEGER, author_id INTEGER);")
+    for author_id, name, pubs in [(1, "Li Deng", 3), (2, "Lichtenberg", 9), (3, "Lí Wei", 1)]:
+        conn.execute("INSERT INTO authors VALUES (?, ?, ?);", (author_id, name, author_name_key(name)))
+        rows = [(author_id * 100 + n, author_id) for n in range(pubs)]
+        conn.executemany("INSERT INTO pub_authors VALUES (?, ?);", rows)
+    conn.commit()
+    conn.close()
+
+    completer = AuthorCompleter(
+        lambda: sqlite3.connect(str(db_path)), lambda conn: None, max_limit=5, data_version=lambda: 1
+    )
+    assert completer.version is None
+    assert [item["id"] for item in completer.complete("LI", 10)] == [2, 1, 3]
+    assert [item["id"] for item in completer.complete("li ", 10)] == [1, 3]
+    assert completer.complete("li d", 10) == [{"id": 1, "name": "Li Deng", "publication_count": 3}]
+    assert completer.complete("  ", 10) == []
+    assert completer.version == 1
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+from conftest import build_sample_db
+
+from dblp_builder.columnar import ColumnarSnapshot, export_columnar
+
+pytest.importorskip("lxml")
+
+
+def _noop(*args: object) -> None:
+    return None
+
+
+@pytest.fixture(scope="module")
+def sample_db(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return build_sample_db(tmp_path_factory.mktemp("columnar"))
+
+
+def _rows(db_path: Path, sql: str) -> list[tuple]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_npy_export_round_trips_through_the_reader(sample_db: Path, tmp_path: Path) -> None:
+    output_dir = tmp_path / "columnar"
+    export_columnar(sample_db, output_dir, _noop, _noop, lambda: False, fmt="npy")
+    snapshot = ColumnarSnapshot(output_dir)
+
+    publications = _rows(sample_db, "SELECT id, title, year, venue, pub_type FROM publications ORDER BY id;")
+    authors = _rows(sample_db, "SELECT id, name FROM authors ORDER BY id;")
+    pub_authors = _rows(sample_db, "SELECT pub_id, author_id FROM pub_authors ORDER BY rowid;")
+    assert snapshot.counts == {
+        "publications": len(publications),
+        "authors": len(authors),
+        "pub_authors": len(pub_authors),
+    }
+
+    def column(table: str, name: str) -> list:
+        values = snapshot.column(table, name)
+        return [values[i] for i in range(len(values))]
+
+    assert [int(v) for v in column("publications", "id")] == [row[0] for row in publications]
+    assert column("publications", "title") == [row[1] for row in publications]
+    # Years use 0 for NULL.
+    assert [int(v) for v in column("publications", "year")] == [row[2] or 0 for row in publications]
+    assert column("publications", "venue") == [row[3] for row in publications]
+    assert column("publications", "pub_type") == [row[4] for row in publications]
+    assert [int(v) for v in column("authors", "id")] == [row[0] for row in authors]
+    # Non-ASCII names survive the UTF-8 heap.
+    assert column("authors", "name") == [row[1] for row in authors]
+    assert "Jürgen Schmidhuber" in column("authors", "name")
+    assert [(int(p), int(a)) for p, a in zip(column("pub_authors", "pub_id"), column("pub_authors", "author_id"))] == [
+        tuple(row) for row in pub_authors
+    ]
+
+
+def test_stopped_export_leaves_no_files(sample_db: Path, tmp_path: Path) -> None:
+    output_dir = tmp_path / "columnar"
+    with pytest.raises(InterruptedError):
+        export_columnar(sample_db, output_dir, _noop, _noop, lambda: True, fmt="npy")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unknown_format_is_rejected(sample_db: Path, tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        export_columnar(sample_db, tmp_path / "columnar", _noop, _noop, lambda: False, fmt="csv")
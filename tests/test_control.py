@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from dblp_builder.control import PipelineStore
+
+
+def test_snapshot_does_not_wait_for_a_writer(tmp_path: Path) -> None:
+    store = PipelineStore(tmp_path / "state.sqlite")
+    store.log("hello")
+
+    writer = sqlite3.connect(str(store.path), isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE;")
+    try:
+        result: list[dict] = []
+        reader = threading.Thread(target=lambda: result.append(store.snapshot()))
+        reader.start()
+        reader.join(timeout=5.0)
+        assert not reader.is_alive(), "snapshot() blocked on the write lock"
+    finally:
+        writer.execute("ROLLBACK;")
+        writer.close()
+    assert result[0]["status"] == "idle"
+    assert result[0]["logs"][-1].endswith("hello")
+
+
+def test_snapshot_reaps_a_run_with_a_stale_heartbeat(tmp_path: Path) -> None:
+    store = PipelineStore(tmp_path / "state.sqlite", heartbeat_timeout=10.0)
+    conn = sqlite3.connect(str(store.path), isolation_level=None)
+    try:
+        conn.execute("UPDATE pipeline_state SET status = 'running', heartbeat = ? WHERE id = 1;", (time.time(),))
+        assert store.snapshot()["status"] == "running"
+        conn.execute("UPDATE pipeline_state SET heartbeat = ? WHERE id = 1;", (time.time() - 60.0,))
+    finally:
+        conn.close()
+
+    state = store.snapshot()
+    assert state["status"] == "error"
+    assert state["finished_at"] is not None
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from traffic import TrafficCapture
+
+PAIRS = {"left": ["Ada Lovelace"], "right": ["Grace Hopper"], "limit_per_pair": 5}
+
+
+def test_get_revalidates_with_304(client) -> None:
+    first = client.get("/api/stats")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    cached = client.get("/api/stats", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    # Weak comparison, and any tag in the list matches.
+    assert client.get("/api/stats", headers={"If-None-Match": f'"other", {etag[2:]}'}).status_code == 304
+    assert client.get("/api/stats", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert client.get("/api/stats", params={"x": 1}).headers["ETag"] != etag
+
+
+def test_pairs_post_is_tagged_by_payload(client) -> None:
+    first = client.post("/api/coauthors/pairs", json=PAIRS)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    # Key order does not matter, the values do.
+    reordered = json.dumps(dict(reversed(list(PAIRS.items()))))
+    response = client.post(
+        "/api/coauthors/pairs",
+        content=reordered,
+        headers={"Content-Type": "application/json", "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    other = client.post("/api/coauthors/pairs", json={**PAIRS, "limit_per_pair": 6})
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+    # Invalid bodies are not tagged and still reach validation.
+    invalid = client.post("/api/coauthors/pairs", content=b"{", headers={"Content-Type": "application/json"})
+    assert invalid.status_code == 422
+    assert "ETag" not in invalid.headers
+
+
+def test_capture_and_etag_share_the_parsed_body(
+    app_module, client, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    capture_path = tmp_path / "capture.jsonl"
+    monkeypatch.setattr(app_module, "traffic_capture", TrafficCapture(capture_path, 1.0))
+
+    first = client.post("/api/coauthors/pairs", json=PAIRS)
+    assert first.status_code == 200
+    cached = client.post("/api/coauthors/pairs", json=PAIRS, headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+
+    # The ETag check runs first and answers the 304 itself; capture sees the
+    # body it parsed.
+    records = [json.loads(line) for line in capture_path.read_text(encoding="utf-8").splitlines()]
+    assert [(record["status"], record["body"]) for record in records] == [(200, PAIRS)]
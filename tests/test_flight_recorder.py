@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from flight_recorder import FlightRecorder, RequestTrace
+
+
+def _trace(path: str, duration_ms: float) -> RequestTrace:
+    trace = RequestTrace("GET", path)
+    trace.finished = trace.started + duration_ms / 1000
+    entry = trace.add_statement("SELECT 1 WHERE ? = ?;", (1, 1))
+    trace.add_time(entry, duration_ms / 2000, rows=1)
+    return trace
+
+
+def test_keeps_the_slowest_requests() -> None:
+    explained: list[str] = []
+
+    def explain(sql: str, params: object) -> list[str]:
+        explained.append(sql)
+        return ["SCAN CONSTANT ROW"]
+
+    recorder = FlightRecorder(threshold_ms=2, capacity=2, explain=explain)
+    for path, duration in [("/a", 5), ("/fast", 1), ("/b", 3), ("/c", 10), ("/d", 2)]:
+        recorder.record(_trace(path, duration), 200)
+
+    assert [entry["path"] for entry in recorder.snapshot()] == ["/c", "/a"]
+    assert [entry["path"] for entry in recorder.snapshot(order="recent")] == ["/c", "/a"]
+    assert [entry["path"] for entry in recorder.snapshot(limit=1)] == ["/c"]
+    # "/fast" is under the threshold and "/d" is faster than everything held,
+    # so neither pays for an EXPLAIN.
+    assert len(explained) == 3
+
+    entry = recorder.snapshot()[0]
+    assert entry["duration_ms"] == 10
+    assert entry["statements"] == [{"sql": "SELECT 1 WHERE ? = ?;", "params": 2, "ms": 5.0, "rows": 1}]
+    assert entry["slowest_statement"]["plan"] == ["SCAN CONSTANT ROW"]
+
+    recorder.clear()
+    assert recorder.snapshot() == []
+
+
+def test_slow_request_is_recorded_with_its_statements(
+    app_module, client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    recorder = FlightRecorder(threshold_ms=0.001, capacity=5, explain=app_module._explain_query_plan)
+    monkeypatch.setattr(app_module, "flight_recorder", recorder)
+
+    assert client.get("/api/publications/search", params={"q": "compilers"}).status_code == 200
+    body = client.get("/api/admin/slow-requests").json()
+
+    assert body["count"] == 1
+    entry = body["entries"][0]
+    assert (entry["method"], entry["path"], entry["status_code"]) == ("GET", "/api/publications/search", 200)
+    assert entry["payload"]["q"] == "compilers"
+    assert entry["statement_count"] == len(entry["statements"]) > 0
+    assert any("title_fts" in statement["sql"] for statement in entry["statements"])
+    assert all(not key.startswith("_") for statement in entry["statements"] for key in statement)
+    slowest = entry["slowest_statement"]
+    assert slowest["plan"], slowest
+    assert "plan_error" not in slowest
+
+    assert client.post("/api/admin/slow-requests/reset").json() == {"status": "ok"}
+    assert client.get("/api/admin/slow-requests").json()["count"] == 0
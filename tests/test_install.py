@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from dblp_builder.snapshot import install_database, installed_manifest_path, staged_db_path
+
+
+def _make_db(path: Path, title: str, tables: tuple[str, ...] = ("publications", "authors", "pub_authors")) -> None:
+    conn = sqlite3.connect(str(path))
+    try:
+        conn.execute("PRAGMA journal_mode = WAL;")
+        for table in tables:
+            conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, title TEXT);")
+        if "publications" in tables:
+            conn.execute("INSERT INTO publications(title) VALUES (?);", (title,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _title(conn: sqlite3.Connection) -> str:
+    return conn.execute("SELECT title FROM publications;").fetchone()[0]
+
+
+def test_staged_db_path_is_a_sibling(tmp_path: Path) -> None:
+    assert staged_db_path(tmp_path / "dblp.sqlite") == tmp_path / "dblp.sqlite.next"
+
+
+def test_install_replaces_the_live_database(tmp_path: Path) -> None:
+    live = tmp_path / "dblp.sqlite"
+    staged = staged_db_path(live)
+    _make_db(live, "old")
+    _make_db(staged, "new")
+    installed_manifest_path(live).write_text("{}", encoding="utf-8")
+
+    reader = sqlite3.connect(str(live))
+    try:
+        assert _title(reader) == "old"
+        install_database(staged, live, lambda msg: None)
+        # A connection opened before the swap keeps reading the previous file.
+        assert _title(reader) == "old"
+    finally:
+        reader.close()
+
+    assert not staged.exists()
+    assert not installed_manifest_path(live).exists()
+    conn = sqlite3.connect(str(live))
+    try:
+        assert _title(conn) == "new"
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "delete"
+    finally:
+        conn.close()
+
+
+def test_install_refuses_an_incomplete_database(tmp_path: Path) -> None:
+    live = tmp_path / "dblp.sqlite"
+    staged = staged_db_path(live)
+    _make_db(live, "old")
+    _make_db(staged, "new", tables=("publications",))
+
+    with pytest.raises(RuntimeError, match="missing tables"):
+        install_database(staged, live, lambda msg: None)
+
+    conn = sqlite3.connect(str(live))
+    try:
+        assert _title(conn) == "old"
+    finally:
+        conn.close()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from query_backend import AuthorCache, BackendLoadingError, MemoryBackend
+
+
+@pytest.fixture()
+def memory_backend(app_module, monkeypatch: pytest.MonkeyPatch) -> MemoryBackend:
+    backend = MemoryBackend(
+        app_module._get_connection,
+        app_module._ensure_fullmeta_schema,
+        app_module.MAX_AUTHOR_RESOLVE,
+        AuthorCache(16, app_module._db_version),
+        data_version=app_module._db_version,
+    )
+    monkeypatch.setattr(app_module, "query_backend", backend)
+    return backend
+
+
+def _wait_until_loaded(backend: MemoryBackend) -> None:
+    deadline = time.time() + 10.0
+    while backend._data is None:
+        assert time.time() < deadline, "memory backend did not finish loading"
+        time.sleep(0.01)
+
+
+def test_first_session_loads_in_the_background(memory_backend: MemoryBackend) -> None:
+    with pytest.raises(BackendLoadingError):
+        with memory_backend.session():
+            pass
+    _wait_until_loaded(memory_backend)
+    with memory_backend.session() as session:
+        assert session.counts() == {"publications": 6, "authors": 4}
+
+
+def test_queries_answer_503_until_the_backend_is_loaded(client, memory_backend: MemoryBackend) -> None:
+    response = client.get("/api/stats")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+    _wait_until_loaded(memory_backend)
+    response = client.get("/api/stats")
+    assert response.status_code == 200
+    assert response.json()["publications"] == 6
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+
+from dblp_builder.pipeline import author_name_key
+
+
+@pytest.mark.parametrize(
+    ("name", "key"),
+    [
+        ("Jürgen Schmidhuber", "jurgen schmidhuber"),
+        ("jurgen schmidhuber", "jurgen schmidhuber"),
+        ("JÜRGEN SCHMIDHUBER", "jurgen schmidhuber"),
+        ("Ju\u0308rgen Schmidhuber", "jurgen schmidhuber"),
+        ("Sébastien Bubeck", "sebastien bubeck"),
+        ("Andrew Y. Ng", "andrew y ng"),
+        ("Jean-Paul  Sartre", "jean paul sartre"),
+        ("Wei Wang 0001", "wei wang 0001"),
+        ("Straße", "strasse"),
+        ("  Ada   Lovelace ", "ada lovelace"),
+        ("李德", "李德"),
+    ],
+)
+def test_author_name_key_folds_accents_case_and_punctuation(name: str, key: str) -> None:
+    assert author_name_key(name) == key
+
+
+@pytest.mark.parametrize("name", [None, "", "   ", ".-'"])
+def test_author_name_key_is_none_without_letters_or_digits(name: str | None) -> None:
+    assert author_name_key(name) is None
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import shutil
+import sqlite3
+from collections import namedtuple
+from pathlib import Path
+
+import pytest
+from conftest import build_sample_db
+
+from dblp_builder import optimize
+from dblp_builder.optimize import optimize_db, optimize_live_db
+
+pytest.importorskip("lxml")
+
+
+def _noop(*args: object) -> None:
+    return None
+
+
+@pytest.fixture(scope="module")
+def sample_db(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return build_sample_db(tmp_path_factory.mktemp("optimize"))
+
+
+@pytest.fixture()
+def db_path(sample_db: Path, tmp_path: Path) -> Path:
+    path = tmp_path / "dblp.sqlite"
+    shutil.copyfile(sample_db, path)
+    return path
+
+
+def _check(db_path: Path) -> tuple[int, int]:
+    """Verify the file and its FTS index; returns its page size and publication count."""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        assert conn.execute("PRAGMA quick_check;").fetchone()[0] == "ok"
+        assert conn.execute("SELECT COUNT(*) FROM title_fts WHERE title_fts MATCH 'engine';").fetchone()[0] == 3
+        page_size = conn.execute("PRAGMA page_size;").fetchone()[0]
+        publications = conn.execute("SELECT COUNT(*) FROM publications;").fetchone()[0]
+    finally:
+        conn.close()
+    return page_size, publications
+
+
+def test_optimize_changes_the_page_size(db_path: Path) -> None:
+    stats = optimize_db(db_path, _noop, _noop, lambda: False, page_size=8192)["optimize"]
+    assert _check(db_path) == (8192, 6)
+    assert (stats["page_size_before"], stats["page_size_after"]) == (4096, 8192)
+    assert sorted(path.name for path in db_path.parent.iterdir()) == ["dblp.sqlite"]
+
+
+def test_optimize_rejects_invalid_page_sizes(db_path: Path) -> None:
+    with pytest.raises(ValueError):
+        optimize_db(db_path, _noop, _noop, lambda: False, page_size=3000)
+
+
+def test_vacuum_is_skipped_without_disk_space(db_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    usage = namedtuple("usage", "total used free")
+    monkeypatch.setattr(optimize.shutil, "disk_usage", lambda path: usage(1, 1, 0))
+    lines: list[str] = []
+    stats = optimize_db(db_path, lines.append, _noop, lambda: False, page_size=8192)["optimize"]
+    assert any(line.startswith("Skipping VACUUM INTO") for line in lines)
+    assert stats["page_size_after"] == 4096
+    assert _check(db_path) == (4096, 6)
+
+
+def _as_installed(db_path: Path) -> None:
+    # Installed databases use a rollback journal, so readers leave no -wal/-shm.
+    conn = sqlite3.connect(str(db_path))
+    try:
+        assert conn.execute("PRAGMA journal_mode = DELETE;").fetchone()[0] == "delete"
+    finally:
+        conn.close()
+
+
+def test_optimize_live_db_swaps_in_a_compacted_copy(db_path: Path) -> None:
+    _as_installed(db_path)
+    reader = sqlite3.connect(str(db_path))
+    try:
+        assert reader.execute("SELECT COUNT(*) FROM publications;").fetchone()[0] == 6
+        optimize_live_db(db_path, _noop, _noop, lambda: False, page_size=8192)
+        # The open connection keeps reading the file it opened.
+        assert reader.execute("SELECT COUNT(*) FROM publications;").fetchone()[0] == 6
+    finally:
+        reader.close()
+    assert _check(db_path) == (8192, 6)
+    conn = sqlite3.connect(str(db_path))
+    try:
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "delete"
+    finally:
+        conn.close()
+    assert sorted(path.name for path in db_path.parent.iterdir()) == ["dblp.sqlite"]
+
+
+def test_stopped_live_optimize_leaves_the_database_alone(db_path: Path) -> None:
+    _as_installed(db_path)
+    before = db_path.read_bytes()
+    with pytest.raises(InterruptedError):
+        optimize_live_db(db_path, _noop, _noop, lambda: True, page_size=8192)
+    assert db_path.read_bytes() == before
+    assert sorted(path.name for path in db_path.parent.iterdir()) == ["dblp.sqlite"]
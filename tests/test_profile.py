@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+
+def _profile(client, **params):
+    response = client.get("/api/authors/profile", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_profile_counts(client) -> None:
+    body = _profile(client, name="Ada Lovelace")
+    assert body["author"]["name"] == "Ada Lovelace"
+    assert body["publication_count"] == 5
+    assert [(c["name"], c["count"]) for c in body["coauthors"]] == [
+        ("Charles Babbage", 2),
+        ("Grace Hopper", 2),
+        ("Jürgen Schmidhuber", 1),
+    ]
+    assert body["years"] == [
+        {"year": None, "count": 1},
+        {"year": 1999, "count": 1},
+        {"year": 2001, "count": 1},
+        {"year": 2003, "count": 2},
+    ]
+    assert body["venues"] == [{"venue": "Taylor", "count": 3}, {"venue": "ACM", "count": 2}]
+
+
+def test_profile_pages_newest_first_with_undated_last(client) -> None:
+    first = _profile(client, name="Ada Lovelace", limit=2)
+    pages = [first]
+    while pages[-1]["next_cursor"]:
+        pages.append(_profile(client, author_id=first["author"]["id"], limit=2, cursor=pages[-1]["next_cursor"]))
+
+    years = [pub["year"] for page in pages for pub in page["publications"]]
+    assert years == [2003, 2003, 2001, 1999, None]
+    assert [len(page["publications"]) for page in pages] == [2, 2, 1]
+    # Aggregates only come with the first page.
+    assert all("publication_count" not in page for page in pages[1:])
+    ids = [pub["id"] for page in pages for pub in page["publications"]]
+    assert len(set(ids)) == 5
+
+
+def test_profile_lookup_by_folded_name_and_errors(client) -> None:
+    assert _profile(client, name="jurgen schmidhuber")["author"]["name"] == "Jürgen Schmidhuber"
+    assert client.get("/api/authors/profile", params={"name": "No Such Person"}).status_code == 404
+    assert client.get("/api/authors/profile").status_code == 400
+    assert client.get("/api/authors/profile", params={"author_id": 1, "cursor": "%%%"}).status_code == 400
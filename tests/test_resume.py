@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+from conftest import write_sample_dump
+
+from dblp_builder.pipeline import _build_db, read_checkpoint
+
+pytest.importorskip("lxml")
+
+def _noop(*args: object) -> None:
+    return None
+
+
+def _dump(db_path: Path) -> dict[str, list[tuple]]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return {
+            table: conn.execute(f"SELECT {columns} FROM {table} ORDER BY {columns};").fetchall()
+            for table, columns in (
+                ("publications", "id, title, year, venue, pub_type, raw_xml"),
+                ("authors", "id, name, name_key"),
+                ("pub_authors", "pub_id, author_id"),
+                ("title_fts", "rowid, title"),
+                ("author_fts", "rowid, name"),
+                ("venue_year_counts", "venue_key, year, pub_type, pub_count"),
+            )
+        }
+    finally:
+        conn.close()
+
+
+def _stop_after(calls: int):
+    seen = 0
+
+    def should_stop() -> bool:
+        nonlocal seen
+        seen += 1
+        return seen > calls
+
+    return should_stop
+
+
+def _count_stop_checks(xml_path: Path, db_path: Path) -> int:
+    checks = 0
+
+    def should_stop() -> bool:
+        nonlocal checks
+        checks += 1
+        return False
+
+    _build_db(xml_path, db_path, 100, 1000, _noop, _noop, should_stop)
+    return checks
+
+
+@pytest.fixture(scope="module")
+def clean_build(tmp_path_factory: pytest.TempPathFactory) -> tuple[Path, dict[str, list[tuple]], int]:
+    data_dir = tmp_path_factory.mktemp("resume")
+    xml_path = write_sample_dump(data_dir)
+    clean = data_dir / "clean.sqlite"
+    checks = _count_stop_checks(xml_path, clean)
+    return xml_path, _dump(clean), checks
+
+
+# 6 titled records: batches of 2 divide them evenly, batches of 4 leave a
+# partial last batch that is only committed with the final flush.
+@pytest.mark.parametrize("batch_size", [2, 4])
+def test_interrupted_builds_resume_to_a_clean_build(clean_build, tmp_path: Path, batch_size: int) -> None:
+    xml_path, expected, checks = clean_build
+    resumed_batches = set()
+    # Interrupt at every stop check, so the cut falls inside and on the edge of
+    # each batch.
+    for calls in range(checks):
+        db_path = tmp_path / f"interrupted-{calls}.sqlite"
+        with pytest.raises(InterruptedError):
+            _build_db(xml_path, db_path, batch_size, 1000, _noop, _noop, _stop_after(calls))
+
+        checkpoint = read_checkpoint(db_path)
+        if checkpoint is not None:
+            assert checkpoint["status"] == "building"
+            assert checkpoint["processed_records"] % batch_size == 0
+            resumed_batches.add(checkpoint["processed_records"] // batch_size)
+
+        stats = _build_db(xml_path, db_path, batch_size, 1000, _noop, _noop, lambda: False, resume=True)
+        assert stats["processed_records"] == len(expected["publications"])
+        assert _dump(db_path) == expected, f"resume after {calls} stop checks"
+        assert read_checkpoint(db_path)["status"] == "completed"
+
+    assert resumed_batches == set(range(1, len(expected["publications"]) // batch_size + 1))
+
+
+def test_resume_of_a_completed_build_is_a_no_op(clean_build, tmp_path: Path) -> None:
+    batch_size = 2
+    xml_path, expected, _ = clean_build
+    db_path = tmp_path / "done.sqlite"
+    _build_db(xml_path, db_path, batch_size, 1000, _noop, _noop, lambda: False)
+    stats = _build_db(xml_path, db_path, batch_size, 1000, _noop, _noop, lambda: False, resume=True)
+    assert stats["processed_records"] == len(expected["publications"])
+    assert _dump(db_path) == expected
+
+
+def test_resume_refuses_a_changed_dump(clean_build, tmp_path: Path) -> None:
+    batch_size = 2
+    xml_path, _, checks = clean_build
+    db_path = tmp_path / "changed.sqlite"
+    with pytest.raises(InterruptedError):
+        _build_db(xml_path, db_path, batch_size, 1000, _noop, _noop, _stop_after(checks - 1))
+    xml_path.touch()
+    try:
+        with pytest.raises(RuntimeError, match="changed since the checkpoint"):
+            _build_db(xml_path, db_path, batch_size, 1000, _noop, _noop, lambda: False, resume=True)
+    finally:
+        write_sample_dump(xml_path.parent)
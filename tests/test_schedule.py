@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from dblp_builder.schedule import in_window, parse_windows
+
+
+def _at(hour: int, minute: int) -> datetime:
+    return datetime(2026, 1, 1, hour, minute, tzinfo=timezone.utc)
+
+
+def test_parse_windows() -> None:
+    assert parse_windows("") == []
+    assert parse_windows("01:00-05:00") == [(60, 300)]
+    assert parse_windows(" 01:00-05:00 , 22:30-02:00 ,") == [(60, 300), (1350, 120)]
+    assert parse_windows("00:00-24:00") == [(0, 1440)]
+
+
+@pytest.mark.parametrize("spec", ["1-5", "01:00", "01:00-05:00-06:00", "25:00-26:00", "aa:bb-01:00", "-01:00-02:00"])
+def test_parse_windows_rejects_malformed_specs(spec: str) -> None:
+    with pytest.raises(ValueError):
+        parse_windows(spec)
+
+
+def test_no_windows_means_always_open() -> None:
+    assert in_window([], _at(13, 37))
+
+
+@pytest.mark.parametrize(
+    ("hour", "minute", "expected"),
+    [(0, 59, False), (1, 0, True), (4, 59, True), (5, 0, False), (12, 0, False)],
+)
+def test_in_window_is_half_open(hour: int, minute: int, expected: bool) -> None:
+    assert in_window(parse_windows("01:00-05:00"), _at(hour, minute)) is expected
+
+
+@pytest.mark.parametrize(
+    ("hour", "minute", "expected"),
+    [(22, 29, False), (22, 30, True), (23, 59, True), (0, 0, True), (1, 59, True), (2, 0, False)],
+)
+def test_in_window_wraps_past_midnight(hour: int, minute: int, expected: bool) -> None:
+    assert in_window(parse_windows("22:30-02:00"), _at(hour, minute)) is expected
+
+
+def test_in_window_checks_every_window() -> None:
+    windows = parse_windows("01:00-02:00,13:00-14:00")
+    assert in_window(windows, _at(13, 30))
+    assert not in_window(windows, _at(7, 0))
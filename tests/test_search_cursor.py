@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+
+def test_cursor_round_trip(app_module) -> None:
+    values = {"s": -12.5, "id": 4711}
+    cursor = app_module._encode_cursor(values)
+    assert "=" not in cursor
+    assert app_module._decode_cursor(cursor) == values
+
+
+def test_empty_cursor_means_first_page(app_module) -> None:
+    assert app_module._decode_cursor(None) is None
+    assert app_module._decode_cursor("") is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"{not json").decode("ascii"),
+        base64.urlsafe_b64encode(b"[1, 2]").decode("ascii"),
+        "é",
+    ],
+)
+def test_invalid_cursor_is_a_400(app_module, cursor: str) -> None:
+    with pytest.raises(HTTPException) as excinfo:
+        app_module._decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
+
+
+def test_search_pages_through_every_match(client) -> None:
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "engine", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/publications/search", params=params).json()
+        assert body["count"] <= 2
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    full = client.get("/api/publications/search", params={"q": "engine", "limit": 50}).json()
+    assert seen == [item["id"] for item in full["items"]]
+    assert len(seen) == len(set(seen)) == 3
+
+
+def test_highlight_escapes_title_markup(client) -> None:
+    body = client.get("/api/publications/search", params={"q": "loops", "highlight": "true"}).json()
+    (item,) = body["items"]
+    assert item["title"] == "Engines & <loops> revisited."
+    assert item["snippet"] == "Engines &amp; &lt;<mark>loops</mark>&gt; revisited."
+
+
+def test_search_without_highlight_has_no_snippet(client) -> None:
+    body = client.get("/api/publications/search", params={"q": "compilers"}).json()
+    assert body["count"] == 2
+    assert all("snippet" not in item for item in body["items"])
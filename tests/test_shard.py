@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from dblp_builder.pipeline import PipelineConfig, _build_db
+from dblp_builder.shard import build_shard, merge_shards, plan_shards, record_offsets, shard_byte_range, shard_path
+
+pytest.importorskip("lxml")
+
+DTD = """<!ELEMENT dblp (article|inproceedings|proceedings|book|incollection|phdthesis|mastersthesis|www)*>
+<!ENTITY uuml "&#252;">
+"""
+
+# Authors recur across what become different shards, and one record has no
+# title, so shard-local author IDs and record counts both differ from the
+# serial build.
+RECORDS = [
+    '<article key="a/1"><author>Ada Lovelace</author><author>Charles Babbage</author>'
+    "<title>Notes on the engine.</title><year>1843</year><journal>Taylor</journal></article>",
+    '<inproceedings key="b/2"><author>Grace Hopper</author><title>Compilers.</title>'
+    "<year>1952</year><booktitle>ACM</booktitle></inproceedings>",
+    '<article key="a/3"><author>J&uuml;rgen Schmidhuber</author><author>Ada Lovelace</author>'
+    "<title>Long memory.</title><year>1997</year><journal>Neural Comput.</journal></article>",
+    '<www key="homepages/x"><author>Nobody Here</author></www>',
+    '<article key="a/5"><author>Charles Babbage</author><author>Grace Hopper</author>'
+    "<title>Difference engines.</title><year>1822</year><journal>Taylor</journal></article>",
+    '<book key="c/6"><author>Alan Turing</author><author>J&uuml;rgen Schmidhuber</author>'
+    "<title>Computable numbers.</title><year>1936</year></book>",
+    '<article key="a/7"><author>Alan Turing</author><title>Computing machinery.</title>'
+    "<year>1950</year><journal>Mind</journal></article>",
+]
+
+
+def _noop(*args: object) -> None:
+    return None
+
+
+@pytest.fixture()
+def config(tmp_path: Path) -> PipelineConfig:
+    (tmp_path / "dblp.dtd").write_text(DTD, encoding="utf-8")
+    xml = '<?xml version="1.0" encoding="ISO-8859-1"?>\n<!DOCTYPE dblp SYSTEM "dblp.dtd">\n<dblp>\n'
+    xml += "".join(record + "\n" for record in RECORDS) + "</dblp>\n"
+    (tmp_path / "dblp.xml").write_text(xml, encoding="latin-1")
+    return PipelineConfig(xml_gz_url="", dtd_url="", data_dir=tmp_path, batch_size=100)
+
+
+def _dump(db_path: Path) -> dict[str, list[tuple]]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return {
+            "publications": conn.execute(
+                "SELECT id, title, year, venue, pub_type, raw_xml FROM publications ORDER BY id;"
+            ).fetchall(),
+            "authors": conn.execute("SELECT id, name, name_key FROM authors ORDER BY id;").fetchall(),
+            "pub_authors": conn.execute(
+                "SELECT pub_id, author_id FROM pub_authors ORDER BY pub_id, author_id;"
+            ).fetchall(),
+            "title_fts": conn.execute(
+                "SELECT rowid FROM title_fts WHERE title_fts MATCH 'engine*' ORDER BY rowid;"
+            ).fetchall(),
+            "author_fts": conn.execute(
+                "SELECT rowid FROM author_fts WHERE author_fts MATCH 'hopper' ORDER BY rowid;"
+            ).fetchall(),
+        }
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize(("total", "count"), [(0, 1), (1, 3), (7, 1), (7, 3), (10, 4), (3, 7)])
+def test_plan_shards_covers_every_record_once(total: int, count: int) -> None:
+    ranges = plan_shards(total, count)
+    assert len(ranges) == count
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] is None
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+    covered = [i for start, end in ranges for i in range(start, total if end is None else min(end, total))]
+    assert covered == list(range(total))
+
+
+def test_plan_shards_rejects_zero_shards() -> None:
+    with pytest.raises(ValueError):
+        plan_shards(10, 0)
+
+
+def test_record_offsets_point_at_record_start_tags(config: PipelineConfig) -> None:
+    offsets = record_offsets(config.xml_path)
+    data = config.xml_path.read_bytes()
+    assert len(offsets) == len(RECORDS) + 1
+    for offset, record in zip(offsets, RECORDS):
+        assert data[offset:].startswith(record.split(" ", 1)[0].encode("latin-1"))
+    assert data[offsets[-1] :] == b"</dblp>\n"
+    assert shard_byte_range(offsets, 2, 4) == (offsets[2], offsets[4])
+    assert shard_byte_range(offsets, 5, None) == (offsets[5], offsets[-1])
+    assert shard_byte_range(offsets, 20, None) == (offsets[-1], offsets[-1])
+
+
+@pytest.mark.parametrize("shard_count", [1, 2, 3, 7])
+def test_merged_shards_match_a_serial_build(config: PipelineConfig, tmp_path: Path, shard_count: int) -> None:
+    serial = tmp_path / "serial.sqlite"
+    _build_db(config.xml_path, serial, 100, 1000, _noop, _noop, lambda: False)
+
+    offsets = record_offsets(config.xml_path)
+    paths = []
+    for index, (start, end) in enumerate(plan_shards(len(offsets) - 1, shard_count)):
+        build_shard(config, index, shard_count, shard_byte_range(offsets, start, end), _noop, _noop, lambda: False)
+        paths.append(shard_path(config, index, shard_count))
+    merged = tmp_path / "merged.sqlite"
+    stats = merge_shards(paths, merged, _noop, _noop, lambda: False)
+
+    assert stats["processed_records"] == len(RECORDS) - 1
+    assert _dump(merged) == _dump(serial)
+
+
+def test_merge_refuses_incomplete_shards(config: PipelineConfig, tmp_path: Path) -> None:
+    with pytest.raises(RuntimeError):
+        merge_shards([tmp_path / "missing.sqlite"], tmp_path / "merged.sqlite", _noop, _noop, lambda: False)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+from conftest import build_sample_db
+
+from dblp_builder.snapshot import install_snapshot, read_installed_manifest, write_snapshot
+
+
+def test_concurrent_installs_copy_the_snapshot_once(tmp_path: Path) -> None:
+    pytest.importorskip("lxml")
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+    db_path = build_sample_db(build_dir)
+    snapshot_dir = write_snapshot(db_path, tmp_path / "snapshots", None, lambda msg: None)
+
+    live = tmp_path / "serve" / "dblp.sqlite"
+    lines: list[str] = []
+    errors: list[Exception] = []
+
+    def install() -> None:
+        try:
+            install_snapshot(tmp_path / "snapshots", live, lines.append)
+        except Exception as exc:
+            errors.append(exc)
+
+    workers = [threading.Thread(target=install) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert not errors
+    assert sum(line.startswith("Installing snapshot") for line in lines) == 1
+    assert sum(line.endswith("already installed at " + str(live)) for line in lines) == 3
+    assert read_installed_manifest(live)["version"] == snapshot_dir.name
+    conn = sqlite3.connect(str(live))
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM publications;").fetchone()[0] == 6
+    finally:
+        conn.close()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+
+import pytest
+from conftest import write_sample_dump
+
+from dblp_builder.pipeline import PipelineConfig, run_pipeline
+from dblp_builder.shard import build_shard, merge_shards, plan_shards, record_offsets, shard_byte_range, shard_path
+from dblp_builder.throttle import Throttle
+
+pytest.importorskip("lxml")
+
+
+class RecordingThrottle(Throttle):
+    def __init__(self) -> None:
+        super().__init__()
+        self.events: list[tuple[str, int]] = []
+
+    def pace(self, should_stop, records: int = 0, bytes_hint: int = 0) -> None:
+        self.events.append(("pace", records))
+
+    def finish(self) -> None:
+        self.events.append(("finish", 0))
+
+
+def _noop(*args: object) -> None:
+    return None
+
+
+@pytest.fixture()
+def config(tmp_path: Path) -> PipelineConfig:
+    xml_path = write_sample_dump(tmp_path)
+    with gzip.open(tmp_path / "dblp.xml.gz", "wb") as fh:
+        fh.write(xml_path.read_bytes())
+    return PipelineConfig(xml_gz_url="", dtd_url="", data_dir=tmp_path, offline=True, batch_size=100)
+
+
+def test_build_paces_aggregates_and_optimize_steps(config: PipelineConfig) -> None:
+    throttle = RecordingThrottle()
+    run_pipeline(config, _noop, _noop, lambda: False, throttle=throttle)
+    # Aggregates, two FTS merges, ANALYZE and VACUUM INTO are each followed by
+    # a pace; the throttle is only finished once optimize is done.
+    assert throttle.events[-6:] == [("pace", 0)] * 5 + [("finish", 0)]
+    assert throttle.events.count(("finish", 0)) == 1
+
+
+def test_merge_paces_every_shard(config: PipelineConfig, tmp_path: Path) -> None:
+    offsets = record_offsets(config.xml_path)
+    paths = []
+    for index, (start, end) in enumerate(plan_shards(len(offsets) - 1, 3)):
+        build_shard(config, index, 3, shard_byte_range(offsets, start, end), _noop, _noop, lambda: False)
+        paths.append(shard_path(config, index, 3))
+
+    throttle = RecordingThrottle()
+    stats = merge_shards(paths, tmp_path / "merged.sqlite", _noop, _noop, lambda: False, throttle=throttle)
+    shard_records = [event[1] for event in throttle.events[:3]]
+    assert sum(shard_records) == stats["processed_records"] == 6
+    # Then the FTS rebuild and the aggregates.
+    assert throttle.events[3:] == [("pace", 0), ("pace", 0)]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from conftest import ROOT, build_sample_db
+
+from traffic import AppTarget
+
+
+def test_app_target_does_not_touch_production_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("lxml")
+    pytest.importorskip("fastapi")
+    db_path = build_sample_db(tmp_path)
+    production_state = tmp_path / "pipeline_state.sqlite"
+    capture = tmp_path / "traffic_capture.jsonl"
+    # What a service environment looks like; the replay worker inherits it.
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("PIPELINE_STATE_PATH", str(production_state))
+    monkeypatch.setenv("SCHEDULE_INTERVAL_HOURS", "1")
+    monkeypatch.setenv("CAPTURE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("CAPTURE_PATH", str(capture))
+    monkeypatch.setenv("WARMUP_ENABLED", "0")
+
+    target = AppTarget(db_path, ROOT / "app.py")
+    try:
+        status, body = target.send({"method": "GET", "path": "/api/stats", "query": {}})
+        assert status == 200
+        assert body["publications"] == 6
+        status, body = target.send({"method": "GET", "path": "/api/state", "query": {}})
+        assert status == 200
+        assert body["status"] == "idle"
+        assert body["schedule"]["enabled"] is False
+    finally:
+        target.close()
+
+    assert not production_state.exists()
+    assert not capture.exists()
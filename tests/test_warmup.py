@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+
+def _wait_for(predicate, timeout: float = 10.0) -> None:
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_warmup_retries_after_an_unexpected_error(app_module, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = 0
+    original_load = app_module.query_backend.load
+
+    def flaky_load() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ValueError("malformed member list")
+        original_load()
+
+    monkeypatch.setattr(app_module, "WARMUP_RETRY_SECONDS", 0.3)
+    monkeypatch.setattr(app_module.query_backend, "load", flaky_load)
+    warmup = app_module.Warmup()
+    warmup.start()
+
+    # The failure is reported, and the thread goes on to retry instead of dying.
+    _wait_for(lambda: warmup.check()["status"] == "error")
+    state = warmup.check()
+    assert state["message"] == "ValueError: malformed member list"
+    assert not state["ready"]
+
+    _wait_for(lambda: warmup.check()["ready"])
+    state = warmup.check()
+    assert state["status"] == "ready"
+    assert state["message"] == ""
+    assert "backend_load_ms" in state["steps"]
+    assert calls == 2
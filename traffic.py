@@ -0,0 +1,594 @@
+"""Capture sampled query traffic and replay it against service instances.
+
+Capture is done by the service (see ``CAPTURE_SAMPLE_RATE``); replay is a CLI::
+
+    python -m traffic replay data/traffic.jsonl --target http://new:8091 --baseline http://old:8091
+    python -m traffic replay data/traffic.jsonl --target db:/data/new.sqlite --baseline db:/data/dblp.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger("dblp_service")
+
+ANON_PREFIX = "anon:"
+_NAME_QUERY_PARAMS = ("name",)
+_NAME_BODY_FIELDS = ("left", "right")
+
+
+def _anonymize(value: str, salt: str) -> str:
+    digest = hashlib.sha256(f"{salt}\0{value}".encode("utf-8")).hexdigest()[:16]
+    return f"{ANON_PREFIX}{digest}"
+
+
+class TrafficCapture:
+    """Appends a sample of query requests to a JSONL file.
+
+    Each line holds the method, path, query string, JSON body, status and
+    duration. With ``anonymize`` author names are replaced by keyed hashes, so
+    the same name always maps to the same token (skew is preserved) but the
+    capture can be shared. Capturing stops once the file reaches ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        sample_rate: float,
+        anonymize: bool = False,
+        salt: str = "",
+        max_bytes: int = 0,
+    ) -> None:
+        self.path = path
+        self.sample_rate = max(0.0, min(float(sample_rate), 1.0))
+        self.anonymize = anonymize
+        self.salt = salt
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._full = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and not self._full
+
+    def should_sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def _scrub(self, query: str, body: Any) -> tuple[str, Any]:
+        if not self.anonymize:
+            return query, body
+        params = [
+            (key, _anonymize(value, self.salt) if key in _NAME_QUERY_PARAMS else value)
+            for key, value in parse_qsl(query, keep_blank_values=True)
+        ]
+        if isinstance(body, dict):
+            body = dict(body)
+            for field in _NAME_BODY_FIELDS:
+                if isinstance(body.get(field), list):
+                    body[field] = [_anonymize(str(name), self.salt) for name in body[field]]
+        return urlencode(params), body
+
+    def write(
+        self,
+        method: str,
+        path: str,
+        query: str,
+        body: Any,
+        status_code: int,
+        duration_ms: float,
+    ) -> None:
+        query, body = self._scrub(query, body)
+        record = {
+            "ts": round(time.time(), 3),
+            "method": method,
+            "path": path,
+            "query": query,
+            "body": body,
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "anonymized": self.anonymize,
+        }
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._full:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # One O_APPEND write per line keeps lines whole when several
+            # workers share the file.
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if self.max_bytes and os.fstat(fd).st_size + len(line) > self.max_bytes:
+                    self._full = True
+                    logger.warning("Traffic capture %s reached %d bytes; capture stopped.", self.path, self.max_bytes)
+                    return
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+
+def load_capture(path: Path, limit: int | None = None) -> list[dict[str, Any]]:
+    records: list[dict[str, Any]] = []
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            records.append(json.loads(line))
+            if limit is not None and len(records) >= limit:
+                break
+    records.sort(key=lambda record: record.get("ts", 0))
+    return records
+
+
+# Replay targets ---------------------------------------------------------------
+
+Response = tuple[int, Any]
+
+
+class HttpTarget:
+    def __init__(self, base_url: str, timeout: float) -> None:
+        import requests
+
+        self.name = base_url
+        self._base_url = base_url.rstrip("/")
+        self._timeout = timeout
+        self._local = threading.local()
+        self._requests = requests
+        self._sessions: list[Any] = []
+        self._lock = threading.Lock()
+
+    def _session(self) -> Any:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def send(self, record: dict[str, Any]) -> Response:
+        url = f"{self._base_url}{record['path']}"
+        if record.get("query"):
+            url = f"{url}?{record['query']}"
+        response = self._session().request(record["method"], url, json=record.get("body"), timeout=self._timeout)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, response.text
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
+
+async def _call_asgi(app: Any, record: dict[str, Any]) -> tuple[int, bytes]:
+    body = b"" if record.get("body") is None else json.dumps(record["body"]).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": record["method"],
+        "scheme": "http",
+        "path": record["path"],
+        "raw_path": record["path"].encode("utf-8"),
+        "query_string": (record.get("query") or "").encode("latin1"),
+        "root_path": "",
+        "headers": [
+            (b"host", b"replay"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("replay", 80),
+    }
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, Any]:
+        if pending:
+            return pending.pop()
+        # The client never disconnects; block until the app is done.
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def _serve_app(conn: Any, db_path: Path | None, app_path: Path) -> None:
+    """Worker process entry point: load ``app_path`` and answer requests from ``conn``.
+
+    The worker is spawned with a fresh interpreter, so ``app.py`` and its
+    sibling modules (``query_backend``, ``dblp_builder``, ...) all come from
+    ``app_path``'s checkout and nothing is shared with other targets. It
+    inherits the environment, so anything that would write next to the
+    production data (pipeline state, capture, scheduled builds, snapshot
+    installs) is pointed at a private temp directory or disabled.
+    """
+    state_dir = tempfile.mkdtemp(prefix="replay-state-")
+    if db_path is not None:
+        os.environ["DB_PATH"] = str(db_path)
+    os.environ["PIPELINE_STATE_PATH"] = str(Path(state_dir) / "pipeline_state.sqlite")
+    os.environ["SCHEDULE_INTERVAL_HOURS"] = "0"
+    os.environ["CAPTURE_SAMPLE_RATE"] = "0"
+    os.environ["SNAPSHOT_PATH"] = ""
+    try:
+        _run_app(conn, app_path)
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def _run_app(conn: Any, app_path: Path) -> None:
+    sys.path.insert(0, str(app_path.parent))
+    try:
+        spec = importlib.util.spec_from_file_location("app", app_path)
+        if spec is None or spec.loader is None:
+            raise RuntimeError(f"Cannot load {app_path}")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["app"] = module
+        spec.loader.exec_module(module)
+    except BaseException as exc:
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+        conn.close()
+        return
+    conn.send(("ready", None))
+
+    app = module.app
+    send_lock = threading.Lock()
+    loop = asyncio.new_event_loop()
+
+    async def handle(request_id: int, record: dict[str, Any]) -> None:
+        try:
+            status, raw = await _call_asgi(app, record)
+            reply = (request_id, status, raw, None)
+        except Exception as exc:
+            reply = (request_id, None, None, str(exc))
+        with send_lock:
+            conn.send(reply)
+
+    def read_requests() -> None:
+        try:
+            while True:
+                message = conn.recv()
+                if message is None:
+                    break
+                loop.call_soon_threadsafe(loop.create_task, handle(*message))
+        except (EOFError, OSError):
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+
+    reader = threading.Thread(target=read_requests, name="replay-reader", daemon=True)
+    reader.start()
+    try:
+        loop.run_forever()
+        pending = asyncio.all_tasks(loop)
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+        conn.close()
+
+
+class AppTarget:
+    """Runs a copy of ``app.py`` bound to ``db_path`` in a worker process and calls it over ASGI.
+
+    Every target gets its own spawned process, so two database versions (or
+    two checkouts via ``app_path``) never share modules, caches or event
+    loops. Requests from the replay threads are multiplexed over one pipe and
+    served concurrently by the worker. Capture and the build scheduler are
+    disabled inside replayed instances, and each keeps its pipeline state in a
+    temp directory.
+    """
+
+    def __init__(self, db_path: Path | None, app_path: Path) -> None:
+        self.name = f"db:{db_path}" if db_path else f"app:{app_path}"
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_serve_app, args=(child_conn, db_path, app_path), name=f"replay {self.name}", daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        try:
+            state, detail = self._conn.recv()
+        except EOFError:
+            state, detail = "error", f"worker exited with code {self._process.exitcode}"
+        if state != "ready":
+            self.close()
+            raise RuntimeError(f"Cannot load {app_path} for {self.name}: {detail}")
+        self._ids = itertools.count()
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_replies, name="replay-replies", daemon=True)
+        self._reader.start()
+
+    def _read_replies(self) -> None:
+        try:
+            while True:
+                request_id, status, raw, error = self._conn.recv()
+                with self._lock:
+                    future = self._pending.pop(request_id)
+                if error is None:
+                    future.set_result((status, raw))
+                else:
+                    future.set_exception(RuntimeError(error))
+        except (EOFError, OSError):
+            pass
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError(f"{self.name}: worker process exited"))
+
+    def send(self, record: dict[str, Any]) -> Response:
+        future: Future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            self._conn.send((request_id, record))
+        status, raw = future.result()
+        try:
+            return status, json.loads(raw)
+        except ValueError:
+            return status, raw.decode("utf-8", "replace")
+
+    def close(self) -> None:
+        try:
+            self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._conn.close()
+
+
+def make_target(spec: str, timeout: float, app_path: Path) -> Any:
+    if spec.startswith(("http://", "https://")):
+        return HttpTarget(spec, timeout)
+    if spec == "app":
+        return AppTarget(None, app_path)
+    if spec.startswith("db:"):
+        return AppTarget(Path(spec[3:]).expanduser().resolve(), app_path)
+    raise ValueError(f"Unknown target {spec!r}; use http(s)://..., db:<path> or app")
+
+
+# Replay -----------------------------------------------------------------------
+
+
+def _percentiles(values: list[float]) -> dict[str, float | None]:
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 2),
+        "mean": round(sum(ordered) / len(ordered), 2),
+    }
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = {}
+        self.statuses: dict[str, int] = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, route: str, ms: float, status: int | None) -> None:
+        with self._lock:
+            self.latencies.setdefault(route, []).append(ms)
+            key = "error" if status is None else str(status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            if status is None:
+                self.errors += 1
+
+    def report(self) -> dict[str, Any]:
+        every = [ms for values in self.latencies.values() for ms in values]
+        return {
+            "requests": len(every),
+            "errors": self.errors,
+            "statuses": dict(sorted(self.statuses.items())),
+            "latency_ms": _percentiles(every),
+            "routes": {
+                route: {"requests": len(values), "latency_ms": _percentiles(values)}
+                for route, values in sorted(self.latencies.items())
+            },
+        }
+
+
+def _timed_send(target: Any, record: dict[str, Any]) -> tuple[float, Response | None, str | None]:
+    started = time.perf_counter()
+    try:
+        response = target.send(record)
+        error = None
+    except Exception as exc:
+        response, error = None, str(exc)
+    return (time.perf_counter() - started) * 1000, response, error
+
+
+def replay(
+    records: list[dict[str, Any]],
+    target: Any,
+    baseline: Any | None = None,
+    concurrency: int = 4,
+    speed: float = 0.0,
+    diff_out: Path | None = None,
+    max_diffs: int = 100,
+) -> dict[str, Any]:
+    """Send every record to ``target`` (and ``baseline``) and summarize.
+
+    ``speed`` > 0 keeps the captured inter-arrival times divided by ``speed``;
+    0 sends as fast as ``concurrency`` allows. With a baseline, each record is
+    sent to both and responses are compared as parsed JSON.
+    """
+    stats = {"target": _Stats(), "baseline": _Stats()}
+    diffs: list[dict[str, Any]] = []
+    diff_count = 0
+    diff_lock = threading.Lock()
+
+    def run(record: dict[str, Any]) -> None:
+        nonlocal diff_count
+        ms, response, error = _timed_send(target, record)
+        stats["target"].add(record["path"], ms, None if response is None else response[0])
+        if baseline is None:
+            return
+        base_ms, base_response, base_error = _timed_send(baseline, record)
+        stats["baseline"].add(record["path"], base_ms, None if base_response is None else base_response[0])
+        if response != base_response or error != base_error:
+            with diff_lock:
+                diff_count += 1
+                if len(diffs) < max_diffs:
+                    diffs.append(
+                        {
+                            "method": record["method"],
+                            "path": record["path"],
+                            "query": record.get("query"),
+                            "body": record.get("body"),
+                            "target": response if error is None else {"error": error},
+                            "baseline": base_response if base_error is None else {"error": base_error},
+                        }
+                    )
+
+    started = time.perf_counter()
+    first_ts = records[0].get("ts", 0) if records else 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = []
+        for record in records:
+            if speed > 0:
+                due = (record.get("ts", first_ts) - first_ts) / speed
+                delay = due - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(pool.submit(run, record))
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    report: dict[str, Any] = {
+        "records": len(records),
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(records) / elapsed, 2) if elapsed > 0 else None,
+        "target": {"name": target.name, **stats["target"].report()},
+    }
+    if baseline is not None:
+        report["baseline"] = {"name": baseline.name, **stats["baseline"].report()}
+        report["diffs"] = diff_count
+        if diff_out is not None:
+            with diff_out.open("w", encoding="utf-8") as fh:
+                for diff in diffs:
+                    fh.write(json.dumps(diff, ensure_ascii=False) + "\n")
+    return report
+
+
+def _cmd_replay(args: argparse.Namespace) -> int:
+    records = load_capture(args.capture, limit=args.limit)
+    if not records:
+        print(f"No records in {args.capture}", file=sys.stderr)
+        return 1
+    if any(record.get("anonymized") for record in records):
+        print("Note: capture is anonymized; author names will not resolve.", file=sys.stderr)
+    app_path = args.app.expanduser().resolve()
+    baseline_app_path = (args.baseline_app or args.app).expanduser().resolve()
+    targets: list[Any] = []
+    try:
+        try:
+            target = make_target(args.target, args.timeout, app_path)
+            targets.append(target)
+            baseline = None
+            if args.baseline:
+                baseline = make_target(args.baseline, args.timeout, baseline_app_path)
+                targets.append(baseline)
+        except (ValueError, RuntimeError) as exc:
+            print(exc, file=sys.stderr)
+            return 2
+        report = replay(
+            records,
+            target,
+            baseline=baseline,
+            concurrency=args.concurrency,
+            speed=args.speed,
+            diff_out=args.diff_out,
+            max_diffs=args.max_diffs,
+        )
+    finally:
+        for opened in targets:
+            opened.close()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m traffic", description="Replay captured query traffic.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("replay", help="Replay a capture and report latencies (and diffs with --baseline).")
+    cmd.add_argument("capture", type=Path, help="JSONL file written by the service (CAPTURE_PATH).")
+    cmd.add_argument(
+        "--target",
+        required=True,
+        help="http(s)://host:port, db:<sqlite path> (local worker process) or app (local worker, current env).",
+    )
+    cmd.add_argument("--baseline", default=None, help="Second target to compare responses against.")
+    cmd.add_argument("--concurrency", type=int, default=4)
+    cmd.add_argument("--speed", type=float, default=0.0, help="Replay at N x captured pace (0: as fast as possible).")
+    cmd.add_argument("--limit", type=int, default=None, help="Replay only the first N records.")
+    cmd.add_argument("--timeout", type=float, default=60.0, help="HTTP timeout in seconds.")
+    cmd.add_argument(
+        "--app",
+        type=Path,
+        default=Path(__file__).with_name("app.py"),
+        help="app.py used for db:/app targets (point at another checkout to compare code versions).",
+    )
+    cmd.add_argument(
+        "--baseline-app",
+        type=Path,
+        default=None,
+        help="app.py used for a db:/app baseline (default: --app).",
+    )
+    cmd.add_argument("--diff-out", type=Path, default=None, help="Write differing responses here as JSONL.")
+    cmd.add_argument("--max-diffs", type=int, default=100)
+    cmd.set_defaults(func=_cmd_replay)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())